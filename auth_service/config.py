@@ -1,18 +1,20 @@
 import os
 from dotenv import load_dotenv
+from shared.engine import DB_URL
 
 load_dotenv()
 
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
-
 SCHEDULER_KEY=os.getenv("SCHEDULER_KEY")
+# Ключ для выдачи токенов администратора; не задан — такие токены не выдаются
+ADMIN_KEY = os.getenv("ADMIN_KEY")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 
-DB_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
 
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
\ No newline at end of file
+# Кеш дайджест API-ключа -> hotel_id: размер и TTL (0 — без кеша) для найденных
+# и отдельно для неверных ключей
+API_KEY_CACHE_SIZE = int(os.getenv("API_KEY_CACHE_SIZE", 10000))
+API_KEY_CACHE_TTL = float(os.getenv("API_KEY_CACHE_TTL", 300))
+API_KEY_NEGATIVE_CACHE_SIZE = int(os.getenv("API_KEY_NEGATIVE_CACHE_SIZE", 10000))
+API_KEY_NEGATIVE_TTL = float(os.getenv("API_KEY_NEGATIVE_TTL", 30))
\ No newline at end of file
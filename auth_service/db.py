@@ -1,9 +1,8 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import NullPool
 from auth_service.config import DB_URL, SCHEDULER_KEY
+from shared.engine import create_db_engine
 
-engine = create_engine(DB_URL, poolclass=NullPool)
+engine = create_db_engine(DB_URL, name="auth")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -0,0 +1,115 @@
+"""
+Кеш дайджест API-ключа -> hotel_id в памяти процесса auth_service.
+
+В установившемся режиме выдача токена не обращается к БД. Найденные ключи
+хранятся API_KEY_CACHE_TTL секунд, неверные — API_KEY_NEGATIVE_TTL секунд
+в отдельном LRU, чтобы перебор ключей не вытеснял действующие.
+Смена ключа через /admin сбрасывает записи сразу; изменения в БД в обход
+auth_service становятся видны по истечении TTL (в каждой реплике отдельно).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from auth_service.config import (
+    API_KEY_CACHE_SIZE, API_KEY_CACHE_TTL, API_KEY_NEGATIVE_CACHE_SIZE, API_KEY_NEGATIVE_TTL,
+)
+from shared.metrics import counter
+
+api_key_cache_requests = counter("auth_api_key_cache_total", "Проверки API-ключа по результату обращения к кешу")
+api_key_cache_invalidations = counter("auth_api_key_cache_invalidations_total", "Сбросы кеша API-ключей")
+
+
+class ApiKeyCache:
+    def __init__(
+        self,
+        size: int = API_KEY_CACHE_SIZE,
+        ttl: float = API_KEY_CACHE_TTL,
+        negative_size: int = API_KEY_NEGATIVE_CACHE_SIZE,
+        negative_ttl: float = API_KEY_NEGATIVE_TTL,
+    ):
+        self.size = size
+        self.ttl = ttl
+        self.negative_size = negative_size
+        self.negative_ttl = negative_ttl
+        # Увеличивается при каждом сбросе: результат поиска, начатого до сброса, не кешируется
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._hotels: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._invalid: "OrderedDict[str, float]" = OrderedDict()
+
+    def get(self, digest: str) -> Tuple[bool, Optional[int]]:
+        """
+        Returns:
+            (есть ли запись, hotel_id или None для неверного ключа).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._hotels.get(digest)
+            if entry is not None:
+                if now < entry[0]:
+                    self._hotels.move_to_end(digest)
+                    api_key_cache_requests.inc(result="hit")
+                    return True, entry[1]
+                del self._hotels[digest]
+
+            expires = self._invalid.get(digest)
+            if expires is not None:
+                if now < expires:
+                    api_key_cache_requests.inc(result="negative_hit")
+                    return True, None
+                del self._invalid[digest]
+
+        api_key_cache_requests.inc(result="miss")
+        return False, None
+
+    def set(self, digest: str, hotel_id: Optional[int], generation: int):
+        """
+        Запоминает результат поиска в БД, начатого при данном поколении кеша.
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            if hotel_id is not None and self.ttl > 0:
+                self._hotels[digest] = (time.monotonic() + self.ttl, hotel_id)
+                self._hotels.move_to_end(digest)
+                while len(self._hotels) > self.size:
+                    self._hotels.popitem(last=False)
+            elif hotel_id is None and self.negative_ttl > 0:
+                self._invalid[digest] = time.monotonic() + self.negative_ttl
+                self._invalid.move_to_end(digest)
+                while len(self._invalid) > self.negative_size:
+                    self._invalid.popitem(last=False)
+
+    def invalidate(self, hotel_id: Optional[int] = None, digest: Optional[str] = None) -> int:
+        """
+        Сбрасывает записи отеля и (или) ключа; без аргументов — весь кеш.
+
+        Returns:
+            int: число удалённых записей.
+        """
+        with self._lock:
+            self.generation += 1
+            if hotel_id is None and digest is None:
+                removed = len(self._hotels) + len(self._invalid)
+                self._hotels.clear()
+                self._invalid.clear()
+            else:
+                stale = [d for d, (_, h) in self._hotels.items() if h == hotel_id or d == digest]
+                for d in stale:
+                    del self._hotels[d]
+                removed = len(stale)
+                if hotel_id is not None:
+                    # Неверные ключи не связаны с отелем: новый ключ отеля мог быть
+                    # отвергнут до смены и остаться в отрицательном кеше
+                    removed += len(self._invalid)
+                    self._invalid.clear()
+                elif self._invalid.pop(digest, None) is not None:
+                    removed += 1
+        api_key_cache_invalidations.inc()
+        return removed
+
+
+api_key_cache = ApiKeyCache()
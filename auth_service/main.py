@@ -1,15 +1,31 @@
+import hmac
 import logging
+from typing import Optional
 from fastapi import FastAPI, Header, HTTPException, Depends
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from auth_service.db import get_session, SCHEDULER_KEY
+from auth_service.config import ADMIN_KEY
+from auth_service.db import get_session, SessionLocal, SCHEDULER_KEY
+from auth_service.key_cache import api_key_cache
 from auth_service.model_hotel_db import Hotel
 from auth_service.utils import create_access_token
+from shared.api_keys import generate_api_key, hash_api_key
+from shared.metrics import render_prometheus
+from shared.responses import FastJSONResponse, setup_responses
+from shared.singleflight import SingleFlight
+from shared.tracing import setup_tracing
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Auth Service API")
+app = FastAPI(title="Auth Service API", default_response_class=FastJSONResponse)
+setup_responses(app)
+setup_tracing(app, "auth")
+
+
+# Одновременные входы с одним ключом при пустом кеше читают БД один раз
+_lookups = SingleFlight("api_key_lookup")
 
 
 class TokenResponse(BaseModel):
@@ -17,11 +33,25 @@ class TokenResponse(BaseModel):
     token_type: str = "bearer"
 
 
+class ApiKeyResponse(BaseModel):
+    hotel_id: int
+    api_key: str
+
+
+class InvalidateResponse(BaseModel):
+    invalidated: int
+
+
 @app.get("/")
 def root():
     return {"message": "AUTH_SERVICE работает!"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return render_prometheus()
+
+
 @app.post("/token/system", response_model=TokenResponse)
 def generate_system_token(
     x_system_key: str = Header(default=None)
@@ -38,10 +68,46 @@ def generate_system_token(
     return TokenResponse(access_token=token)
 
 
+def require_admin_key(x_admin_key: str = Header(default=None)):
+    if not ADMIN_KEY or not x_admin_key or not hmac.compare_digest(x_admin_key, ADMIN_KEY):
+        logger.warning("Неверная попытка авторизации ключом администратора")
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+
+@app.post("/token/admin", response_model=TokenResponse, dependencies=[Depends(require_admin_key)])
+def generate_admin_token():
+    """
+    Генерация токена администратора (выгрузки по всем отелям группы).
+    """
+    payload = {"sub": "admin", "role": "admin"}
+    token = create_access_token(payload)
+    return TokenResponse(access_token=token)
+
+
+def _find_hotel_id(digest: str) -> Optional[int]:
+    """
+    hotel_id по дайджесту API-ключа: из кеша, при промахе — из БД.
+
+    Returns:
+        Optional[int]: hotel_id или None, если ключ неверный.
+    """
+    cached, hotel_id = api_key_cache.get(digest)
+    if cached:
+        return hotel_id
+
+    def lookup() -> Optional[int]:
+        generation = api_key_cache.generation
+        with SessionLocal() as db:
+            found = db.query(Hotel.id).filter(Hotel.api_key_hash == digest).scalar()
+        api_key_cache.set(digest, found, generation)
+        return found
+
+    return _lookups.do(digest, lookup)
+
+
 @app.post("/token/user", response_model=TokenResponse)
 def generate_user_token(
     x_api_key: str = Header(default=None),
-    db: Session = Depends(get_session)
 ):
     """
     Генерация токена для отеля по API-ключу.
@@ -49,13 +115,51 @@ def generate_user_token(
     if not x_api_key:
         raise HTTPException(status_code=400, detail="API key required")
 
-    hotel = db.query(Hotel).filter(Hotel.api_key == x_api_key).first()
-    if not hotel:
+    hotel_id = _find_hotel_id(hash_api_key(x_api_key))
+    if hotel_id is None:
         logger.warning("Попытка входа с неверным API ключом")
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    payload = {"sub": str(hotel.id), "role": "user", "hotel_id": hotel.id}
+    payload = {"sub": str(hotel_id), "role": "user", "hotel_id": hotel_id}
     token = create_access_token(payload)
 
-    logger.info("Сгенерирован токен для hotel_id=%s", hotel.id)
+    logger.info("Сгенерирован токен для hotel_id=%s", hotel_id)
     return TokenResponse(access_token=token)
+
+
+@app.post(
+    "/admin/hotels/{hotel_id}/api-key",
+    response_model=ApiKeyResponse,
+    dependencies=[Depends(require_admin_key)],
+)
+def rotate_api_key(hotel_id: int, db: Session = Depends(get_session)):
+    """
+    Выпускает новый API-ключ отеля; старый перестаёт действовать сразу.
+    Ключ возвращается один раз: в БД хранится только его дайджест.
+    """
+    hotel = db.get(Hotel, hotel_id)
+    if hotel is None:
+        raise HTTPException(status_code=404, detail="Hotel not found")
+
+    api_key = generate_api_key()
+    digest = hash_api_key(api_key)
+    hotel.api_key_hash = digest
+    db.commit()
+    api_key_cache.invalidate(hotel_id=hotel_id, digest=digest)
+
+    logger.info("Выпущен новый API-ключ для hotel_id=%s", hotel_id)
+    return ApiKeyResponse(hotel_id=hotel_id, api_key=api_key)
+
+
+@app.post(
+    "/admin/api-key-cache/invalidate",
+    response_model=InvalidateResponse,
+    dependencies=[Depends(require_admin_key)],
+)
+def invalidate_api_key_cache(hotel_id: Optional[int] = None):
+    """
+    Сбрасывает кеш API-ключей отеля (или весь) после изменений в БД в обход auth_service.
+    """
+    removed = api_key_cache.invalidate(hotel_id=hotel_id)
+    logger.info("Кеш API-ключей сброшен: hotel_id=%s, записей=%s", hotel_id, removed)
+    return InvalidateResponse(invalidated=removed)
@@ -8,4 +8,5 @@ class Hotel(Base):
 
     name = Column(String, nullable=False)
     is_city_hotel = Column(Boolean, nullable=False)
-    api_key = Column(String, unique=True, nullable=False)
+    # SHA-256 API-ключа (shared/api_keys.py)
+    api_key_hash = Column(String(64), unique=True, nullable=False)
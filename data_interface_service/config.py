@@ -3,10 +3,15 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
+# Размер порции строк при потоковом разборе загружаемого CSV
+UPLOAD_CHUNK_ROWS = int(os.getenv("UPLOAD_CHUNK_ROWS", 50_000))
 
-DB_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Фоновая загрузка: каталог для файлов в очереди, число обработчиков и предел очереди
+INGEST_STAGING_DIR = os.getenv("INGEST_STAGING_DIR", "/tmp/ingest")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 2))
+INGEST_QUEUE_MAX = int(os.getenv("INGEST_QUEUE_MAX", 20))
+# Сколько часов хранить сведения о завершённых заданиях
+INGEST_JOB_TTL_HOURS = float(os.getenv("INGEST_JOB_TTL_HOURS", 24))
+
+# Выгрузка прогнозов: строк на одну выборку из серверного курсора
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", 10_000))
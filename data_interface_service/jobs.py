@@ -0,0 +1,206 @@
+"""
+Фоновая загрузка бронирований.
+
+Файл сохраняется в INGEST_STAGING_DIR, задание ставится в очередь пула из
+INGEST_WORKERS потоков и обрабатывается вне HTTP-запроса. Состояние заданий
+хранится в памяти процесса (после перезапуска сервиса не сохраняется).
+После успешного завершения вызываются зарегистрированные обработчики
+(register_ingest_hook): пересчёт агрегатов, сброс кэшей и т.п.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import BinaryIO, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from data_interface_service.config import (
+    INGEST_JOB_TTL_HOURS, INGEST_QUEUE_MAX, INGEST_STAGING_DIR, INGEST_WORKERS,
+)
+from data_interface_service.utils import MAX_REPORTED_ROWS, ingest_booking_file
+from shared import metrics
+from shared.db import SessionLocal
+from shared.watermarks import BOOKINGS, touch_watermark
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+INGEST_JOBS = metrics.counter("ingest_jobs_total", "Завершённые фоновые загрузки по статусу")
+INGEST_ROWS = metrics.counter("ingest_rows_total", "Строки фоновых загрузок по результату")
+INGEST_QUEUE = metrics.gauge("ingest_queue_depth", "Задания загрузки в очереди и в работе")
+
+IngestHook = Callable[[int, dict], None]
+
+_jobs: Dict[str, dict] = {}
+_hooks: List[IngestHook] = []
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+
+
+def register_ingest_hook(hook: IngestHook) -> IngestHook:
+    """
+    Регистрирует обработчик завершения загрузки: hook(hotel_id, totals).
+    Вызывается в потоке пула после коммита; исключения обработчика логируются
+    и не влияют на статус задания. Можно использовать как декоратор.
+    """
+    _hooks.append(hook)
+    return hook
+
+
+@register_ingest_hook
+def _count_rows(hotel_id: int, totals: dict):
+    INGEST_ROWS.inc(totals["added"], result="inserted")
+    INGEST_ROWS.inc(totals["duplicates_skipped"], result="duplicate")
+    INGEST_ROWS.inc(totals["skipped_invalid"], result="invalid")
+
+
+def _staging_path(job_id: str) -> str:
+    return os.path.join(INGEST_STAGING_DIR, f"{job_id}.upload")
+
+
+def _pending() -> int:
+    return sum(1 for job in _jobs.values() if job["status"] in (QUEUED, RUNNING))
+
+
+def _prune():
+    cutoff = datetime.utcnow() - timedelta(hours=INGEST_JOB_TTL_HOURS)
+    for job_id in [k for k, job in _jobs.items() if job["finished_at"] and job["finished_at"] < cutoff]:
+        del _jobs[job_id]
+
+
+def _update(job_id: str, **fields):
+    with _lock:
+        _jobs[job_id].update(fields)
+
+
+def _progress(job_id: str, totals: dict):
+    _update(
+        job_id,
+        rows_parsed=totals["rows_parsed"],
+        inserted=totals["added"],
+        skipped=totals["duplicates_skipped"],
+        failed=totals["skipped_invalid"],
+        chunks=totals["chunks"],
+        skipped_rows=list(totals["skipped_rows"]),
+    )
+
+
+def _run(job_id: str, hotel_id: int):
+    _update(job_id, status=RUNNING, started_at=datetime.utcnow())
+    path = _staging_path(job_id)
+    db = SessionLocal()
+    totals = None
+    try:
+        with open(path, "rb") as f:
+            totals = ingest_booking_file(f, hotel_id, db, on_chunk=lambda t: _progress(job_id, t))
+        if totals["added"]:
+            touch_watermark(db, hotel_id, BOOKINGS)
+        db.commit()
+        _update(job_id, status=DONE)
+    except HTTPException as e:
+        # Транзакция откатывается целиком: inserted обнуляется, rows_parsed показывает, где остановились
+        db.rollback()
+        _update(job_id, status=FAILED, error=e.detail, inserted=0)
+    except Exception:
+        db.rollback()
+        logger.exception("Фоновая загрузка %s: ошибка сохранения данных в БД", job_id)
+        _update(job_id, status=FAILED, error="Ошибка сохранения данных в базу", inserted=0)
+    finally:
+        db.close()
+
+    # Задание завершается до очистки: ошибка удаления файла не должна оставить его в running
+    with _lock:
+        job = _jobs[job_id]
+        job["finished_at"] = datetime.utcnow()
+        status = job["status"]
+        INGEST_QUEUE.set(_pending())
+    INGEST_JOBS.inc(status=status)
+    logger.info("Фоновая загрузка %s (hotel_id=%s) завершена: %s", job_id, hotel_id, status)
+
+    try:
+        os.remove(path)
+    except OSError:
+        logger.warning("Не удалось удалить файл загрузки %s", path, exc_info=True)
+
+    if status != DONE:
+        return
+    for hook in _hooks:
+        try:
+            hook(hotel_id, totals)
+        except Exception:
+            logger.exception("Ошибка обработчика %s после загрузки %s", getattr(hook, "__name__", hook), job_id)
+
+
+def submit_ingest(stream: BinaryIO, hotel_id: int, filename: Optional[str]) -> dict:
+    """
+    Сохраняет файл на диск и ставит задание загрузки в очередь пула.
+    503, если в очереди уже INGEST_QUEUE_MAX заданий.
+
+    Returns:
+        dict: описание задания (см. get_job).
+    """
+    with _lock:
+        _prune()
+        if _pending() >= INGEST_QUEUE_MAX:
+            raise HTTPException(status_code=503, detail="Очередь загрузок заполнена, повторите позже")
+        job_id = uuid.uuid4().hex
+        _jobs[job_id] = {
+            "job_id": job_id, "hotel_id": hotel_id, "filename": filename, "status": QUEUED,
+            "rows_parsed": 0, "inserted": 0, "skipped": 0, "failed": 0, "chunks": 0,
+            "skipped_rows": [], "error": None,
+            "created_at": datetime.utcnow(), "started_at": None, "finished_at": None,
+        }
+        INGEST_QUEUE.set(_pending())
+
+    try:
+        os.makedirs(INGEST_STAGING_DIR, exist_ok=True)
+        with open(_staging_path(job_id), "wb") as f:
+            shutil.copyfileobj(stream, f, 1024 * 1024)
+    except OSError:
+        logger.exception("Не удалось сохранить файл загрузки %s", job_id)
+        with _lock:
+            del _jobs[job_id]
+            INGEST_QUEUE.set(_pending())
+        raise HTTPException(status_code=500, detail="Не удалось сохранить файл для загрузки")
+
+    _executor.submit(_run, job_id, hotel_id)
+    logger.info("Фоновая загрузка %s поставлена в очередь: hotel_id=%s, файл %s", job_id, hotel_id, filename)
+    return get_job(job_id)
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """
+    Состояние задания: status (queued/running/done/failed), rows_parsed, inserted,
+    skipped (дубликаты), failed (некорректные строки), chunks, первые
+    MAX_REPORTED_ROWS пропущенных строк, error и отметки времени. None, если задания нет.
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        job = dict(job, skipped_rows=job["skipped_rows"][:MAX_REPORTED_ROWS])
+    for key in ("created_at", "started_at", "finished_at"):
+        if job[key]:
+            job[key] = job[key].isoformat()
+    return job
+
+
+def clear_staging():
+    """
+    Удаляет файлы, оставшиеся от заданий до перезапуска (их состояние потеряно).
+    """
+    if not os.path.isdir(INGEST_STAGING_DIR):
+        return
+    for name in os.listdir(INGEST_STAGING_DIR):
+        if name.endswith(".upload"):
+            os.remove(os.path.join(INGEST_STAGING_DIR, name))
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
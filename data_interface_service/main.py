@@ -1,12 +1,34 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from data_interface_service.routers.upload_router import router as upload_router
 from data_interface_service.routers.prediction_router import router as prediction_router
+from data_interface_service.routers.export_router import router as export_router
+from data_interface_service import jobs
+from shared.metrics import render_prometheus
+from shared.responses import FastJSONResponse, setup_responses
+from shared.tracing import setup_tracing
 
-app = FastAPI(title="Data Interface Service API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    jobs.clear_staging()
+    yield
+    jobs.shutdown()
+
+app = FastAPI(title="Data Interface Service API", lifespan=lifespan, default_response_class=FastJSONResponse)
+setup_responses(app)
+setup_tracing(app, "data_interface")
 
 app.include_router(upload_router, prefix="/upload")
 app.include_router(prediction_router, prefix="/forecast")
+app.include_router(export_router, prefix="/export")
 
 @app.get("/")
 def root():
     return {"message": "Data Interface Service is running"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return render_prometheus()
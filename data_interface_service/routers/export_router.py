@@ -0,0 +1,148 @@
+# data_interface_service/routers/export_router.py
+
+import csv
+import io
+import logging
+import zlib
+from datetime import date
+from typing import Iterator, List, Literal
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import text
+
+from data_interface_service.config import EXPORT_BATCH_ROWS
+from shared.db import engine, read_session
+from shared.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+EXPORT_COLUMNS = [
+    "hotel_id", "has_deposit", "date",
+    "bookings", "cancellations", "forecast_bookings", "forecast_cancellations",
+]
+
+# Календарь × отели × признак депозита, фактические бронирования по дням заезда
+# и последний сохранённый прогноз на дату
+EXPORT_SQL = text("""
+WITH calendar AS (
+    SELECT d::date AS day
+    FROM generate_series(CAST(:date_from AS date), CAST(:date_to AS date), interval '1 day') AS d
+),
+series AS (
+    SELECT h AS hotel_id, dep AS has_deposit
+    FROM unnest(CAST(:hotel_ids AS integer[])) AS h
+    CROSS JOIN unnest(CAST(:deposits AS boolean[])) AS dep
+),
+history AS (
+    SELECT hotel_id, has_deposit, arrival_date AS day,
+           COUNT(*) FILTER (WHERE is_cancellation IS NOT TRUE) AS bookings,
+           COUNT(*) FILTER (WHERE is_cancellation) AS cancellations
+    FROM booking
+    WHERE hotel_id = ANY(:hotel_ids) AND has_deposit = ANY(:deposits)
+      AND arrival_date BETWEEN :date_from AND :date_to
+    GROUP BY hotel_id, has_deposit, arrival_date
+),
+forecast AS (
+    SELECT DISTINCT ON (hotel_id, has_deposit, target_date)
+           hotel_id, has_deposit, target_date AS day, bookings, cancellations
+    FROM predictions
+    WHERE hotel_id = ANY(:hotel_ids) AND has_deposit = ANY(:deposits)
+      AND target_date BETWEEN :date_from AND :date_to
+    ORDER BY hotel_id, has_deposit, target_date, created_at DESC, id DESC
+)
+SELECT s.hotel_id, s.has_deposit, c.day,
+       COALESCE(h.bookings, 0), COALESCE(h.cancellations, 0),
+       f.bookings, f.cancellations
+FROM series s
+CROSS JOIN calendar c
+LEFT JOIN history h ON h.hotel_id = s.hotel_id AND h.has_deposit = s.has_deposit AND h.day = c.day
+LEFT JOIN forecast f ON f.hotel_id = s.hotel_id AND f.has_deposit = s.has_deposit AND f.day = c.day
+ORDER BY s.hotel_id, s.has_deposit, c.day
+""")
+
+
+class ExportRequest(BaseModel):
+    hotel_ids: List[int] = Field(..., min_length=1)
+    date_from: date
+    date_to: date
+    has_deposit: List[bool] = Field(default=[False, True], min_length=1)
+    format: Literal["ndjson", "csv"] = "ndjson"
+
+
+def _number(value):
+    return None if value is None else float(value)
+
+
+def _ndjson(rows: List[tuple]) -> bytes:
+    return b"".join(
+        dumps({
+            "hotel_id": hotel_id, "has_deposit": has_deposit, "date": day.isoformat(),
+            "bookings": bookings, "cancellations": cancellations,
+            "forecast_bookings": _number(f_bookings), "forecast_cancellations": _number(f_cancellations),
+        }) + b"\n"
+        for hotel_id, has_deposit, day, bookings, cancellations, f_bookings, f_cancellations in rows
+    )
+
+
+def _csv(rows: List[tuple]) -> bytes:
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    return buf.getvalue().encode()
+
+
+def export_rows(req: ExportRequest) -> Iterator[bytes]:
+    """
+    Строки выгрузки порциями по EXPORT_BATCH_ROWS из серверного курсора:
+    память не зависит от объёма выгрузки. Сессия открывается на время потока.
+    """
+    encode = _csv if req.format == "csv" else _ndjson
+    if req.format == "csv":
+        yield (",".join(EXPORT_COLUMNS) + "\n").encode()
+
+    params = {
+        "hotel_ids": sorted(set(req.hotel_ids)),
+        "deposits": sorted(set(req.has_deposit)),
+        "date_from": req.date_from,
+        "date_to": req.date_to,
+    }
+    total = 0
+    with read_session() as db:
+        result = db.execute(EXPORT_SQL.execution_options(stream_results=True), params)
+        for rows in result.partitions(EXPORT_BATCH_ROWS):
+            total += len(rows)
+            yield encode(rows)
+    logger.info("Выгрузка прогнозов: %s строк, отелей %s", total, len(params["hotel_ids"]))
+
+
+def gzip_stream(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@router.post("/forecasts")
+def export_forecasts(req: ExportRequest, accept_encoding: str = Header("")):
+    """
+    Потоковая выгрузка истории и прогнозов по нескольким отелям за период:
+    по строке на отель, признак депозита и день. NDJSON или CSV;
+    gzip, если клиент его принимает. Только PostgreSQL.
+    """
+    if req.date_from > req.date_to:
+        raise HTTPException(status_code=400, detail="date_from позже date_to")
+    if engine.dialect.name != "postgresql":
+        raise HTTPException(status_code=501, detail="Выгрузка поддерживается только для PostgreSQL")
+
+    media_type = "text/csv" if req.format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="forecasts.{req.format}"'}
+    body = export_rows(req)
+    if "gzip" in accept_encoding.lower():
+        headers["Content-Encoding"] = "gzip"
+        body = gzip_stream(body)
+    return StreamingResponse(body, media_type=media_type, headers=headers)
@@ -1,102 +1,184 @@
 # data_interface_service/routers/prediction_router.py
 
-from fastapi import APIRouter, Depends, Header, HTTPException
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from pydantic import BaseModel
-from shared.db import get_session_sync
-from shared.models import Prediction, Booking
+import hashlib
 import logging
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from shared.db import get_read_session
+from shared.models import Booking, Prediction
+from shared.responses import FastJSONResponse
+from shared.watermarks import get_watermark
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Длина истории в ответе, дней (включая target_date)
+HISTORY_DAYS = 30
+# Минимум бронирований за историю, чтобы показывать прогноз
+MIN_HISTORY_BOOKINGS = 30
+
+# Календарь истории и прогноза, счётчики бронирований по дням заезда и последний
+# сохранённый прогноз на каждую дату — одним запросом
+FORECAST_SQL = text("""
+WITH calendar AS (
+    SELECT d::date AS day
+    FROM generate_series(CAST(:history_start AS date), CAST(:calendar_end AS date), interval '1 day') AS d
+),
+history AS (
+    SELECT arrival_date AS day,
+           COUNT(*) FILTER (WHERE is_cancellation IS NOT TRUE) AS bookings,
+           COUNT(*) FILTER (WHERE is_cancellation) AS cancellations
+    FROM booking
+    WHERE hotel_id = :hotel_id AND has_deposit = :has_deposit
+      AND arrival_date BETWEEN :history_start AND :start_date
+    GROUP BY arrival_date
+),
+forecast AS (
+    SELECT DISTINCT ON (target_date) target_date AS day, bookings, cancellations
+    FROM predictions
+    WHERE hotel_id = :hotel_id AND has_deposit = :has_deposit
+      AND target_date BETWEEN :start_date AND :end_date
+    ORDER BY target_date, created_at DESC, id DESC
+)
+SELECT c.day,
+       COALESCE(h.bookings, 0) AS bookings,
+       COALESCE(h.cancellations, 0) AS cancellations,
+       f.bookings AS forecast_bookings,
+       f.cancellations AS forecast_cancellations
+FROM calendar c
+LEFT JOIN history h ON h.day = c.day
+LEFT JOIN forecast f ON f.day = c.day
+ORDER BY c.day
+""")
+
+
 class ForecastRequest(BaseModel):
     target_date: str
     horizon: int
     has_deposit: bool
 
+
+def get_forecast_session(x_hotel_id: int = Header(...)):
+    """
+    Сессия только на чтение: реплика, если данные отеля не менялись недавно.
+    """
+    yield from get_read_session(x_hotel_id)
+
+
+def forecast_etag(db: Session, hotel_id: int, req: ForecastRequest) -> Optional[str]:
+    """
+    Сильный ETag ответа: водяные знаки бронирований и прогнозов отеля и параметры запроса.
+    None, если водяных знаков ещё нет (ответ не кэшируется).
+    """
+    watermark = get_watermark(db, hotel_id)
+    if watermark is None:
+        return None
+    key = f"{hotel_id}|{req.target_date}|{req.horizon}|{req.has_deposit}|" \
+          f"{watermark.bookings_updated_at}|{watermark.predictions_updated_at}"
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]
+
+
+def _forecast_rows_portable(db: Session, hotel_id: int, has_deposit: bool,
+                            history_start: date, start_date: date, end_date: date) -> List[tuple]:
+    """
+    Те же строки, что и FORECAST_SQL, для СУБД без generate_series (SQLite в разработке).
+    """
+    history = {
+        day: (bookings, cancellations)
+        for day, bookings, cancellations in db.query(
+            Booking.arrival_date,
+            func.count().filter(Booking.is_cancellation.isnot(True)),
+            func.count().filter(Booking.is_cancellation.is_(True)),
+        )
+        .filter(Booking.hotel_id == hotel_id, Booking.has_deposit == has_deposit)
+        .filter(Booking.arrival_date.between(history_start, start_date))
+        .group_by(Booking.arrival_date)
+    }
+    forecast = {}
+    for record in (
+        db.query(Prediction.target_date, Prediction.bookings, Prediction.cancellations)
+        .filter(Prediction.hotel_id == hotel_id, Prediction.has_deposit == has_deposit)
+        .filter(Prediction.target_date.between(start_date, end_date))
+        .order_by(Prediction.created_at, Prediction.id)
+    ):
+        forecast[record.target_date] = (record.bookings, record.cancellations)
+
+    rows = []
+    day = history_start
+    while day <= max(start_date, end_date):
+        rows.append((day, *history.get(day, (0, 0)), *forecast.get(day, (None, None))))
+        day += timedelta(days=1)
+    return rows
+
+
 @router.post("/fetch")
 def fetch_forecast(
     req: ForecastRequest,
     x_hotel_id: int = Header(...),
-    db: Session = Depends(get_session_sync)
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_forecast_session)
 ):
     try:
         start_date = datetime.strptime(req.target_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="target_date должен быть в формате YYYY-MM-DD")
+
+    try:
+        etag = forecast_etag(db, x_hotel_id, req)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"} if etag else {}
+        if etag and _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
         end_date = start_date + timedelta(days=req.horizon - 1)
+        history_start = start_date - timedelta(days=HISTORY_DAYS - 1)
 
-        # Исторические данные за последние 30 дней
-        history_start = start_date - timedelta(days=29)
-
-        # Группировка по датам
-        history_raw = (
-            db.query(
-                Booking.arrival_date,
-                Booking.is_cancellation,
-                db.func.count().label("cnt")
-            )
-            .filter(Booking.hotel_id == x_hotel_id)
-            .filter(Booking.arrival_date >= history_start)
-            .filter(Booking.arrival_date <= start_date)
-            .filter(Booking.has_deposit == req.has_deposit)
-            .group_by(Booking.arrival_date, Booking.is_cancellation)
-            .all()
-        )
+        if db.get_bind().dialect.name == "postgresql":
+            rows = db.execute(FORECAST_SQL, {
+                "hotel_id": x_hotel_id,
+                "has_deposit": req.has_deposit,
+                "history_start": history_start,
+                "start_date": start_date,
+                "end_date": end_date,
+                "calendar_end": max(start_date, end_date),
+            }).all()
+        else:
+            rows = _forecast_rows_portable(db, x_hotel_id, req.has_deposit, history_start, start_date, end_date)
+
+        history_data = [
+            {"date": day.isoformat(), "bookings": bookings, "cancellations": cancellations}
+            for day, bookings, cancellations, _, _ in rows if day <= start_date
+        ]
 
-        # Переводим в словарь для удобного маппинга
-        history_map = {}
-        for date_val, is_cancel, cnt in history_raw:
-            if date_val not in history_map:
-                history_map[date_val] = {"bookings": 0, "cancellations": 0}
-            if is_cancel:
-                history_map[date_val]["cancellations"] += cnt
-            else:
-                history_map[date_val]["bookings"] += cnt
-
-        history_data = []
-        for offset in range(30):
-            day = history_start + timedelta(days=offset)
-            history_data.append({
-                "date": day.isoformat(),
-                "bookings": history_map.get(day, {}).get("bookings", 0),
-                "cancellations": history_map.get(day, {}).get("cancellations", 0),
-            })
-
-        total_bookings = sum(d["bookings"] for d in history_data)
-        if total_bookings < 30:
-            return {
+        if sum(d["bookings"] for d in history_data) < MIN_HISTORY_BOOKINGS:
+            content = {
                 "status": "insufficient_history",
                 "message": f"Недостаточно данных для прогноза за {history_start} — {start_date}.",
                 "history_summary": history_data,
                 "forecast": []
             }
+            return FastJSONResponse(content=content, headers=headers)
+
+        forecast = [
+            {"date": day.isoformat(), "bookings": float(bookings), "cancellations": float(cancellations)}
+            for day, _, _, bookings, cancellations in rows
+            if start_date <= day <= end_date and bookings is not None
+        ]
+        content = {"status": "ok", "history_summary": history_data, "forecast": forecast}
+        return FastJSONResponse(content=content, headers=headers)
 
-        # Достаём прогноз
-        forecast = []
-        if req.horizon > 0:
-            forecast_records = (
-                db.query(Prediction)
-                .filter(Prediction.hotel_id == x_hotel_id)
-                .filter(Prediction.target_date >= start_date)
-                .filter(Prediction.target_date <= end_date)
-                .filter(Prediction.has_deposit == req.has_deposit)
-                .order_by(Prediction.target_date)
-                .all()
-            )
-
-            forecast = [
-                {
-                    "date": record.target_date.isoformat(),
-                    "bookings": float(record.bookings),
-                    "cancellations": float(record.cancellations),
-                }
-                for record in forecast_records
-            ]
-
-        return {"status": "ok", "history_summary": history_data, "forecast": forecast}
-
-    except Exception as e:
+    except Exception:
         logger.exception("Ошибка при получении прогноза")
         raise HTTPException(status_code=500, detail="Ошибка при получении прогноза")
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, Header
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, Header, Query
+from shared.responses import FastJSONResponse
 from sqlalchemy.orm import Session
 from shared.db import get_session
 from shared.models import Hotel
-from data_interface_service.utils import parse_booking_csv
+from shared.watermarks import BOOKINGS, touch_watermark
+from data_interface_service.utils import ingest_booking_file
+from data_interface_service.jobs import get_job, submit_ingest
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +16,7 @@ router = APIRouter()
 def upload_bookings(
     file: UploadFile = File(...),
     x_hotel_id: int = Header(...),
+    background: bool = Query(False, description="Обработать файл в фоне и сразу вернуть id задания"),
     db: Session = Depends(get_session)
 ):
     logger.info("Получен файл бронирований от hotel_id=%s: %s", x_hotel_id, file.filename)
@@ -23,50 +26,53 @@ def upload_bookings(
     if not hotel:
         raise HTTPException(status_code=401, detail="Неверный идентификатор отеля")
 
-    try:
-        content = file.file.read().decode("utf-8")
-        if not content.strip():
-            raise HTTPException(status_code=400, detail="Загруженный файл пуст")
+    if background:
+        job = submit_ingest(file.file, hotel.id, file.filename)
+        return FastJSONResponse(status_code=202, content=job)
 
-        bookings, duplicates_skipped = parse_booking_csv(content, hotel.id, db)
-    except HTTPException as http_exc:
-        raise http_exc
-    except Exception as e:
-        logger.exception("Ошибка обработки файла")
-        raise HTTPException(status_code=400, detail="Ошибка обработки CSV")
+    # Starlette сохраняет тело во временный файл на диске; читаем его порциями
+    try:
+        totals = ingest_booking_file(file.file, hotel.id, db)
+        if totals["added"]:
+            touch_watermark(db, hotel.id, BOOKINGS)
+        db.commit()
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception:
+        # Ошибки формата CSV уже преобразованы в HTTPException(400); здесь — ошибки записи
+        db.rollback()
+        logger.exception("Ошибка сохранения данных в БД")
+        raise HTTPException(status_code=500, detail="Ошибка сохранения данных в базу")
 
-    if not bookings and duplicates_skipped > 0:
-        return JSONResponse(
+    if totals["added"] == 0:
+        return FastJSONResponse(
             status_code=400,
             content={
                 "status": "no_new_records",
                 "message": "Все записи уже существуют, новые бронирования не добавлены.",
                 "added": 0,
-                "duplicates_skipped": duplicates_skipped,
-            },
-        )
-    elif not bookings:
-        return JSONResponse(
-            status_code=400,
-            content={
-                "status": "no_valid_records",
-                "message": "Файл не содержит валидных бронирований.",
-                "added": 0,
-                "duplicates_skipped": 0,
+                "duplicates_skipped": totals["duplicates_skipped"],
             },
         )
 
-    try:
-        db.add_all(bookings)
-        db.commit()
-    except Exception:
-        db.rollback()
-        logger.exception("Ошибка сохранения данных в БД")
-        raise HTTPException(status_code=500, detail="Ошибка сохранения данных в базу")
-
     return {
         "status": "ok",
-        "added": len(bookings),
-        "duplicates_skipped": duplicates_skipped,
+        "added": totals["added"],
+        "duplicates_skipped": totals["duplicates_skipped"],
+        "skipped_invalid": totals["skipped_invalid"],
+        "skipped_rows": totals["skipped_rows"],
+        "chunks": totals["chunks"],
         "message": "Бронирования успешно загружены.",
     }
+
+
+@router.get("/jobs/{job_id}")
+def ingestion_job(job_id: str, x_hotel_id: int = Header(...)):
+    """
+    Прогресс фоновой загрузки: строки разобраны / добавлены / дубликаты / с ошибками.
+    """
+    job = get_job(job_id)
+    if job is None or job["hotel_id"] != x_hotel_id:
+        raise HTTPException(status_code=404, detail="Задание загрузки не найдено")
+    return job
@@ -1,9 +1,14 @@
-from io import StringIO
-from datetime import date
+import bz2
+import gc
+import gzip
+import io
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 from sqlalchemy.orm import Session
-from shared.models import Booking
+from shared.bulk_writer import BOOKING_WRITE_COLUMNS, write_bookings
 from fastapi import HTTPException
+from data_interface_service.config import UPLOAD_CHUNK_ROWS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,26 +19,83 @@ month_map = {
     'September': 9, 'October': 10, 'November': 11, 'December': 12
 }
 
+# Сколько номеров строк перечислять в сообщениях об ошибках
+MAX_REPORTED_ROWS = 20
 
-def make_date(row):
+# Колонки, которые читает parse_booking_frame (из Parquet загружаются только они)
+BOOKING_SOURCE_COLUMNS = [
+    "booking_ref", "arrival_date", "arrival_date_year", "arrival_date_month", "arrival_date_day_of_month",
+    "adults", "children", "babies", "total_guests", "stays_in_weekend_nights", "stays_in_week_nights",
+    "total_nights", "lead_time", "adr", "booking_changes", "has_deposit", "is_cancellation",
+    "market_segment", "distribution_channel", "reserved_room_type",
+]
+
+GZIP_MAGIC = b"\x1f\x8b"
+BZ2_MAGIC = b"BZh"
+PARQUET_MAGIC = b"PAR1"
+
+
+
+def _line_numbers(mask: pd.Series) -> List[int]:
     """
-    Формирует дату заезда из строки arrival_date или из частей (год, месяц, день).
+    Номера строк файла (с учётом заголовка) для отмеченных записей.
     """
-    if "arrival_date" in row and pd.notna(row["arrival_date"]):
-        try:
-            return pd.to_datetime(row["arrival_date"], format="%d.%m.%Y").date()
-        except Exception as e:
-            logger.error("Ошибка разбора arrival_date: %s", e)
-            raise HTTPException(status_code=400, detail="Неверный формат даты в 'arrival_date'. Ожидается DD.MM.YYYY")
+    return [int(i) + 2 for i in mask[mask].index]
 
-    try:
-        return date(
-            int(row['arrival_date_year']),
-            month_map[row['arrival_date_month']],
-            int(row['arrival_date_day_of_month'])
-        )
-    except Exception:
-        raise HTTPException(status_code=400, detail="Невозможно разобрать дату: проверьте arrival_date_year/month/day_of_month")
+
+def _format_lines(lines: List[int]) -> str:
+    shown = ", ".join(str(n) for n in lines[:MAX_REPORTED_ROWS])
+    return shown + (f" и ещё {len(lines) - MAX_REPORTED_ROWS}" if len(lines) > MAX_REPORTED_ROWS else "")
+
+
+def make_dates(df: pd.DataFrame) -> pd.Series:
+    """
+    Формирует даты заезда из arrival_date (DD.MM.YYYY) или из частей (год, месяц, день) для всех строк сразу.
+    """
+    result = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    from_parts = pd.Series(True, index=df.index)
+
+    if "arrival_date" in df.columns:
+        raw = df["arrival_date"]
+        has_value = raw.notna()
+        # Из Parquet дата приходит готовым типом, из CSV — строкой DD.MM.YYYY
+        if pd.api.types.is_datetime64_any_dtype(raw):
+            parsed = raw
+        else:
+            parsed = pd.to_datetime(raw, format="%d.%m.%Y", errors="coerce")
+        invalid = has_value & parsed.isna()
+        if invalid.any():
+            lines = _line_numbers(invalid)
+            logger.error("Ошибка разбора arrival_date в строках %s", lines[:MAX_REPORTED_ROWS])
+            raise HTTPException(
+                status_code=400,
+                detail=f"Неверный формат даты в 'arrival_date' (строки {_format_lines(lines)}). Ожидается DD.MM.YYYY",
+            )
+        result[has_value] = parsed[has_value]
+        from_parts = ~has_value
+
+    if from_parts.any():
+        parts_columns = ["arrival_date_year", "arrival_date_month", "arrival_date_day_of_month"]
+        if not all(c in df.columns for c in parts_columns):
+            raise HTTPException(status_code=400, detail="Невозможно разобрать дату: проверьте arrival_date_year/month/day_of_month")
+
+        rows = df.loc[from_parts]
+        parts = pd.DataFrame({
+            "year": pd.to_numeric(rows["arrival_date_year"], errors="coerce"),
+            "month": rows["arrival_date_month"].map(month_map),
+            "day": pd.to_numeric(rows["arrival_date_day_of_month"], errors="coerce"),
+        })
+        parsed = pd.to_datetime(parts, errors="coerce")
+        invalid = parsed.isna()
+        if invalid.any():
+            lines = _line_numbers(invalid)
+            raise HTTPException(
+                status_code=400,
+                detail=f"Невозможно разобрать дату в строках {_format_lines(lines)}: проверьте arrival_date_year/month/day_of_month",
+            )
+        result[from_parts] = parsed
+
+    return result
 
 
 def detect_separator(content: str) -> str:
@@ -44,26 +106,125 @@ def detect_separator(content: str) -> str:
     return ';' if sample.count(';') > sample.count(',') else ','
 
 
-def parse_booking_csv(content: str, hotel_id: int, db: Session):
+def _numeric(df: pd.DataFrame, col: str) -> pd.Series:
+    """
+    Числовая колонка; нечисловые значения — ошибка с номерами строк.
     """
-    Парсинг CSV с бронированиями:
-    - проверка обязательных колонок,
-    - формирование Booking объектов,
-    - отбрасывание дубликатов.
+    values = pd.to_numeric(df[col], errors="coerce")
+    invalid = df[col].notna() & values.isna()
+    if invalid.any():
+        lines = _line_numbers(invalid)
+        logger.error("Нечисловые значения в колонке %s, строки %s", col, lines[:MAX_REPORTED_ROWS])
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ошибка в колонке '{col}' (строки {_format_lines(lines)}). Проверьте данные.",
+        )
+    return values.fillna(0)
+
+
+def iter_booking_csv(stream: BinaryIO, chunk_rows: int = UPLOAD_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
     """
-    if not content.strip():
+    Читает CSV из бинарного потока порциями по chunk_rows строк.
+    Индекс порций сквозной, поэтому номера строк в ошибках соответствуют файлу.
+    """
+    try:
+        sample = stream.read(1000)
+    except (OSError, EOFError) as e:
+        logger.error("Ошибка распаковки файла: %s", e)
+        raise HTTPException(status_code=400, detail="Не удалось распаковать файл: архив повреждён.")
+    if not sample.strip():
         raise HTTPException(status_code=400, detail="Загруженный файл пуст.")
+    stream.seek(0)
 
+    sep = detect_separator(sample.decode("utf-8", errors="ignore"))
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
     try:
-        sep = detect_separator(content)
-        df = pd.read_csv(StringIO(content), sep=sep)
+        reader = pd.read_csv(text, sep=sep, dtype={"booking_ref": str}, chunksize=chunk_rows)
+        empty = True
+        for chunk in reader:
+            if chunk.empty:
+                continue
+            empty = False
+            yield chunk
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Ошибка чтения CSV: %s", e)
         raise HTTPException(status_code=400, detail="Ошибка при чтении CSV: неверный формат или разделитель.")
+    finally:
+        # Поток закрывает его владелец (UploadFile)
+        text.detach()
+
+    if empty:
+        raise HTTPException(status_code=400, detail="Файл не содержит данных.")
+
 
-    if df.empty:
+def iter_booking_parquet(stream: BinaryIO, chunk_rows: int = UPLOAD_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Читает Parquet по группам строк порциями до chunk_rows записей, загружая
+    только колонки BOOKING_SOURCE_COLUMNS. Номер строки в ошибках — номер записи (с 1).
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise HTTPException(status_code=400, detail="Загрузка Parquet не поддерживается: не установлен pyarrow.")
+
+    try:
+        parquet = pq.ParquetFile(stream)
+        columns = [c for c in BOOKING_SOURCE_COLUMNS if c in parquet.schema_arrow.names]
+        offset = 0
+        for record_batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+            if "booking_ref" in columns and not pa.types.is_string(record_batch.schema.field("booking_ref").type):
+                index = record_batch.schema.get_field_index("booking_ref")
+                record_batch = record_batch.set_column(
+                    index, "booking_ref", record_batch.column(index).cast(pa.string())
+                )
+            chunk = record_batch.to_pandas(date_as_object=False)
+            # _line_numbers прибавляет 2 (заголовок CSV); для Parquet сдвигаем на 1 меньше
+            chunk.index = pd.RangeIndex(offset - 1, offset - 1 + len(chunk))
+            offset += len(chunk)
+            yield chunk
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Ошибка чтения Parquet: %s", e)
+        raise HTTPException(status_code=400, detail="Ошибка при чтении Parquet: файл повреждён или неверного формата.")
+
+    if offset == 0:
         raise HTTPException(status_code=400, detail="Файл не содержит данных.")
 
+
+def iter_booking_file(stream: BinaryIO, chunk_rows: int = UPLOAD_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Порции бронирований из загруженного файла. Формат определяется по сигнатуре:
+    gzip и bz2 распаковываются потоком и читаются как CSV, PAR1 — Parquet,
+    остальное — несжатый CSV.
+    """
+    magic = stream.read(4)
+    stream.seek(0)
+
+    if magic.startswith(GZIP_MAGIC):
+        with gzip.GzipFile(fileobj=stream, mode="rb") as unpacked:
+            yield from iter_booking_csv(unpacked, chunk_rows)
+    elif magic.startswith(BZ2_MAGIC):
+        with bz2.BZ2File(stream, mode="rb") as unpacked:
+            yield from iter_booking_csv(unpacked, chunk_rows)
+    elif magic == PARQUET_MAGIC:
+        yield from iter_booking_parquet(stream, chunk_rows)
+    else:
+        yield from iter_booking_csv(stream, chunk_rows)
+
+
+def parse_booking_frame(df: pd.DataFrame, hotel_id: int) -> Tuple[pd.DataFrame, int, List[dict]]:
+    """
+    Колоночная проверка и преобразование бронирований.
+    Повторы booking_ref, уже сохранённые в БД, отсекает запись (shared/bulk_writer.py).
+
+    Returns:
+        Tuple[pd.DataFrame, int, List[dict]]: пакет бронирований (колонки BOOKING_WRITE_COLUMNS),
+        число повторов booking_ref внутри порции и пропущенные строки [{"line", "reason"}].
+    """
     # Проверка обязательных колонок
     if not (
         "arrival_date" in df.columns or
@@ -77,79 +238,109 @@ def parse_booking_csv(content: str, hotel_id: int, db: Session):
             raise HTTPException(status_code=400, detail=f"Отсутствует обязательная колонка: {col}")
 
     # Заполнение необязательных полей
-    df['market_segment'] = df.get('market_segment', 'Undefined')
-    df['distribution_channel'] = df.get('distribution_channel', 'Undefined')
-    df["booking_ref"] = df.get("booking_ref", pd.Series(dtype=str)).fillna("")
+    for col in ["market_segment", "distribution_channel"]:
+        df[col] = df[col].fillna("Undefined") if col in df.columns else "Undefined"
+    refs = df["booking_ref"].fillna("").astype(str).str.strip() if "booking_ref" in df.columns \
+        else pd.Series("", index=df.index)
 
-    for col in ["adults", "children", "babies", "total_guests"]:
-        df[col] = df.get(col, 0).fillna(0)
+    for col in ["adults", "children", "babies", "total_guests",
+                "stays_in_weekend_nights", "stays_in_week_nights", "total_nights",
+                "lead_time", "booking_changes", "adr"]:
+        df[col] = _numeric(df, col) if col in df.columns else 0
 
-    for col in ["stays_in_weekend_nights", "stays_in_week_nights", "total_nights"]:
-        df[col] = df.get(col, 0).fillna(0)
+    # Гости и ночи: явное значение или сумма составляющих
+    total_guests = df["total_guests"].where(df["total_guests"] != 0, df["adults"] + df["children"] + df["babies"])
+    total_nights = df["total_nights"].where(
+        df["total_nights"] != 0, df["stays_in_weekend_nights"] + df["stays_in_week_nights"]
+    )
+    no_guests = total_guests <= 0
+    no_nights = ~no_guests & (total_nights <= 0)
 
-    for col in ["lead_time", "booking_changes", "adr"]:
-        df[col] = df.get(col, 0).fillna(0)
+    skipped_rows = (
+        [{"line": n, "reason": "total_guests=0"} for n in _line_numbers(no_guests)] +
+        [{"line": n, "reason": "total_nights=0"} for n in _line_numbers(no_nights)]
+    )
+    if skipped_rows:
+        logger.warning("Пропущено строк без гостей/ночей: %s", len(skipped_rows))
+    valid = ~(no_guests | no_nights)
 
-    # Дубликаты booking_ref
-    existing_refs = {
-        ref for (ref,) in db.query(Booking.booking_ref)
-        .filter(Booking.hotel_id == hotel_id)
-        .filter(Booking.booking_ref.isnot(None))
-        .all()
-    }
+    # Повторы booking_ref внутри порции
+    has_ref = refs != ""
+    duplicate = valid & has_ref & refs.where(valid & has_ref).duplicated()
+    duplicates_skipped = int(duplicate.sum())
+    if duplicates_skipped:
+        logger.info("Пропущено повторов booking_ref в файле: %s", duplicates_skipped)
+    keep = valid & ~duplicate
 
-    bookings = []
-    duplicates_skipped = 0
+    df = df.loc[keep]
+    arrival = make_dates(df)
 
-    for _, row in df.iterrows():
-        try:
-            # Проверка гостей
-            total_guests = int(row.get("total_guests") or (row["adults"] + row["children"] + row["babies"]))
-            if total_guests <= 0:
-                logger.warning("Пропущена строка: total_guests=0")
-                continue
+    batch = pd.DataFrame({
+        "hotel_id": hotel_id,
+        "booking_ref": refs[keep].where(has_ref[keep], None),
+        "arrival_date": arrival.dt.date,
+        "lead_time": df["lead_time"].astype(np.int64),
+        "adr": df["adr"].astype(float),
+        "total_guests": total_guests[keep].astype(np.int64),
+        "total_nights": total_nights[keep].astype(np.int64),
+        "booking_changes": df["booking_changes"].astype(np.int64),
+        "has_deposit": df["has_deposit"].astype(str).str.lower() != "no deposit",
+        "is_cancellation": df["is_cancellation"].astype(bool),
+        "market_segment": df["market_segment"],
+        "distribution_channel": df["distribution_channel"],
+        "reserved_room_type": df["reserved_room_type"],
+        "day_of_week": arrival.dt.weekday.astype(np.int64),
+    }, columns=BOOKING_WRITE_COLUMNS)
 
-            # Проверка ночей
-            total_nights = int(row.get("total_nights") or (row["stays_in_weekend_nights"] + row["stays_in_week_nights"]))
-            if total_nights <= 0:
-                logger.warning("Пропущена строка: total_nights=0")
-                continue
+    return batch, duplicates_skipped, skipped_rows
 
-            # Дубликаты
-            booking_ref = str(row["booking_ref"]).strip()
-            if booking_ref and booking_ref in existing_refs:
-                duplicates_skipped += 1
-                logger.info("Пропущен дубликат booking_ref=%s", booking_ref)
-                continue
 
-            arrival = make_date(row)
-            is_cancel = bool(row["is_cancellation"])
-            has_deposit = str(row["has_deposit"]).lower() != "no deposit"
-
-            booking = Booking(
-                hotel_id=hotel_id,
-                booking_ref=booking_ref if booking_ref else None,
-                arrival_date=arrival,
-                lead_time=int(row["lead_time"]),
-                adr=float(row["adr"]),
-                total_guests=total_guests,
-                total_nights=total_nights,
-                booking_changes=int(row["booking_changes"]),
-                has_deposit=has_deposit,
-                is_cancellation=is_cancel,
-                market_segment=row["market_segment"],
-                distribution_channel=row["distribution_channel"],
-                reserved_room_type=row["reserved_room_type"],
-                day_of_week=arrival.weekday()
-            )
-            bookings.append(booking)
+def ingest_booking_file(
+    stream: BinaryIO,
+    hotel_id: int,
+    db: Session,
+    chunk_rows: int = UPLOAD_CHUNK_ROWS,
+    on_chunk: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Потоковая загрузка файла с бронированиями (CSV, CSV.gz, CSV.bz2, Parquet):
+    - чтение и проверка порциями фиксированного размера,
+    - запись каждой порции в текущей транзакции (коммит — у вызывающего кода),
+    - отбрасывание дубликатов: повторы внутри порции — здесь, уже сохранённые
+      (в том числе предыдущими порциями) — при записи в БД.
+
+    on_chunk вызывается после каждой порции с текущими счётчиками (прогресс фоновой загрузки).
+
+    Returns:
+        dict: rows_parsed, added, duplicates_skipped, skipped_invalid, chunks — итоговые счётчики,
+        skipped_rows — первые MAX_REPORTED_ROWS пропущенных строк.
+    """
+    totals = {
+        "rows_parsed": 0, "added": 0, "duplicates_skipped": 0,
+        "skipped_invalid": 0, "skipped_rows": [], "chunks": 0,
+    }
 
-        except Exception as e:
-            logger.error("Ошибка в строке CSV: %s", e)
-            raise HTTPException(status_code=400, detail="Ошибка в одной из строк CSV. Проверьте данные.")
+    for chunk in iter_booking_file(stream, chunk_rows):
+        batch, duplicates_skipped, skipped_rows = parse_booking_frame(chunk, hotel_id)
+        added = write_bookings(db, batch)
+        totals["rows_parsed"] += len(chunk)
+        totals["added"] += added
+        totals["duplicates_skipped"] += duplicates_skipped + len(batch) - added
+        totals["skipped_invalid"] += len(skipped_rows)
+        totals["skipped_rows"].extend(skipped_rows[:MAX_REPORTED_ROWS - len(totals["skipped_rows"])])
+        totals["chunks"] += 1
+        # Объекты pandas порции держатся циклическими ссылками; без сборки память растёт от порции к порции
+        del chunk, batch
+        gc.collect()
+        logger.info(
+            "Порция %s: добавлено всего %s, дубликатов %s, пропущено строк %s",
+            totals["chunks"], totals["added"], totals["duplicates_skipped"], totals["skipped_invalid"],
+        )
+        if on_chunk:
+            on_chunk(totals)
 
-    if not bookings and duplicates_skipped == 0:
+    if totals["added"] == 0 and totals["duplicates_skipped"] == 0:
         raise HTTPException(status_code=400, detail="Не удалось добавить ни одной записи. Проверьте содержимое файла.")
 
-    logger.info("Добавлено %s записей, пропущено %s дубликатов.", len(bookings), duplicates_skipped)
-    return bookings, duplicates_skipped
+    logger.info("Добавлено %s записей, пропущено %s дубликатов.", totals["added"], totals["duplicates_skipped"])
+    return totals
@@ -1,80 +1,245 @@
+"""
+Массовый импорт исторических бронирований (формат датасета hotel_bookings.csv).
+
+Файл делится на порции по --chunk-rows строк (по смещениям в байтах, без чтения
+в память целиком), порции обрабатываются пулом процессов и записываются через
+COPY (shared/bulk_writer.py). Каждая порция коммитится вместе с отметкой в
+import_checkpoint, поэтому повторный запуск после сбоя продолжает с
+необработанных порций. Строки с переводом строки внутри кавычек не поддерживаются.
+
+Запуск:
+    python -m database.import_bookings --file database/hotel_bookings.csv --workers 8
+"""
+
+import argparse
+import io
+import logging
+import os
+import sys
+import time
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Tuple
+
 import pandas as pd
-from sqlalchemy.orm import Session
-from shared.models import Booking, Hotel
-from shared.db import get_session_sync
-from datetime import date
-
-df = pd.read_csv("database/hotel_bookings.csv")
-
-# Подключение к БД
-session: Session = get_session_sync()
-
-# Получаем id отелей
-hotels = {h.name: h for h in session.query(Hotel).all()}  # допустим имена 'Hotel A', 'Hotel B'
-
-# Предобработка
-def make_date(row):
-    month_map = {
-        'January': 1, 'February': 2, 'March': 3, 'April': 4,
-        'May': 5, 'June': 6, 'July': 7, 'August': 8,
-        'September': 9, 'October': 10, 'November': 11, 'December': 12
-    }
-    return date(int(row['arrival_date_year']),
-                month_map[row['arrival_date_month']],
-                int(row['arrival_date_day_of_month']))
-
-bookings = []
-df['market_segment'] = df['market_segment'].fillna('Undefined')
-df['distribution_channel'] = df['distribution_channel'].fillna('Undefined')
-
-df[["adults", "children", "babies",
-    "stays_in_weekend_nights", "stays_in_week_nights",
-    "lead_time", "booking_changes", "adr"]] = df[[
-        "adults", "children", "babies",
-        "stays_in_weekend_nights", "stays_in_week_nights",
-        "lead_time", "booking_changes", "adr"
-    ]].fillna(0)
-
-
-for _, row in df.iterrows():
-    # Пропуск некорректных записей
-    if row["adults"] + row["children"] + row["babies"]== 0:
-        continue
-
-    if row["stays_in_weekend_nights"] + row["stays_in_week_nights"]== 0:
-        continue
-
-    arrival = make_date(row)
-
-    total_guests = int(row["adults"]) + int(row["children"]) + int(row["babies"])
-    total_nights = int(row["stays_in_weekend_nights"]) + int(row["stays_in_week_nights"])
-
-
-    is_cancel = bool(row["is_canceled"])
-    has_deposit = row["deposit_type"] != "No Deposit"
-
-    hotel_name = "Hotel A" if row["hotel"] == "City Hotel" else "Hotel B"
-    hotel = hotels.get(hotel_name)
-    if not hotel:
-        continue
-
-    booking = Booking(
-        hotel_id=hotel.id,
-        arrival_date=arrival,
-        lead_time=int(row["lead_time"]),
-        adr=float(row["adr"]),
-        total_guests=total_guests,
-        total_nights=total_nights,
-        booking_changes=int(row["booking_changes"]),
-        has_deposit=has_deposit,
-        is_cancellation=is_cancel,
-        market_segment=row["market_segment"],
-        distribution_channel=row["distribution_channel"],
-        reserved_room_type=row["reserved_room_type"],
-        day_of_week=arrival.weekday()
+
+from shared.bulk_writer import BOOKING_WRITE_COLUMNS, write_bookings
+from shared.db import SessionLocal, engine
+from shared.models import Hotel, ImportCheckpoint
+from shared.watermarks import BOOKINGS, touch_watermark
+
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("shared").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+month_map = {
+    'January': 1, 'February': 2, 'March': 3, 'April': 4,
+    'May': 5, 'June': 6, 'July': 7, 'August': 8,
+    'September': 9, 'October': 10, 'November': 11, 'December': 12
+}
+
+# Отель по типу из датасета -> имя отеля в БД
+HOTEL_NAMES = {"City Hotel": "Hotel A", "Resort Hotel": "Hotel B"}
+
+# (номер порции, смещение, длина в байтах)
+Chunk = Tuple[int, int, int]
+
+# Параметры импорта в процессе пула (задаются в _init_worker)
+_worker: dict = {}
+
+
+def make_batch(df: pd.DataFrame, hotel_ids: Dict[str, int]) -> pd.DataFrame:
+    """
+    Пакет бронирований (колонки BOOKING_WRITE_COLUMNS) из порции датасета.
+    Пропускаются строки без гостей или ночей и строки отелей, которых нет в БД.
+    """
+    df = df.copy()
+    df['market_segment'] = df['market_segment'].fillna('Undefined')
+    df['distribution_channel'] = df['distribution_channel'].fillna('Undefined')
+
+    numeric = ["adults", "children", "babies", "stays_in_weekend_nights", "stays_in_week_nights",
+               "lead_time", "booking_changes", "adr"]
+    df[numeric] = df[numeric].fillna(0)
+
+    df["total_guests"] = df["adults"].astype(int) + df["children"].astype(int) + df["babies"].astype(int)
+    df["total_nights"] = df["stays_in_weekend_nights"].astype(int) + df["stays_in_week_nights"].astype(int)
+    df["hotel_id"] = df["hotel"].map(hotel_ids)
+
+    # Пропуск некорректных записей и строк без отеля в БД
+    df = df[(df["total_guests"] != 0) & (df["total_nights"] != 0) & df["hotel_id"].notna()]
+
+    arrival = pd.to_datetime(pd.DataFrame({
+        "year": df["arrival_date_year"],
+        "month": df["arrival_date_month"].map(month_map),
+        "day": df["arrival_date_day_of_month"],
+    }))
+
+    return pd.DataFrame({
+        "hotel_id": df["hotel_id"].astype(int),
+        "booking_ref": None,
+        "arrival_date": arrival.dt.date,
+        "lead_time": df["lead_time"].astype(int),
+        "adr": df["adr"].astype(float),
+        "total_guests": df["total_guests"],
+        "total_nights": df["total_nights"],
+        "booking_changes": df["booking_changes"].astype(int),
+        "has_deposit": df["deposit_type"] != "No Deposit",
+        "is_cancellation": df["is_canceled"].astype(bool),
+        "market_segment": df["market_segment"],
+        "distribution_channel": df["distribution_channel"],
+        "reserved_room_type": df["reserved_room_type"],
+        "day_of_week": arrival.dt.weekday,
+    }, columns=BOOKING_WRITE_COLUMNS)
+
+
+def split_chunks(path: str, chunk_rows: int) -> List[Chunk]:
+    """
+    Границы порций по chunk_rows строк данных (заголовок не входит).
+    """
+    chunks = []
+    with open(path, "rb") as f:
+        start = offset = len(f.readline())
+        rows = 0
+        for line in f:
+            offset += len(line)
+            rows += 1
+            if rows == chunk_rows:
+                chunks.append((len(chunks), start, offset - start))
+                start, rows = offset, 0
+    if rows:
+        chunks.append((len(chunks), start, offset - start))
+    return chunks
+
+
+def source_key(path: str) -> str:
+    """
+    Идентификатор входного файла для отметок: имя и размер.
+    """
+    return f"{os.path.basename(path)}:{os.path.getsize(path)}"
+
+
+def _init_worker(path: str, columns: List[str], hotel_ids: Dict[str, int], source: str, chunk_rows: int):
+    # Соединения пула, унаследованные от родителя, не используются в дочернем процессе
+    engine.dispose(close=False)
+    _worker.update(path=path, columns=columns, hotel_ids=hotel_ids, source=source, chunk_rows=chunk_rows)
+
+
+def _import_chunk(chunk: Chunk) -> Tuple[int, int, int, Optional[str]]:
+    """
+    Returns:
+        Tuple[int, int, int, Optional[str]]: номер порции, строк в порции, добавлено, ошибка.
+    """
+    index, offset, length = chunk
+    rows = 0
+    db = SessionLocal()
+    try:
+        with open(_worker["path"], "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        df = pd.read_csv(io.BytesIO(data), header=None, names=_worker["columns"])
+        rows = len(df)
+
+        batch = make_batch(df, _worker["hotel_ids"])
+        inserted = write_bookings(db, batch)
+        if inserted:
+            # Отели в одном порядке во всех процессах — без взаимных блокировок строк hotel_watermark
+            for hotel_id in sorted(batch["hotel_id"].unique()):
+                touch_watermark(db, int(hotel_id), BOOKINGS)
+        db.add(ImportCheckpoint(
+            source=_worker["source"], chunk_rows=_worker["chunk_rows"], chunk_index=index,
+            rows=rows, inserted=inserted,
+        ))
+        db.commit()
+        return index, rows, inserted, None
+    except Exception as e:
+        db.rollback()
+        return index, rows, 0, f"{type(e).__name__}: {e}"
+    finally:
+        db.close()
+
+
+def load_hotel_ids() -> Dict[str, int]:
+    db = SessionLocal()
+    try:
+        hotels = {h.name: h.id for h in db.query(Hotel).all()}
+    finally:
+        db.close()
+    hotel_ids = {kind: hotels[name] for kind, name in HOTEL_NAMES.items() if name in hotels}
+    for kind, name in HOTEL_NAMES.items():
+        if kind not in hotel_ids:
+            logger.warning(f"Отель '{name}' не найден: строки '{kind}' будут пропущены")
+    return hotel_ids
+
+
+def done_chunks(source: str, chunk_rows: int, restart: bool) -> set:
+    """
+    Номера уже импортированных порций. С restart отметки источника удаляются.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(ImportCheckpoint).filter(ImportCheckpoint.source == source)
+        if restart:
+            query.delete(synchronize_session=False)
+            db.commit()
+            return set()
+        other = {c.chunk_rows for c in query.filter(ImportCheckpoint.chunk_rows != chunk_rows)}
+        if other:
+            raise SystemExit(
+                f"Для {source} есть отметки с --chunk-rows {sorted(other)}: "
+                f"продолжите с тем же размером порции или начните заново с --restart"
+            )
+        return {c.chunk_index for c in query}
+    finally:
+        db.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", default="database/hotel_bookings.csv")
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--restart", action="store_true", help="удалить отметки и импортировать файл заново")
+    args = parser.parse_args()
+
+    source = source_key(args.file)
+    columns = list(pd.read_csv(args.file, nrows=0).columns)
+    hotel_ids = load_hotel_ids()
+
+    chunks = split_chunks(args.file, args.chunk_rows)
+    done = done_chunks(source, args.chunk_rows, args.restart)
+    pending = [c for c in chunks if c[0] not in done]
+    logger.info(
+        f"{source}: порций {len(chunks)}, уже импортировано {len(chunks) - len(pending)}, "
+        f"к обработке {len(pending)}, процессов {args.workers}"
     )
-    bookings.append(booking)
 
-session.add_all(bookings)
-session.commit()
-print(f"Загружено {len(bookings)} записей.")
+    start = time.perf_counter()
+    total_rows = total_inserted = 0
+    failed = []
+    with Pool(args.workers, initializer=_init_worker,
+              initargs=(args.file, columns, hotel_ids, source, args.chunk_rows)) as pool:
+        for n, (index, rows, inserted, error) in enumerate(pool.imap_unordered(_import_chunk, pending), 1):
+            if error:
+                failed.append(index)
+                logger.error(f"Порция {index}: {error}")
+                continue
+            total_rows += rows
+            total_inserted += inserted
+            elapsed = time.perf_counter() - start
+            logger.info(
+                f"[{n}/{len(pending)}] порция {index}: строк {rows}, добавлено {inserted}; "
+                f"всего {total_rows} строк, {total_rows / elapsed:,.0f} строк/с"
+            )
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"Готово за {elapsed:.1f} c: строк {total_rows}, добавлено {total_inserted}, "
+        f"{total_rows / elapsed if elapsed else 0:,.0f} строк/с"
+    )
+    if failed:
+        logger.error(f"Порции с ошибками: {sorted(failed)}; повторите запуск, чтобы продолжить")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@ import holidays
 from datetime import datetime
 from shared.db import get_session_sync
 from shared.models import Holiday
+from shared.reference_cache import HOLIDAY, bump_reference_version
 from sqlalchemy import and_
 
 # Период
@@ -35,5 +36,7 @@ for date_, name in filtered:
         ))
 
 session.add_all(new_records)
+# Сервисы перечитают праздники при следующей проверке версии
+bump_reference_version(session, HOLIDAY)
 session.commit()
 print(f"Загружено {len(new_records)} праздников Португалии.")
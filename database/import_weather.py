@@ -2,6 +2,7 @@ from meteostat import Point, Daily, Stations
 from datetime import datetime
 from shared.db import get_session_sync
 from shared.models import City, Weather, Hotel
+from shared.reference_cache import WEATHER, bump_reference_version
 import pandas as pd
 
 # Инициализация сессии
@@ -58,5 +59,7 @@ for city in cities:
         weather_records.append(weather)
 
 session.add_all(weather_records)
+# Сервисы перечитают погоду при следующей проверке версии
+bump_reference_version(session, WEATHER)
 session.commit()
 print(f"Загружено {len(weather_records)} строк погоды.")
@@ -1,6 +1,7 @@
 from datetime import datetime
 from shared.db import get_session_sync
 from shared.models import Prediction
+from shared.watermarks import PREDICTIONS, touch_watermark
 import numpy as np
 
 # Исторические значения
@@ -60,6 +61,7 @@ def main():
                 cancellations=entry["cancellations"]
             )
             db.add(record)
+        touch_watermark(db, hotel_id, PREDICTIONS)
         db.commit()
 
         print(f"Добавлено {len(predictions)} записей в таблицу predictions.")
@@ -4,13 +4,11 @@ from pathlib import Path
 
 load_dotenv()
 
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
+# Директория для хранения моделей
+MODEL_DIR = Path(os.getenv("MODEL_DIR", "prediction_service/models"))
 
-DB_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Базовая модель — шаблон для новых отелей
+BASE_MODEL_DIR = Path(os.getenv("BASE_MODEL_DIR", "prediction_service/base_model"))
 
-# Директория для хранения моделей
-MODEL_DIR = Path(os.getenv("MODEL_DIR", "prediction_service/models"))
\ No newline at end of file
+# Максимальное число различных наборов весов в памяти процесса
+MODEL_CACHE_SIZE = int(os.getenv("MODEL_CACHE_SIZE", 64))
\ No newline at end of file
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import logging
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from prediction_service.config import MODEL_DIR, BASE_MODEL_DIR
+
+logger = logging.getLogger(__name__)
+
+# Снимки базовой модели, адресуемые по хешу содержимого
+SNAPSHOT_DIR = MODEL_DIR / "_base"
+
+# Файл-ссылка в директории отеля, пока модель не дообучена
+BASE_REF_FILE = "base_ref.json"
+
+# (path, mtime_ns, size) -> sha256, чтобы не хешировать веса при каждом запросе
+_digest_memo: Dict[Tuple[str, int, int], str] = {}
+_lock = threading.Lock()
+
+
+def hotel_dir(hotel_id: int) -> Path:
+    return MODEL_DIR / f"hotel_{hotel_id}"
+
+
+def file_digest(path: Path) -> str:
+    """
+    Возвращает sha256 файла, кешируя результат по (путь, mtime, размер).
+    """
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    digest = _digest_memo.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with path.open("rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        _digest_memo[key] = digest
+    return digest
+
+
+def compute_dir_hash(path: Path) -> str:
+    """
+    Хеш содержимого директории: относительные пути и sha256 всех файлов.
+    """
+    h = hashlib.sha256()
+    for file in sorted(p for p in path.rglob("*") if p.is_file()):
+        h.update(file.relative_to(path).as_posix().encode("utf-8"))
+        h.update(file_digest(file).encode("ascii"))
+    return h.hexdigest()
+
+
+def snapshot_base_model() -> str:
+    """
+    Сохраняет неизменяемый снимок base_model в SNAPSHOT_DIR/<hash>.
+
+    Returns:
+        str: хеш содержимого базовой модели.
+    """
+    base_hash = compute_dir_hash(BASE_MODEL_DIR)
+    target = SNAPSHOT_DIR / base_hash
+    with _lock:
+        if not target.exists():
+            SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = SNAPSHOT_DIR / f".{base_hash}.tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            shutil.copytree(BASE_MODEL_DIR, tmp)
+            tmp.rename(target)
+            logger.info(f"Создан снимок базовой модели {base_hash[:12]}")
+    return base_hash
+
+
+def link_hotel_to_base(hotel_id: int) -> str:
+    """
+    Создаёт директорию отеля со ссылкой на снимок базовой модели вместо копии файлов.
+    """
+    base_hash = snapshot_base_model()
+    path = hotel_dir(hotel_id)
+    path.mkdir(parents=True, exist_ok=True)
+    with (path / BASE_REF_FILE).open("w", encoding="utf-8") as f:
+        json.dump({"base_hash": base_hash}, f)
+    return base_hash
+
+
+def read_base_ref(hotel_id: int) -> Optional[str]:
+    """
+    Возвращает хеш снимка, на который ссылается отель, или None.
+    """
+    ref_path = hotel_dir(hotel_id) / BASE_REF_FILE
+    if not ref_path.exists():
+        return None
+    with ref_path.open("r", encoding="utf-8") as f:
+        return json.load(f)["base_hash"]
+
+
+def resolve_artifact(hotel_id: int, relative: str) -> Path:
+    """
+    Путь к артефакту отеля: собственный файл, если есть, иначе файл из снимка базовой модели.
+    """
+    own = hotel_dir(hotel_id) / relative
+    if own.exists():
+        return own
+    base_hash = read_base_ref(hotel_id)
+    if base_hash is not None:
+        return SNAPSHOT_DIR / base_hash / relative
+    return own
+
+
+def materialize_hotel_dir(hotel_id: int):
+    """
+    Copy-on-write: копирует файлы снимка в директорию отеля перед первой записью
+    и удаляет ссылку на базовую модель.
+    """
+    base_hash = read_base_ref(hotel_id)
+    if base_hash is None:
+        return
+
+    source = SNAPSHOT_DIR / base_hash
+    target = hotel_dir(hotel_id)
+    for file in source.rglob("*"):
+        if not file.is_file():
+            continue
+        dest = target / file.relative_to(source)
+        if not dest.exists():
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(file, dest)
+
+    (target / BASE_REF_FILE).unlink()
+    logger.info(f"Артефакты базовой модели материализованы для hotel_{hotel_id}")
@@ -6,12 +6,14 @@ import torch
 from sqlalchemy.orm import Session
 
 from shared.db import get_session_sync
-from shared.data_loader import load_bookings, load_weather, load_holidays
+from shared.data_loader import load_bookings
+from shared.reference_cache import add_reference_features
 from shared.models import Hotel
 from core.model_loader import load_model_and_config
 from prediction_service.preprocessing.preprocessor import preprocess_data
 from prediction_service.preprocessing.scaling import normalize_data, denormalize_forecast
 from prediction_service.schemas import PredictDay, PredictResponse
+from shared.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -56,36 +58,15 @@ def process_inputs_for_model(
     """
     logger.info(f"Подготовка входных данных: hotel_id={hotel_id}, target_date={target_date}, has_deposit={has_deposit}")
 
-    # Загрузка данных
-    df_b = load_bookings(hotel_id, db)
-    df_b = df_b[df_b['has_deposit'] == has_deposit]
-    df_w = load_weather(hotel_id, db)
-    df_h = load_holidays(db)
+    # Загрузка данных: только окно последних 30 дней и нужный тип депозита
+    start_date = target_date - timedelta(days=29)
+    df_b = load_bookings(hotel_id, db, start_date=start_date, end_date=target_date, has_deposit=has_deposit)
     hotel = db.query(Hotel).get(hotel_id)
 
-    # Преобразование дат
-    for col in ['arrival_date']:
-        df_b[col] = pd.to_datetime(df_b[col], errors='coerce')
-    df_w['date'] = pd.to_datetime(df_w['date'], errors='coerce')
-    df_h['date'] = pd.to_datetime(df_h['date'], errors='coerce')
-
-    # Очистка
-    df_b.drop(columns=["booking_ref", "created_at"], inplace=True, errors="ignore")
-    df_h.drop(columns=["region", "created_at"], inplace=True, errors="ignore")
-
-    # Объединение с погодой
-    df = df_b.merge(df_w, left_on='arrival_date', right_on='date',
-                    how='left', suffixes=('', '_weather'))
-
-    # Ограничение диапазона (последние 30 дней)
-    start_date = target_date - timedelta(days=29)
-    df = df[(df["arrival_date"].dt.date >= start_date) & (df["arrival_date"].dt.date <= target_date)]
-    if df.empty:
-        logger.error(f"Нет данных о бронированиях {start_date} – {target_date}")
-        raise ValueError(f"Нет данных о бронированиях {start_date} – {target_date}")
+    # Погода и праздники из кеша справочников
+    df = add_reference_features(df_b, hotel_id, db)
 
     # Добавление признаков
-    df['is_holiday'] = df['arrival_date'].isin(df_h['date']).astype(int)
     df['is_city_hotel'] = int(hotel.is_city_hotel)
     df = preprocess_data(df, hotel_id)
 
@@ -130,10 +111,12 @@ def run_forecast_for_hotel(
     logger.info(f"Запуск прогноза: hotel_id={hotel_id}, target_date={target_date}, has_deposit={has_deposit}")
 
     # Загрузка модели и конфига
-    model, config = load_model_and_config(hotel_id)
+    with span("load"):
+        model, config = load_model_and_config(hotel_id)
 
     # Подготовка входов
-    X = process_inputs_for_model(hotel_id, db, config, target_date, has_deposit)
+    with span("preprocess"):
+        X = process_inputs_for_model(hotel_id, db, config, target_date, has_deposit)
 
     expected_dim = config["num_numeric_features"] + len(config["categorical_features"])
     if X.shape[1] != expected_dim:
@@ -153,7 +136,7 @@ def run_forecast_for_hotel(
     x_numeric_tensor = torch.tensor(X_numeric, dtype=torch.float32).unsqueeze(0)
 
     # Прогноз
-    with torch.no_grad():
+    with span("infer"), torch.no_grad():
         y_pred = model(x_numeric_tensor, x_cat_dict).squeeze(0).numpy()
 
     y_pred = denormalize_forecast(y_pred, hotel_id)
@@ -1,14 +1,23 @@
 import torch
+import copy
 import json
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from typing import Tuple, Dict
 from torch.nn import Module
 
-from prediction_service.config import MODEL_DIR
+from prediction_service.config import MODEL_CACHE_SIZE
+from core.artifacts import resolve_artifact, file_digest
 from core.gru_model import GRUForecaster
 
 logger = logging.getLogger(__name__)
 
+# (sha256 весов, sha256 конфига) -> модель; отели с одинаковыми весами делят один экземпляр
+_model_cache: "OrderedDict[Tuple[str, str], Module]" = OrderedDict()
+_cache_lock = threading.Lock()
+
 
 def load_model_config(hotel_id: int) -> dict:
     """
@@ -17,7 +26,7 @@ def load_model_config(hotel_id: int) -> dict:
     Returns:
         dict: словарь с параметрами модели.
     """
-    config_path = MODEL_DIR / f"hotel_{hotel_id}/model_config.json"
+    config_path = resolve_artifact(hotel_id, "model_config.json")
     if not config_path.exists():
         raise FileNotFoundError(f"Конфигурация модели не найдена: {config_path}")
 
@@ -36,31 +45,15 @@ def load_model_config(hotel_id: int) -> dict:
     return config
 
 
-def load_model_and_config(hotel_id: int) -> Tuple[Module, dict]:
+def _build_model(config: dict, model_path) -> Module:
     """
-    Загружает модель и конфигурацию по hotel_id.
-
-    Returns:
-        Tuple[torch.nn.Module, dict]: кортеж (модель, конфиг).
+    Создаёт GRUForecaster по конфигу и загружает веса.
     """
-    config = load_model_config(hotel_id)
-
-    # Убираем таргет-признаки, которые не нужны в инференсе
-    config["numeric_features"] = [
-        col for col in config["numeric_features"]
-        if not (col.startswith("book_d") or col.startswith("cancel_d"))
-    ]
-    config["num_numeric_features"] = len(config["numeric_features"])
-
     # Приведение embedding_sizes к Dict[str, Tuple[int, int]]
     embedding_sizes: Dict[str, Tuple[int, int]] = {
         k: (int(v[0]), int(v[1])) for k, v in config["embedding_sizes"].items()
     }
 
-    model_path = MODEL_DIR / f"hotel_{hotel_id}/model.pt"
-    if not model_path.exists():
-        raise FileNotFoundError(f"Файл модели не найден: {model_path}")
-
     # Инициализация модели
     model = GRUForecaster(
         num_numeric_features=config["num_numeric_features"],
@@ -75,6 +68,50 @@ def load_model_and_config(hotel_id: int) -> Tuple[Module, dict]:
     # Загрузка весов
     model.load_state_dict(torch.load(model_path, map_location="cpu"))
     model.eval()
+    return model
+
+
+def load_model_and_config(hotel_id: int) -> Tuple[Module, dict]:
+    """
+    Загружает модель и конфигурацию по hotel_id.
+
+    Модели кешируются по хешу весов и конфига, поэтому недообученные отели,
+    ссылающиеся на один снимок базовой модели, получают один и тот же экземпляр.
+
+    Returns:
+        Tuple[torch.nn.Module, dict]: кортеж (модель, конфиг).
+    """
+    config = load_model_config(hotel_id)
+
+    # Убираем таргет-признаки, которые не нужны в инференсе
+    config["numeric_features"] = [
+        col for col in config["numeric_features"]
+        if not (col.startswith("book_d") or col.startswith("cancel_d"))
+    ]
+    config["num_numeric_features"] = len(config["numeric_features"])
+
+    model_path = resolve_artifact(hotel_id, "model.pt")
+    if not model_path.exists():
+        raise FileNotFoundError(f"Файл модели не найден: {model_path}")
+
+    config_digest = hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+    key = (file_digest(model_path), config_digest)
+
+    with _cache_lock:
+        model = _model_cache.get(key)
+        if model is not None:
+            _model_cache.move_to_end(key)
+            logger.info(f"Модель для hotel_id={hotel_id} взята из кеша")
+            return model, copy.deepcopy(config)
+
+    model = _build_model(config, model_path)
+
+    with _cache_lock:
+        # Параллельный запрос мог уже загрузить те же веса
+        model = _model_cache.setdefault(key, model)
+        _model_cache.move_to_end(key)
+        while len(_model_cache) > MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
 
     logger.info(f"Модель успешно загружена для hotel_id={hotel_id}")
-    return model, config
+    return model, copy.deepcopy(config)
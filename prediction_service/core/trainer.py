@@ -1,30 +1,30 @@
 import torch
 from torch.utils.data import DataLoader, TensorDataset
-from pathlib import Path
-from shutil import copytree
 from sqlalchemy.orm import Session
 
+from core.artifacts import hotel_dir, link_hotel_to_base, materialize_hotel_dir, resolve_artifact
 from core.model_loader import load_model_config
 from core.gru_model import GRUForecaster
 from prediction_service.preprocessing.preprocessor import preprocess_data
 from prediction_service.preprocessing.scaling import normalize_data
 from prediction_service.preprocessing.sequencing import create_sequences
-from shared.data_loader import load_bookings, load_weather, load_holidays
+from shared.data_loader import load_bookings
+from shared.reference_cache import add_reference_features
 
 
 def setup_hotel_model_from_base(hotel_id: int):
     """
-    Копирует базовую модель и конфиг как шаблон для нового отеля.
+    Привязывает новый отель к снимку базовой модели по хешу содержимого.
+    Файлы копируются в директорию отеля только при первом дообучении.
     """
-    base_path = Path("prediction_service/base_model")
-    hotel_path = Path(f"prediction_service/models/hotel_{hotel_id}")
+    hotel_path = hotel_dir(hotel_id)
 
     if hotel_path.exists():
         print(f"Модель для hotel_{hotel_id} уже существует")
         return
 
-    copytree(base_path, hotel_path)
-    print(f"Базовая модель скопирована для hotel_{hotel_id}")
+    base_hash = link_hotel_to_base(hotel_id)
+    print(f"hotel_{hotel_id} ссылается на базовую модель {base_hash[:12]}")
 
 
 def train_model_for_hotel(hotel_id: int, db_session: Session, target_col: str = "bookings",
@@ -44,7 +44,7 @@ def train_model_for_hotel(hotel_id: int, db_session: Session, target_col: str =
     )
 
     # Загрузка весов (если есть)
-    model_path = Path(f"prediction_service/models/hotel_{hotel_id}/model.pt")
+    model_path = resolve_artifact(hotel_id, "model.pt")
     if model_path.exists():
         model.load_state_dict(torch.load(model_path, map_location="cpu"))
         print(f"Загружена базовая модель из {model_path}")
@@ -53,11 +53,7 @@ def train_model_for_hotel(hotel_id: int, db_session: Session, target_col: str =
 
     # Загрузка и объединение данных
     df_b = load_bookings(hotel_id, db_session)
-    df_w = load_weather(hotel_id, db_session)
-    df_h = load_holidays(db_session)
-
-    df = df_b.merge(df_w, left_on='arrival_date', right_on='date', how='left')
-    df['is_holiday'] = df['arrival_date'].isin(df_h['date']).astype(int)
+    df = add_reference_features(df_b, hotel_id, db_session)
 
     # Преобразование признаков и нормализация
     df_processed = preprocess_data(df)
@@ -91,6 +87,8 @@ def train_model_for_hotel(hotel_id: int, db_session: Session, target_col: str =
             total_loss += loss.item()
         print(f"Epoch {epoch+1}/{epochs} - Loss: {total_loss / len(loader):.4f}")
 
-    # Сохранение модели
+    # Сохранение модели (copy-on-write: отвязываем отель от базового снимка)
+    materialize_hotel_dir(hotel_id)
+    model_path = hotel_dir(hotel_id) / "model.pt"
     torch.save(model.state_dict(), model_path)
     print(f"Model saved to: {model_path}")
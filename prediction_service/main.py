@@ -2,8 +2,10 @@ import logging
 from datetime import datetime
 
 from fastapi import FastAPI, HTTPException, Depends
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 
+from core.artifacts import resolve_artifact, read_base_ref
 from core.model_loader import load_model_and_config
 from core.forecast import run_forecast_for_hotel
 from core.trainer import train_model_for_hotel, setup_hotel_model_from_base
@@ -12,28 +14,37 @@ from prediction_service.schemas import (
     PredictRequest, PredictResponse
 )
 from prediction_service.config import MODEL_DIR
-from shared.db import get_session
+from shared.db import get_session, read_session
 from shared.models import Prediction
+from shared.watermarks import PREDICTIONS, touch_watermark
+from shared.metrics import render_prometheus
+from shared.responses import FastJSONResponse, setup_responses
+from shared.tracing import setup_tracing, span
+from shared.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-app = FastAPI(title="Prediction Service API")
+app = FastAPI(title="Prediction Service API", default_response_class=FastJSONResponse)
+setup_responses(app)
+setup_tracing(app, "prediction")
 
+# Одинаковые одновременные запросы прогноза выполняются один раз
+_predictions = SingleFlight("run_predict")
 
-@app.post("/run-predict", response_model=PredictResponse)
-def predict(req: PredictRequest, db: Session = Depends(get_session)):
+
+def _predict_and_store(req: PredictRequest, db: Session) -> PredictResponse:
     """
-    Запускает прогнозирование для указанного отеля.
+    Прогноз для отеля и его сохранение в БД.
     """
-    try:
-        logger.info(f"Получен запрос: {req.json()}")
-
+    # Чтение входных данных — с реплики, если она настроена
+    with read_session(req.hotel_id) as read_db:
         result = run_forecast_for_hotel(
-            req.hotel_id, db, req.target_date, has_deposit=req.has_deposit
+            req.hotel_id, read_db, req.target_date, has_deposit=req.has_deposit
         )
 
-        # Сохраняем прогноз в БД
+    # Сохраняем прогноз в БД
+    with span("save"):
         predictions = []
         for day in result.forecast:
             forecast_date = (
@@ -50,10 +61,23 @@ def predict(req: PredictRequest, db: Session = Depends(get_session)):
                 )
             )
         db.bulk_save_objects(predictions)
+        touch_watermark(db, req.hotel_id, PREDICTIONS)
         db.commit()
-        logger.info(f"Прогноз сохранён: {len(result.forecast)} записей")
+    logger.info(f"Прогноз сохранён: {len(result.forecast)} записей")
+    return result
 
-        return result
+
+@app.post("/run-predict", response_model=PredictResponse)
+def predict(req: PredictRequest, db: Session = Depends(get_session)):
+    """
+    Запускает прогнозирование для указанного отеля.
+    Одновременные запросы с теми же (hotel_id, target_date, has_deposit)
+    получают результат одного вычисления.
+    """
+    try:
+        logger.info(f"Получен запрос: {req.json()}")
+        key = (req.hotel_id, req.target_date, req.has_deposit)
+        return _predictions.do(key, lambda: _predict_and_store(req, db))
 
     except ValueError as ve:
         logger.error(f"Ошибка данных: {ve}")
@@ -65,7 +89,7 @@ def predict(req: PredictRequest, db: Session = Depends(get_session)):
 
 
 @app.post("/train")
-def train(req: TrainRequest, db: Session = Depends(get_session)):
+def train(req: TrainRequest):
     """
     Обучает или дообучает модель для отеля.
     """
@@ -74,12 +98,13 @@ def train(req: TrainRequest, db: Session = Depends(get_session)):
         if req.init:
             setup_hotel_model_from_base(req.hotel_id)
 
-        train_model_for_hotel(
-            hotel_id=req.hotel_id,
-            db_session=db,
-            epochs=req.epochs,
-            batch_size=req.batch_size,
-        )
+        with read_session(req.hotel_id) as read_db:
+            train_model_for_hotel(
+                hotel_id=req.hotel_id,
+                db_session=read_db,
+                epochs=req.epochs,
+                batch_size=req.batch_size,
+            )
         return {
             "hotel_id": req.hotel_id,
             "status": "success",
@@ -113,13 +138,14 @@ def check_model_status(hotel_id: int):
     """
     Проверяет наличие модели и её конфигурации.
     """
-    model_path = MODEL_DIR / f"hotel_{hotel_id}/model.pt"
-    config_path = MODEL_DIR / f"hotel_{hotel_id}/model_config.json"
+    model_path = resolve_artifact(hotel_id, "model.pt")
+    config_path = resolve_artifact(hotel_id, "model_config.json")
     logger.info(f"Проверка статуса модели: hotel_id={hotel_id}")
     return {
         "hotel_id": hotel_id,
         "model_exists": model_path.exists(),
         "config_exists": config_path.exists(),
+        "base_ref": read_base_ref(hotel_id),
     }
 
 
@@ -135,3 +161,19 @@ def get_model_config(hotel_id: int):
     except Exception as e:
         logger.exception("Ошибка при загрузке конфигурации")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/health")
+def health():
+    """
+    Проверка доступности реплики для router (исключение из кольца реплик).
+    """
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Метрики процесса в формате Prometheus (пул соединений и др.).
+    """
+    return render_prometheus()
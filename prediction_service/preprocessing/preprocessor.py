@@ -1,9 +1,10 @@
 import pandas as pd
 import numpy as np
 import joblib
-from pathlib import Path
 import logging
 
+from core.artifacts import resolve_artifact
+
 logger = logging.getLogger(__name__)
 
 # Соответствие: имя сохранённого энкодера -> оригинальная колонка
@@ -18,7 +19,7 @@ def load_encoder(name: str, hotel_id: int):
     """
     Загружает сохранённый LabelEncoder для конкретного отеля.
     """
-    path = Path(f"prediction_service/models/hotel_{hotel_id}/encoders") / f"{name}.pkl"
+    path = resolve_artifact(hotel_id, f"encoders/{name}.pkl")
     logger.debug(f"Загрузка энкодера {name}: {path}")
     return joblib.load(path)
 
@@ -36,7 +37,13 @@ def encode_categorical_features(df: pd.DataFrame, hotel_id: int) -> pd.DataFrame
             raise ValueError(f"Missing required column {orig_col}")
 
         encoder = load_encoder(enc_col, hotel_id)
-        df[enc_col] = encoder.transform(df[orig_col].astype(str))
+        column = df[orig_col]
+        if isinstance(column.dtype, pd.CategoricalDtype) and not column.isna().any():
+            # Кодируем только уникальные категории и раскладываем по кодам строк
+            encoded = encoder.transform(column.cat.categories.astype(str))
+            df[enc_col] = encoded[column.cat.codes.to_numpy()]
+        else:
+            df[enc_col] = encoder.transform(column.astype(str))
 
     df.drop(columns=list(ENCODING_MAP.values()), inplace=True, errors="ignore")
     logger.debug("Категориальные признаки закодированы")
@@ -148,7 +155,8 @@ def enforce_numeric_types(df: pd.DataFrame) -> pd.DataFrame:
         "bookings_last_year", "cancels_last_year"
     ]
     for col in numeric_cols:
-        if col in df.columns:
+        # Колонки из shared.data_loader уже имеют компактный числовой тип
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
             df[col] = pd.to_numeric(df[col], errors="coerce")
     logger.debug("Числовые признаки приведены к типу numeric")
     return df
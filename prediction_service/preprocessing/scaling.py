@@ -1,10 +1,11 @@
 import joblib
 import numpy as np
 import pandas as pd
-from pathlib import Path
 from sklearn.preprocessing import MinMaxScaler
 import logging
 
+from core.artifacts import resolve_artifact
+
 logger = logging.getLogger(__name__)
 
 SCALE_FEATURES = [
@@ -18,7 +19,7 @@ def load_scaler(hotel_id: int) -> MinMaxScaler:
     """
     Загружает MinMaxScaler для указанного отеля.
     """
-    path = Path(f"prediction_service/models/hotel_{hotel_id}/scalers/feature_scaler.pkl")
+    path = resolve_artifact(hotel_id, "scalers/feature_scaler.pkl")
     logger.debug(f"Загрузка scaler: {path}")
     return joblib.load(path)
 
@@ -57,8 +58,7 @@ def denormalize_forecast(y_pred: np.ndarray, hotel_id: int) -> np.ndarray:
         logger.error("Получен пустой массив предсказаний для денормализации")
         raise ValueError("Empty predictions array for denormalization")
 
-    path = Path(f"prediction_service/models/hotel_{hotel_id}/scalers/feature_scaler.pkl")
-    scaler: MinMaxScaler = joblib.load(path)
+    scaler = load_scaler(hotel_id)
 
     feature_names = scaler.feature_names_in_
     horizon = y_pred.shape[0]
@@ -0,0 +1,156 @@
+"""
+Кеш ответов fetch-forecast в router.
+
+Ключ — (hotel_id, поколение отеля, target_date, horizon, has_deposit).
+Запись хранится вместе с ETag и отдаётся только после его проверки
+в data_interface_service (If-None-Match -> 304), поэтому кеш экономит
+расчёт и передачу тела, но не проверку актуальности.
+Инвалидация по отелю увеличивает его поколение: старые записи становятся
+недостижимыми и вытесняются по TTL или размеру.
+
+Хранилище — локальное (LRU в памяти процесса) или общее Redis
+(FORECAST_CACHE_URL): тогда инвалидация на одной реплике router видна всем.
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from router.config import FORECAST_CACHE_SIZE, FORECAST_CACHE_TTL, FORECAST_CACHE_URL
+from shared.metrics import counter
+from shared.responses import dumps
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # redis нужен только для общего кеша
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+forecast_cache_requests = counter("router_forecast_cache_total", "Обращения к кешу прогнозов по результату")
+forecast_cache_invalidations = counter("router_forecast_cache_invalidations_total", "Инвалидации кеша прогнозов")
+
+
+class LocalCache:
+    """
+    LRU с TTL в памяти процесса. Используется по умолчанию и в тестах.
+    """
+    def __init__(self, size: int = FORECAST_CACHE_SIZE, ttl: float = FORECAST_CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._generations: Dict[int, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry[0]:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: bytes):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    async def generation(self, hotel_id: int) -> int:
+        return self._generations.get(hotel_id, 0)
+
+    async def bump(self, hotel_id: int):
+        self._generations[hotel_id] = self._generations.get(hotel_id, 0) + 1
+
+    async def close(self):
+        self._entries.clear()
+
+
+class RedisCache:
+    """
+    Общий кеш в Redis. Размер ограничивается TTL записей и maxmemory самого Redis.
+    Ошибки Redis не ломают запрос: он обслуживается как промах кеша.
+    """
+    def __init__(self, url: str, ttl: float = FORECAST_CACHE_TTL):
+        self.ttl = ttl
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self._client.get(key)
+        except redis.RedisError as e:
+            logger.warning("Кеш прогнозов недоступен: %s", e)
+            return None
+
+    async def set(self, key: str, value: bytes):
+        try:
+            await self._client.set(key, value, ex=max(1, int(self.ttl)))
+        except redis.RedisError as e:
+            logger.warning("Кеш прогнозов недоступен: %s", e)
+
+    async def generation(self, hotel_id: int) -> int:
+        try:
+            return int(await self._client.get(f"forecast:gen:{hotel_id}") or 0)
+        except redis.RedisError as e:
+            logger.warning("Кеш прогнозов недоступен: %s", e)
+            return -1
+
+    async def bump(self, hotel_id: int):
+        try:
+            await self._client.incr(f"forecast:gen:{hotel_id}")
+        except redis.RedisError as e:
+            logger.error("Не удалось инвалидировать кеш прогнозов hotel_id=%s: %s", hotel_id, e)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class ForecastCache:
+    """
+    Кеш тел ответов fetch-forecast вместе с ETag и Cache-Control.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def _key(self, hotel_id: int, target_date: str, horizon: int, has_deposit: bool) -> Optional[str]:
+        generation = await self.backend.generation(hotel_id)
+        if generation < 0:
+            return None
+        return f"forecast:{hotel_id}:{generation}:{target_date}:{horizon}:{int(has_deposit)}"
+
+    async def get(self, hotel_id: int, target_date: str, horizon: int, has_deposit: bool):
+        """
+        Returns:
+            (ключ, (заголовки, тело) или None); ключ None — кеш недоступен.
+        """
+        key = await self._key(hotel_id, target_date, horizon, has_deposit)
+        value = await self.backend.get(key) if key else None
+        forecast_cache_requests.inc(result="hit" if value else "miss")
+        if not value:
+            return key, None
+        headers, body = value.split(b"\n", 1)
+        return key, (json.loads(headers), body)
+
+    async def set(self, key: str, headers: Dict[str, str], body: bytes):
+        # Ключ содержит поколение на момент запроса: ответ, полученный
+        # до инвалидации, сохраняется под устаревшим ключом и не будет прочитан
+        await self.backend.set(key, dumps(headers) + b"\n" + body)
+
+    async def invalidate(self, hotel_id: int):
+        forecast_cache_invalidations.inc()
+        await self.backend.bump(hotel_id)
+
+    async def close(self):
+        await self.backend.close()
+
+
+def create_forecast_cache() -> ForecastCache:
+    if not FORECAST_CACHE_URL:
+        return ForecastCache(LocalCache())
+    if redis is None:
+        raise RuntimeError("FORECAST_CACHE_URL задан, но пакет redis не установлен")
+    logger.info("Кеш прогнозов: Redis")
+    return ForecastCache(RedisCache(FORECAST_CACHE_URL))
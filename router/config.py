@@ -4,8 +4,61 @@ from dotenv import load_dotenv
 load_dotenv()
 
 PREDICTION_SERVICE_URL = os.getenv("PREDICTION_SERVICE_URL", "http://prediction_service:8001")
+# Реплики prediction_service через запятую; отели закрепляются за ними консистентным хешированием
+PREDICTION_SERVICE_URLS = [
+    url.strip() for url in (os.getenv("PREDICTION_SERVICE_URLS") or PREDICTION_SERVICE_URL).split(",") if url.strip()
+]
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://auth-service:8002")
 DATA_INTERFACE_SERVICE_URL = os.getenv("DATA_INTERFACE_SERVICE_URL", "http://data-interface-service:8003")
 
+# Таймаут проксирования загрузки бронирований (большие файлы), секунды
+UPLOAD_TIMEOUT = float(os.getenv("UPLOAD_TIMEOUT", 600))
+# Таймаут ожидания данных при потоковой выгрузке прогнозов, секунды
+EXPORT_TIMEOUT = float(os.getenv("EXPORT_TIMEOUT", 600))
+# Таймауты остальных маршрутов, секунды
+AUTH_TIMEOUT = float(os.getenv("AUTH_TIMEOUT", 5))
+FORECAST_TIMEOUT = float(os.getenv("FORECAST_TIMEOUT", 10))
+PREDICTION_TIMEOUT = float(os.getenv("PREDICTION_TIMEOUT", 30))
+# Таймаут установки соединения с сервисом, секунды
+CONNECT_TIMEOUT = float(os.getenv("CONNECT_TIMEOUT", 2))
+
+# Пул соединений к каждому сервису: всего и сохраняемых keep-alive
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", 200))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", 50))
+# Повторы идемпотентных запросов и базовая задержка между ними (с джиттером), секунды
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", 2))
+UPSTREAM_BACKOFF = float(os.getenv("UPSTREAM_BACKOFF", 0.1))
+# Circuit breaker: подряд идущих сбоев до размыкания и пауза до пробного запроса, секунды
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", 5))
+BREAKER_RESET = float(os.getenv("BREAKER_RESET", 30))
+
+# Кеш ответов fetch-forecast: записей, время жизни (секунды) и общий Redis
+# (redis://...) — пусто для локального кеша каждой реплики
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", 2000))
+FORECAST_CACHE_TTL = float(os.getenv("FORECAST_CACHE_TTL", 300))
+FORECAST_CACHE_URL = os.getenv("FORECAST_CACHE_URL", "")
+
+# Контроль допуска на отель и класс маршрутов: запросов/с, запас и одновременных запросов
+LIMIT_PREDICT_RATE = float(os.getenv("LIMIT_PREDICT_RATE", 1))
+LIMIT_PREDICT_BURST = float(os.getenv("LIMIT_PREDICT_BURST", 5))
+LIMIT_PREDICT_IN_FLIGHT = int(os.getenv("LIMIT_PREDICT_IN_FLIGHT", 2))
+LIMIT_UPLOAD_RATE = float(os.getenv("LIMIT_UPLOAD_RATE", 0.1))
+LIMIT_UPLOAD_BURST = float(os.getenv("LIMIT_UPLOAD_BURST", 3))
+LIMIT_UPLOAD_IN_FLIGHT = int(os.getenv("LIMIT_UPLOAD_IN_FLIGHT", 1))
+LIMIT_FETCH_RATE = float(os.getenv("LIMIT_FETCH_RATE", 10))
+LIMIT_FETCH_BURST = float(os.getenv("LIMIT_FETCH_BURST", 30))
+LIMIT_FETCH_IN_FLIGHT = int(os.getenv("LIMIT_FETCH_IN_FLIGHT", 10))
+# Общее число запросов в обработке, начиная с которого новые сбрасываются с 503
+SHED_QUEUE_DEPTH = int(os.getenv("SHED_QUEUE_DEPTH", 500))
+
+# Консистентное хеширование реплик prediction_service: виртуальных узлов на реплику,
+# период и путь проверки здоровья
+HASH_RING_VNODES = int(os.getenv("HASH_RING_VNODES", 100))
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", 5))
+PREDICTION_HEALTH_PATH = os.getenv("PREDICTION_HEALTH_PATH", "/health")
+
+# Размер кеша проверенных JWT (записи живут до exp токена)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+
 SECRET_KEY = os.getenv("SECRET_KEY", "super-secret")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
\ No newline at end of file
@@ -1,45 +1,414 @@
+import asyncio
+import hashlib
+import logging
+import random
+import time
 import httpx
-from typing import Dict
-from fastapi import Header, HTTPException
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from fastapi import Depends, Header, HTTPException, Request
 from jose import jwt, JWTError
 
-from router.config import SECRET_KEY, ALGORITHM
+from router.config import (
+    AUTH_SERVICE_URL, DATA_INTERFACE_SERVICE_URL, PREDICTION_SERVICE_URLS,
+    HEALTH_CHECK_INTERVAL, PREDICTION_HEALTH_PATH,
+    SECRET_KEY, ALGORITHM, CONNECT_TIMEOUT, FORECAST_TIMEOUT,
+    UPSTREAM_MAX_CONNECTIONS, UPSTREAM_MAX_KEEPALIVE, UPSTREAM_RETRIES, UPSTREAM_BACKOFF,
+    BREAKER_FAILURES, BREAKER_RESET, TOKEN_CACHE_SIZE,
+)
+from router.cache import ForecastCache, create_forecast_cache
+from router.limits import PREDICT, limiter
+from router.sharding import HashRing
+from shared.metrics import counter, gauge, summary
+from shared.tracing import REQUEST_ID_HEADER, current_request_id, merge_server_timing, record_span, span
 
+logger = logging.getLogger(__name__)
 
-# --- HTTP client (singleton) ---
-client: httpx.AsyncClient | None = None
+# --- Upstream-сервисы ---
+AUTH = "auth"
+DATA_INTERFACE = "data_interface"
+PREDICTION = "prediction"
+
+UPSTREAM_URLS = {
+    AUTH: AUTH_SERVICE_URL,
+    DATA_INTERFACE: DATA_INTERFACE_SERVICE_URL,
+}
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Ответы, означающие недоступность сервиса, а не ошибку в запросе
+UNAVAILABLE_STATUSES = {502, 503, 504}
+
+upstream_requests = counter("router_upstream_requests_total", "Запросы router к сервисам по исходу")
+upstream_seconds = summary("router_upstream_seconds", "Время ответа сервисов, с")
+breaker_open = gauge("router_upstream_breaker_open", "Разомкнут ли circuit breaker сервиса")
+shard_requests = counter("router_shard_requests_total", "Запросы к репликам сервиса")
+shard_failovers = counter("router_shard_failovers_total", "Переключения запроса на следующую реплику")
+backend_healthy = gauge("router_backend_healthy", "Доступна ли реплика сервиса")
+
+
+class UpstreamUnavailable(Exception):
+    """
+    Сервис считается недоступным (разомкнут circuit breaker): запрос не отправляется.
+    """
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} недоступен")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Размыкается после BREAKER_FAILURES сбоев подряд. Через BREAKER_RESET секунд
+    запросы снова пропускаются: первый успех замыкает цепь, сбой — размыкает заново.
+    """
+    def __init__(self, name: str, failures: int = BREAKER_FAILURES, reset: float = BREAKER_RESET):
+        self.name = name
+        self.threshold = failures
+        self.reset = reset
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        return self.opened_at is None or time.monotonic() - self.opened_at >= self.reset
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info("Сервис %s снова доступен", self.name)
+            breaker_open.set(0, upstream=self.name)
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            if self.opened_at is None:
+                logger.warning("Сервис %s недоступен: %s сбоев подряд", self.name, self.failures)
+                breaker_open.set(1, upstream=self.name)
+            self.opened_at = time.monotonic()
+
+
+def _backoff(attempt: int) -> float:
+    # Экспоненциальная задержка с полным джиттером: повторы разных запросов не синхронизируются
+    return random.uniform(0, UPSTREAM_BACKOFF * 2 ** attempt)
+
+
+class Upstream:
+    """
+    Клиент одного сервиса: собственный пул keep-alive соединений, таймаут
+    на маршрут, повторы идемпотентных запросов и circuit breaker.
+    """
+    def __init__(self, name: str, base_url: str, service: Optional[str] = None):
+        self.name = name
+        # Имя сервиса в трассах: у реплик одно на всех
+        self.service = service or name
+        self.breaker = CircuitBreaker(name)
+        # Внутри сети ответы сервисов не сжимаются: router передаёт тела как есть
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(FORECAST_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+            ),
+            headers={"Accept-Encoding": "identity"},
+        )
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        timeout: Optional[float] = None,
+        idempotent: Optional[bool] = None,
+        stream: bool = False,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Запрос к сервису. Идемпотентные запросы (GET и т.п. или явно idempotent=True)
+        повторяются при ошибке соединения, таймауте или ответе 502/503/504.
+        Остальные — только если соединение не установлено (запрос не отправлен)
+        и тело можно отправить повторно.
+
+        Returns:
+            httpx.Response; при stream=True тело читается вызывающим, он же закрывает ответ.
+
+        Raises:
+            UpstreamUnavailable: circuit breaker разомкнут.
+            httpx.RequestError: сервис не ответил и попытки исчерпаны.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        replayable = isinstance(kwargs.get("content"), (bytes, str, type(None)))
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=CONNECT_TIMEOUT)
+        request_id = current_request_id()
+        if request_id:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), REQUEST_ID_HEADER: request_id}
+
+        attempts = 1 + UPSTREAM_RETRIES
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                upstream_requests.inc(upstream=self.name, outcome="rejected")
+                raise UpstreamUnavailable(self.name, self.breaker.retry_after())
+
+            last = attempt == attempts - 1
+            start = time.perf_counter()
+            try:
+                response = await self.client.send(self.client.build_request(method, path, **kwargs), stream=stream)
+            except httpx.TransportError as e:
+                record_span(self.service, start, detail=f"{method} {path} {e!r}")
+                self.breaker.record_failure()
+                not_sent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)) and replayable
+                if last or not (idempotent or not_sent):
+                    upstream_requests.inc(upstream=self.name, outcome="error")
+                    raise
+                logger.warning("Повтор запроса к %s %s: %r", self.name, path, e)
+            else:
+                upstream_seconds.observe(time.perf_counter() - start, upstream=self.name)
+                record_span(self.service, start, detail=f"{method} {path} {response.status_code}")
+                merge_server_timing(self.service, response.headers.get("server-timing"), start)
+                if response.status_code not in UNAVAILABLE_STATUSES:
+                    self.breaker.record_success()
+                    upstream_requests.inc(upstream=self.name, outcome="ok")
+                    return response
+                self.breaker.record_failure()
+                if last or not idempotent:
+                    upstream_requests.inc(upstream=self.name, outcome="error")
+                    return response
+                await response.aclose()
+                logger.warning("Повтор запроса к %s %s: ответ %s", self.name, path, response.status_code)
+
+            upstream_requests.inc(upstream=self.name, outcome="retry")
+            await asyncio.sleep(_backoff(attempt))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class ShardedUpstream:
+    """
+    Клиент реплик сервиса: у каждой реплики свой Upstream (пул соединений,
+    повторы, circuit breaker), реплика выбирается по кольцу консистентного
+    хеширования (router.sharding). Недоступные реплики пропускаются
+    до следующей успешной проверки здоровья.
+    """
+    def __init__(self, name: str, urls: List[str]):
+        self.name = name
+        self.backends = {url: Upstream(f"{name}@{url}", url, service=name) for url in urls}
+        self.ring = HashRing(urls)
+        self.healthy = {url: True for url in self.backends}
+        self._health_task: Optional[asyncio.Task] = None
+        for url in self.backends:
+            backend_healthy.set(1, backend=url)
+
+    def candidates(self, shard_key) -> List[str]:
+        order = self.ring.preference(shard_key)
+        available = [url for url in order if self.healthy[url] and self.backends[url].breaker.allow()]
+        # Все реплики помечены недоступными — пробуем по порядку кольца: проверка могла устареть
+        return available or order
+
+    async def request(self, method: str, path: str, *, shard_key, **kwargs) -> httpx.Response:
+        """
+        Запрос к реплике, владеющей shard_key. Следующая реплика пробуется,
+        если запрос не был отправлен (нет соединения, разомкнут circuit breaker),
+        а идемпотентный — и если реплика ответила 502/503/504: POST мог быть
+        выполнен до ошибки шлюза.
+
+        Returns:
+            httpx.Response последней опрошенной реплики.
+        """
+        idempotent = kwargs.get("idempotent")
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        candidates = self.candidates(shard_key)
+        for i, url in enumerate(candidates):
+            last = i == len(candidates) - 1
+            shard_requests.inc(backend=url)
+            try:
+                response = await self.backends[url].request(method, path, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, UpstreamUnavailable) as e:
+                if last:
+                    raise
+                logger.warning("Реплика %s недоступна (%r), запрос hotel_id=%s передан следующей", url, e, shard_key)
+            else:
+                if not idempotent or response.status_code not in UNAVAILABLE_STATUSES or last:
+                    return response
+                await response.aclose()
+                logger.warning("Реплика %s ответила %s, запрос hotel_id=%s передан следующей",
+                               url, response.status_code, shard_key)
+            shard_failovers.inc()
+
+    async def check_health(self):
+        async def probe(url: str) -> bool:
+            try:
+                response = await self.backends[url].client.get(PREDICTION_HEALTH_PATH, timeout=2)
+                return response.status_code == 200
+            except httpx.HTTPError:
+                return False
+
+        results = await asyncio.gather(*(probe(url) for url in self.backends))
+        for url, ok in zip(self.backends, results):
+            if ok and not self.healthy[url]:
+                logger.info("Реплика %s снова доступна", url)
+            elif not ok and self.healthy[url]:
+                logger.warning("Реплика %s недоступна", url)
+            self.healthy[url] = ok
+            backend_healthy.set(1 if ok else 0, backend=url)
+
+    async def _health_loop(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+
+    def start(self):
+        if len(self.backends) > 1:
+            self._health_task = asyncio.ensure_future(self._health_loop())
+
+    async def aclose(self):
+        if self._health_task:
+            self._health_task.cancel()
+        for backend in self.backends.values():
+            await backend.aclose()
+
+
+# --- Клиенты сервисов (создаются при старте router) ---
+upstreams: Dict[str, Upstream] = {}
+
+
+def get_upstream(name: str):
+    """
+    Зависимость FastAPI, возвращающая клиент сервиса: Depends(get_upstream(PREDICTION)).
+    """
+    def dependency() -> Upstream:
+        return upstreams[name]
+    return dependency
+
+
+# --- Кеш ответов fetch-forecast ---
+forecast_cache: Optional[ForecastCache] = None
+
+
+def get_forecast_cache() -> ForecastCache:
+    return forecast_cache
 
-async def get_http_client() -> httpx.AsyncClient:
-    return client
 
 async def startup_event():
-    global client
-    client = httpx.AsyncClient(timeout=10)
+    global forecast_cache
+    for name, url in UPSTREAM_URLS.items():
+        upstreams[name] = Upstream(name, url)
+    upstreams[PREDICTION] = ShardedUpstream(PREDICTION, PREDICTION_SERVICE_URLS)
+    upstreams[PREDICTION].start()
+    forecast_cache = create_forecast_cache()
+
 
 async def shutdown_event():
-    global client
-    if client:
-        await client.aclose()
+    for upstream in upstreams.values():
+        await upstream.aclose()
+    upstreams.clear()
+    if forecast_cache:
+        await forecast_cache.close()
 
 
 # --- JWT verification ---
-def verify_token(authorization: str = Header(...)) -> Dict:
+# sha256 токена -> (exp, claims). Токен проверяется один раз за время жизни;
+# зависимости асинхронные и выполняются в цикле событий, поэтому блокировка не нужна.
+_token_cache: "OrderedDict[bytes, Tuple[float, Dict]]" = OrderedDict()
+
+token_cache_requests = counter("router_token_cache_total", "Проверки токена по результату обращения к кешу")
+
+
+def _decode_token(token: str) -> Dict:
     """
-    Проверка JWT-токена.
+    Проверка подписи, срока действия и обязательных полей токена.
     """
     try:
-        scheme, token = authorization.split()
-        if scheme.lower() != "bearer":
-            raise HTTPException(status_code=401, detail="Invalid authentication scheme")
-
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Token verification failed")
+
+    if "sub" not in payload or "role" not in payload:
+        raise HTTPException(status_code=401, detail="Invalid token payload")
 
-        if "sub" not in payload or "role" not in payload:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
+    if payload["role"] == "user" and "hotel_id" not in payload:
+        raise HTTPException(status_code=401, detail="Invalid token payload")
 
-        if payload["role"] == "user" and "hotel_id" not in payload:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
+    return payload
 
-        return payload
-    except (JWTError, ValueError):
+
+async def verify_token(authorization: str = Header(...)) -> Dict:
+    """
+    Проверка JWT-токена. Проверенные токены с exp кешируются до истечения срока.
+    """
+    if authorization[:7].lower() != "bearer ":
+        raise HTTPException(status_code=401, detail="Invalid authentication scheme")
+    token = authorization[7:].strip()
+    if not token:
         raise HTTPException(status_code=401, detail="Token verification failed")
+
+    key = hashlib.sha256(token.encode()).digest()
+    entry = _token_cache.get(key)
+    if entry is not None:
+        if time.time() < entry[0]:
+            _token_cache.move_to_end(key)
+            token_cache_requests.inc(result="hit")
+            return dict(entry[1])
+        del _token_cache[key]
+
+    token_cache_requests.inc(result="miss")
+    with span("jwt"):
+        payload = _decode_token(token)
+
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        _token_cache[key] = (float(exp), payload)
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return dict(payload)
+
+
+async def require_admin(token_data: Dict = Depends(verify_token)) -> Dict:
+    """
+    Доступ только для токена администратора.
+    """
+    if token_data.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin token required")
+    return token_data
+
+
+# --- Контроль допуска ---
+def admit(route_class: str):
+    """
+    Зависимость FastAPI: допуск запроса отеля из токена по лимитам класса маршрутов
+    (router.limits). При превышении — 429 или 503 с Retry-After.
+    """
+    async def dependency(token_data: Dict = Depends(verify_token)):
+        key = str(token_data.get("hotel_id") or token_data["sub"])
+        limiter.acquire(route_class, key)
+        try:
+            yield
+        finally:
+            limiter.release(route_class, key)
+    return dependency
+
+
+async def admit_prediction(request: Request, authorization: Optional[str] = Header(None)):
+    """
+    Допуск запроса прогноза. Маршрут доступен и без токена (планировщик):
+    такие запросы считаются по адресу клиента, а не по hotel_id из тела —
+    иначе любой мог бы исчерпать лимиты чужого отеля.
+    """
+    if authorization:
+        token_data = await verify_token(authorization)
+        key = str(token_data.get("hotel_id") or token_data["sub"])
+    else:
+        key = f"anonymous:{request.client.host if request.client else 'unknown'}"
+    limiter.acquire(PREDICT, key)
+    try:
+        yield
+    finally:
+        limiter.release(PREDICT, key)
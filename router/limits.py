@@ -0,0 +1,142 @@
+"""
+Контроль допуска запросов в router.
+
+Для каждого отеля и класса маршрутов (predict, upload, fetch) действуют
+token bucket (rate запросов/с, запас burst) и предел одновременных запросов
+max_in_flight; при исчерпании — 429 с Retry-After. Кроме того, при общем числе
+запросов в обработке не меньше shed_queue_depth новые запросы сбрасываются
+с 503, чтобы не росла задержка уже принятых.
+
+Лимиты задаются переменными окружения и меняются на ходу через /admin/limits.
+"""
+
+import logging
+import math
+import time
+from typing import Dict, Tuple
+
+from fastapi import HTTPException
+
+from router.config import (
+    LIMIT_FETCH_BURST, LIMIT_FETCH_IN_FLIGHT, LIMIT_FETCH_RATE,
+    LIMIT_PREDICT_BURST, LIMIT_PREDICT_IN_FLIGHT, LIMIT_PREDICT_RATE,
+    LIMIT_UPLOAD_BURST, LIMIT_UPLOAD_IN_FLIGHT, LIMIT_UPLOAD_RATE,
+    SHED_QUEUE_DEPTH,
+)
+from router.schemas import LimitsUpdate, RouteLimit
+from shared.metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+PREDICT = "predict"
+UPLOAD = "upload"
+FETCH = "fetch"
+
+# Число отелей, после которого из памяти удаляются состояния без активности
+_PRUNE_THRESHOLD = 10000
+
+admission_requests = counter("router_admission_total", "Решения о допуске запросов по классу маршрутов")
+in_flight_requests = gauge("router_in_flight", "Запросы в обработке по классу маршрутов")
+queue_depth = gauge("router_queue_depth", "Все запросы в обработке с контролем допуска")
+
+
+class _HotelState:
+    __slots__ = ("tokens", "updated_at", "in_flight")
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+        self.in_flight = 0
+
+
+class AdmissionLimiter:
+    def __init__(self, limits: Dict[str, RouteLimit], shed_queue_depth: int):
+        self.limits = limits
+        self.shed_queue_depth = shed_queue_depth
+        self.in_flight = 0
+        self._states: Dict[Tuple[str, str], _HotelState] = {}
+
+    def acquire(self, route_class: str, hotel_key: str):
+        """
+        Допускает запрос или поднимает HTTPException 429/503 с Retry-After.
+        После обработки допущенного запроса вызывается release().
+        """
+        limit = self.limits[route_class]
+        if self.in_flight >= self.shed_queue_depth:
+            admission_requests.inc(route_class=route_class, result="shed")
+            raise HTTPException(status_code=503, detail="Router overloaded", headers={"Retry-After": "1"})
+
+        now = time.monotonic()
+        state = self._states.get((route_class, hotel_key))
+        if state is None:
+            if len(self._states) >= _PRUNE_THRESHOLD:
+                self._prune(now)
+            state = self._states[(route_class, hotel_key)] = _HotelState(tokens=limit.burst, updated_at=now)
+        else:
+            state.tokens = min(limit.burst, state.tokens + (now - state.updated_at) * limit.rate)
+            state.updated_at = now
+
+        if state.in_flight >= limit.max_in_flight:
+            admission_requests.inc(route_class=route_class, result="concurrency_limited")
+            raise HTTPException(
+                status_code=429, detail="Too many concurrent requests", headers={"Retry-After": "1"}
+            )
+        if state.tokens < 1:
+            retry_after = math.ceil((1 - state.tokens) / limit.rate)
+            admission_requests.inc(route_class=route_class, result="rate_limited")
+            raise HTTPException(
+                status_code=429, detail="Rate limit exceeded", headers={"Retry-After": str(retry_after)}
+            )
+
+        state.tokens -= 1
+        state.in_flight += 1
+        self.in_flight += 1
+        admission_requests.inc(route_class=route_class, result="admitted")
+        in_flight_requests.inc(route_class=route_class)
+        queue_depth.set(self.in_flight)
+
+    def release(self, route_class: str, hotel_key: str):
+        state = self._states.get((route_class, hotel_key))
+        if state is not None:
+            state.in_flight -= 1
+        self.in_flight -= 1
+        in_flight_requests.dec(route_class=route_class)
+        queue_depth.set(self.in_flight)
+
+    def _prune(self, now: float):
+        for key, state in list(self._states.items()):
+            limit = self.limits[key[0]]
+            full = state.tokens + (now - state.updated_at) * limit.rate >= limit.burst
+            if state.in_flight == 0 and full:
+                del self._states[key]
+
+    def snapshot(self) -> dict:
+        return {
+            "limits": {name: limit.model_dump() for name, limit in self.limits.items()},
+            "shed_queue_depth": self.shed_queue_depth,
+            "in_flight": self.in_flight,
+        }
+
+    def update(self, changes: LimitsUpdate):
+        """
+        Меняет лимиты на ходу; не указанные поля остаются прежними.
+        Накопленные токены сверх нового burst срезаются при следующем запросе.
+        """
+        unknown = set(changes.limits) - set(self.limits)
+        if unknown:
+            raise ValueError(f"Неизвестные классы маршрутов: {', '.join(sorted(unknown))}")
+        for name, values in changes.limits.items():
+            self.limits[name] = self.limits[name].model_copy(update=values.model_dump(exclude_none=True))
+        if changes.shed_queue_depth is not None:
+            self.shed_queue_depth = changes.shed_queue_depth
+        logger.info("Лимиты router обновлены: %s", self.snapshot())
+
+
+limiter = AdmissionLimiter(
+    {
+        PREDICT: RouteLimit(rate=LIMIT_PREDICT_RATE, burst=LIMIT_PREDICT_BURST, max_in_flight=LIMIT_PREDICT_IN_FLIGHT),
+        UPLOAD: RouteLimit(rate=LIMIT_UPLOAD_RATE, burst=LIMIT_UPLOAD_BURST, max_in_flight=LIMIT_UPLOAD_IN_FLIGHT),
+        FETCH: RouteLimit(rate=LIMIT_FETCH_RATE, burst=LIMIT_FETCH_BURST, max_in_flight=LIMIT_FETCH_IN_FLIGHT),
+    },
+    SHED_QUEUE_DEPTH,
+)
@@ -1,13 +1,31 @@
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import math
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
-from router.routers import auth_router, data_interface_router, prediction_router
+from router.routers import admin_router, auth_router, data_interface_router, prediction_router
+from router.dependencies import UpstreamUnavailable, startup_event, shutdown_event
+from shared.metrics import render_prometheus
+from shared.responses import FastJSONResponse, setup_responses
+from shared.tracing import setup_tracing
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Router Service", version="1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Пулы соединений к сервисам
+    await startup_event()
+    yield
+    await shutdown_event()
+
+
+app = FastAPI(title="Router Service", version="1.0", lifespan=lifespan, default_response_class=FastJSONResponse)
+setup_responses(app)
+setup_tracing(app, "router")
 
 # CORS
 app.add_middleware(
@@ -22,8 +40,24 @@ app.add_middleware(
 app.include_router(auth_router.router, prefix="/auth", tags=["Auth"])
 app.include_router(data_interface_router.router, prefix="/data", tags=["Data Interface"])
 app.include_router(prediction_router.router, prefix="/prediction", tags=["Prediction"])
+app.include_router(admin_router.router, prefix="/admin", tags=["Admin"])
+
+
+@app.exception_handler(UpstreamUnavailable)
+async def upstream_unavailable_handler(request: Request, exc: UpstreamUnavailable):
+    # Сервис недоступен: отвечаем сразу, не дожидаясь таймаута
+    return FastJSONResponse(
+        status_code=503,
+        content={"detail": f"Service {exc.name} is temporarily unavailable"},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
 
 
 @app.get("/")
 def root():
     return {"message": "Router Service is running"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return render_prometheus()
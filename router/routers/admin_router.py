@@ -0,0 +1,31 @@
+import logging
+from typing import Dict
+from fastapi import APIRouter, Depends, HTTPException
+
+from router.dependencies import require_admin
+from router.limits import limiter
+from router.schemas import LimitsUpdate
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/limits")
+async def get_limits(token_data: Dict = Depends(require_admin)):
+    """
+    Текущие лимиты допуска и число запросов в обработке.
+    """
+    return limiter.snapshot()
+
+
+@router.put("/limits")
+async def update_limits(changes: LimitsUpdate, token_data: Dict = Depends(require_admin)):
+    """
+    Изменение лимитов допуска без перезапуска router (только администратор).
+    Действует до перезапуска; значения по умолчанию задаются переменными окружения.
+    """
+    try:
+        limiter.update(changes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return limiter.snapshot()
@@ -1,10 +1,11 @@
 import logging
 import httpx
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header
 
-from router.config import AUTH_SERVICE_URL
+from router.config import AUTH_TIMEOUT
 from router.schemas import AuthRequest
-from router.dependencies import get_http_client
+from router.dependencies import AUTH, Upstream, get_upstream
+from shared.responses import passthrough_response
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -13,7 +14,7 @@ router = APIRouter()
 @router.post("/login")
 async def authorize_user(
     auth_req: AuthRequest,
-    client: httpx.AsyncClient = Depends(get_http_client),
+    auth: Upstream = Depends(get_upstream(AUTH)),
 ):
     """
     Прокси для авторизации пользователя по API-ключу.
@@ -22,10 +23,36 @@ async def authorize_user(
     headers = {"X-API-Key": auth_req.api_key}
 
     try:
-        response = await client.post(f"{AUTH_SERVICE_URL}/token/user", headers=headers)
+        # Выдача токена не меняет состояние: запрос можно повторить
+        response = await auth.request(
+            "POST", "/token/user", headers=headers, timeout=AUTH_TIMEOUT, idempotent=True
+        )
         response.raise_for_status()
         logger.info("Успешная авторизация")
-        return response.json()
+        return passthrough_response(response.content, response.status_code, response.headers)
+    except httpx.HTTPStatusError as e:
+        logger.error("auth_service вернул ошибку: %s", e)
+        raise HTTPException(status_code=e.response.status_code, detail="Authorization failed")
+    except httpx.RequestError as e:
+        logger.error("Ошибка соединения с сервисом авторизации: %s", e)
+        raise HTTPException(status_code=502, detail="Auth service connection error")
+
+
+@router.post("/admin-login")
+async def authorize_admin(
+    x_admin_key: str = Header(...),
+    auth: Upstream = Depends(get_upstream(AUTH)),
+):
+    """
+    Прокси для получения токена администратора (/token/admin в auth_service).
+    """
+    try:
+        response = await auth.request(
+            "POST", "/token/admin", headers={"X-Admin-Key": x_admin_key}, timeout=AUTH_TIMEOUT, idempotent=True
+        )
+        response.raise_for_status()
+        logger.info("Выдан токен администратора")
+        return passthrough_response(response.content, response.status_code, response.headers)
     except httpx.HTTPStatusError as e:
         logger.error("auth_service вернул ошибку: %s", e)
         raise HTTPException(status_code=e.response.status_code, detail="Authorization failed")
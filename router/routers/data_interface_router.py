@@ -1,79 +1,214 @@
 import logging
 import httpx
-from typing import Dict
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from typing import Dict, Optional
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
-from router.config import DATA_INTERFACE_SERVICE_URL
-from router.schemas import ForecastRequest, ForecastResponse
-from router.dependencies import verify_token, get_http_client
+from router.config import EXPORT_TIMEOUT, FORECAST_TIMEOUT, UPLOAD_TIMEOUT
+from router.schemas import ForecastExportRequest, ForecastRequest, ForecastResponse
+from router.cache import ForecastCache
+from router.dependencies import (
+    DATA_INTERFACE, Upstream, admit, get_forecast_cache, get_upstream, require_admin, verify_token,
+)
+from router.limits import FETCH, UPLOAD
+from shared.responses import passthrough_response
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-
-@router.post("/upload-bookings")
+@router.post("/upload-bookings", dependencies=[Depends(admit(UPLOAD))])
 async def upload_bookings(
-    file: UploadFile = File(...),
+    request: Request,
     token_data: Dict = Depends(verify_token),
-    client: httpx.AsyncClient = Depends(get_http_client),
+    data_interface: Upstream = Depends(get_upstream(DATA_INTERFACE)),
 ):
     """
     Проксирование загрузки бронирований в data_interface_service.
+    Тело multipart-запроса передаётся потоком, без буферизации файла в памяти.
+    С ?background=true файл обрабатывается в фоне: ответ 202 с job_id,
+    прогресс — GET /data/upload-jobs/{job_id}.
     """
     hotel_id = token_data.get("hotel_id")
     if not hotel_id:
         raise HTTPException(status_code=403, detail="hotel_id required for this action")
 
-    # Асинхронно читаем файл (иначе FastAPI может зависнуть на больших файлах)
-    file_content = await file.read()
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("multipart/form-data"):
+        raise HTTPException(status_code=400, detail="multipart/form-data with a 'file' field expected")
 
-    files = {"file": (file.filename, file_content, file.content_type)}
-    headers = {"x-hotel-id": str(hotel_id)}
+    headers = {"x-hotel-id": str(hotel_id), "content-type": content_type}
 
     try:
-        response = await client.post(
-            f"{DATA_INTERFACE_SERVICE_URL}/upload/upload",
-            files=files,
+        # Тело передаётся потоком и не может быть отправлено повторно: без повторов
+        response = await data_interface.request(
+            "POST",
+            "/upload/upload",
+            content=request.stream(),
             headers=headers,
+            params=request.query_params,
+            timeout=UPLOAD_TIMEOUT,
         )
     except httpx.RequestError as e:
         logger.error("Ошибка соединения с data_interface_service: %s", e)
         raise HTTPException(status_code=502, detail="Upload service connection error")
 
+    # Успешный ответ (200, 202 для фоновой загрузки) передаётся клиенту без разбора.
+    # Кеш fetch-forecast не сбрасывается: закешированные ответы проверяются по ETag
+    if response.status_code in (200, 202):
+        return passthrough_response(response.content, response.status_code, response.headers)
+
     try:
         result = response.json()
     except Exception as e:
         logger.error("Ошибка при парсинге ответа data_interface_service: %s", e)
         raise HTTPException(status_code=500, detail="Upload service response parsing error")
 
+    detail = result.get("detail") or result.get("message", "Unknown upload error")
+    raise HTTPException(status_code=response.status_code, detail=f"Upload service error: {detail}")
+
+
+@router.get("/upload-jobs/{job_id}")
+async def upload_job_status(
+    job_id: str,
+    token_data: Dict = Depends(verify_token),
+    data_interface: Upstream = Depends(get_upstream(DATA_INTERFACE)),
+):
+    """
+    Прогресс фоновой загрузки бронирований.
+    """
+    hotel_id = token_data.get("hotel_id")
+    if not hotel_id:
+        raise HTTPException(status_code=403, detail="hotel_id required for this action")
+
+    try:
+        response = await data_interface.request(
+            "GET",
+            f"/upload/jobs/{job_id}",
+            headers={"x-hotel-id": str(hotel_id)},
+            timeout=FORECAST_TIMEOUT,
+        )
+    except httpx.RequestError as e:
+        logger.error("Ошибка соединения с data_interface_service: %s", e)
+        raise HTTPException(status_code=502, detail="Upload service connection error")
+
     if response.status_code != 200:
-        detail = result.get("detail", "Unknown upload error")
+        detail = response.json().get("detail", "Unknown upload job error")
         raise HTTPException(status_code=response.status_code, detail=f"Upload service error: {detail}")
 
-    return result
+    return passthrough_response(response.content, response.status_code, response.headers)
 
 
-@router.post("/fetch-forecast", response_model=ForecastResponse)
+@router.post(
+    "/fetch-forecast",
+    response_model=ForecastResponse,
+    responses={304: {"description": "Not Modified"}},
+    dependencies=[Depends(admit(FETCH))],
+)
 async def fetch_forecast(
     req: ForecastRequest,
     token_data: Dict = Depends(verify_token),
-    client: httpx.AsyncClient = Depends(get_http_client),
+    data_interface: Upstream = Depends(get_upstream(DATA_INTERFACE)),
+    cache: ForecastCache = Depends(get_forecast_cache),
+    if_none_match: Optional[str] = Header(None),
 ):
     """
     Получение прогноза из data_interface_service.
+    ETag и If-None-Match передаются как есть: при неизменных данных отеля — 304 без тела.
+    Закешированный ответ отдаётся только после проверки его ETag в data_interface_service
+    (одно чтение водяного знака отеля): данные отеля меняются и в обход router —
+    фоновыми загрузками, import_bookings, insert_prediction.
     """
     hotel_id = token_data.get("hotel_id")
     if not hotel_id:
         raise HTTPException(status_code=403, detail="hotel_id required for this action")
 
+    key, cached = await cache.get(hotel_id, req.target_date, req.horizon, req.has_deposit)
+
+    headers = {"x-hotel-id": str(hotel_id)}
+    # ETag клиента и закешированного ответа: 304 означает, что совпал один из них
+    etags = list(dict.fromkeys(etag for etag in (if_none_match, cached and cached[0].get("etag")) if etag))
+    if etags:
+        headers["if-none-match"] = ", ".join(etags)
+
     try:
-        response = await client.post(
-            f"{DATA_INTERFACE_SERVICE_URL}/forecast/fetch",
+        response = await data_interface.request(
+            "POST",
+            "/forecast/fetch",
             json=req.model_dump(),
-            headers={"x-hotel-id": str(hotel_id)},
+            headers=headers,
+            timeout=FORECAST_TIMEOUT,
+            idempotent=True,
         )
+        if response.status_code == 304:
+            if cached and not _etag_matches(if_none_match, response.headers.get("etag")):
+                cached_headers, body = cached
+                return passthrough_response(body, 200, cached_headers)
+            return Response(status_code=304, headers=_cache_headers(response))
         response.raise_for_status()
-        return response.json()
+        result = passthrough_response(response.content, response.status_code, response.headers)
     except httpx.RequestError as e:
         logger.error("Ошибка при запросе прогноза: %s", e)
         raise HTTPException(status_code=500, detail="Data interface forecast error")
+
+    # Без ETag ответ нельзя проверить, поэтому он не кешируется
+    if key and "etag" in response.headers:
+        await cache.set(key, _cache_headers(response), response.content)
+    return result
+
+
+@router.post("/export-forecasts")
+async def export_forecasts(
+    req: ForecastExportRequest,
+    token_data: Dict = Depends(require_admin),
+    data_interface: Upstream = Depends(get_upstream(DATA_INTERFACE)),
+    accept_encoding: str = Header(""),
+):
+    """
+    Выгрузка истории и прогнозов по нескольким отелям за период (только администратор).
+    Ответ data_interface_service передаётся потоком без распаковки и буферизации.
+    """
+    try:
+        response = await data_interface.request(
+            "POST",
+            "/export/forecasts",
+            json=req.model_dump(mode="json"),
+            headers={"accept-encoding": "gzip" if "gzip" in accept_encoding.lower() else "identity"},
+            timeout=EXPORT_TIMEOUT,
+            idempotent=True,
+            stream=True,
+        )
+    except httpx.RequestError as e:
+        logger.error("Ошибка соединения с data_interface_service: %s", e)
+        raise HTTPException(status_code=502, detail="Export service connection error")
+
+    if response.status_code != 200:
+        await response.aread()
+        await response.aclose()
+        try:
+            detail = response.json().get("detail", "Unknown export error")
+        except ValueError:
+            detail = "Unknown export error"
+        raise HTTPException(status_code=response.status_code, detail=f"Export service error: {detail}")
+
+    headers = {
+        k: response.headers[k]
+        for k in ("content-encoding", "content-disposition")
+        if k in response.headers
+    }
+    return StreamingResponse(
+        response.aiter_raw(),
+        media_type=response.headers.get("content-type"),
+        headers=headers,
+        background=BackgroundTask(response.aclose),
+    )
+
+
+def _cache_headers(response: httpx.Response) -> Dict[str, str]:
+    return {k: response.headers[k] for k in ("etag", "cache-control", "content-type") if k in response.headers}
+
+
+def _etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    if not if_none_match or not etag:
+        return False
+    return if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]
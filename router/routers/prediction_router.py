@@ -1,27 +1,50 @@
 import logging
-import requests
-from fastapi import APIRouter, HTTPException
-from router.config import PREDICTION_SERVICE_URL
+import httpx
+from fastapi import APIRouter, Depends, HTTPException
+from router.config import PREDICTION_TIMEOUT
 from router.schemas import PredictionRequest, PredictionResponse
+from router.cache import ForecastCache
+from router.dependencies import PREDICTION, ShardedUpstream, admit_prediction, get_forecast_cache, get_upstream
+from shared.responses import passthrough_response
+from shared.singleflight import AsyncSingleFlight
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Одинаковые одновременные запросы прогноза уходят в prediction_service один раз
+_predictions = AsyncSingleFlight("router_run_prediction")
 
-@router.post("/run-prediction", response_model=PredictionResponse)
-def run_prediction(req: PredictionRequest):
+
+@router.post("/run-prediction", response_model=PredictionResponse, dependencies=[Depends(admit_prediction)])
+async def run_prediction(
+    req: PredictionRequest,
+    prediction: ShardedUpstream = Depends(get_upstream(PREDICTION)),
+    cache: ForecastCache = Depends(get_forecast_cache),
+):
     """
     Прокси-запрос в prediction_service.
+    Повторяется только неотправленный запрос: prediction_service сохраняет прогноз в БД.
+    Запросы отеля идут на закреплённую за ним реплику (router.sharding).
+    Одновременные запросы с теми же (hotel_id, target_date, has_deposit) получают один ответ.
     """
-    try:
+    async def call() -> httpx.Response:
         logger.info("Вызов run_prediction: %s", req.model_dump())
-        response = requests.post(
-            f"{PREDICTION_SERVICE_URL}/run-predict",
-            json=req.model_dump(),
-            timeout=10,
+        response = await prediction.request(
+            "POST",
+            "/run-predict",
+            shard_key=req.hotel_id,
+            json=req.model_dump(mode="json"),
+            timeout=PREDICTION_TIMEOUT,
         )
         response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        logger.error("Ошибка при обращении к prediction_service: %s", e)
+        # Новый прогноз сохранён: закешированные ответы fetch-forecast отеля устарели
+        await cache.invalidate(req.hotel_id)
+        return response
+
+    try:
+        response = await _predictions.do((req.hotel_id, req.target_date, req.has_deposit), call)
+    except httpx.HTTPError as e:
+        logger.error("Ошибка при обращении к prediction_service: %r", e)
         raise HTTPException(status_code=500, detail="Prediction service error")
+
+    return passthrough_response(response.content, response.status_code, response.headers)
@@ -1,6 +1,6 @@
 from datetime import date
-from typing import List
-from pydantic import BaseModel
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
 
 
 # === AUTH ===
@@ -46,7 +46,47 @@ class ForecastDay(BaseModel):
     cancellations: float
 
 
+class HistoryDay(BaseModel):
+    """День истории: фактические бронирования и отмены"""
+    date: str
+    bookings: int
+    cancellations: int
+
+
 class ForecastResponse(BaseModel):
     """Ответ с сохранённым прогнозом из БД"""
-    hotel_id: int
+    status: str
+    message: Optional[str] = None
+    history_summary: List[HistoryDay]
     forecast: List[ForecastDay]
+
+
+# === EXPORT (выгрузка истории и прогнозов по нескольким отелям) ===
+class ForecastExportRequest(BaseModel):
+    """Запрос выгрузки: отели, период и признаки депозита"""
+    hotel_ids: List[int] = Field(..., min_length=1)
+    date_from: date
+    date_to: date
+    has_deposit: List[bool] = Field(default=[False, True], min_length=1)
+    format: Literal["ndjson", "csv"] = "ndjson"
+
+
+# === LIMITS (контроль допуска в router) ===
+class RouteLimit(BaseModel):
+    """Лимиты класса маршрутов для одного отеля"""
+    rate: float = Field(..., gt=0)          # запросов в секунду
+    burst: float = Field(..., ge=1)         # запас токенов
+    max_in_flight: int = Field(..., ge=1)   # одновременных запросов
+
+
+class RouteLimitUpdate(BaseModel):
+    """Изменение лимитов класса маршрутов: не указанные поля не меняются"""
+    rate: Optional[float] = Field(None, gt=0)
+    burst: Optional[float] = Field(None, ge=1)
+    max_in_flight: Optional[int] = Field(None, ge=1)
+
+
+class LimitsUpdate(BaseModel):
+    """Изменение лимитов router на ходу"""
+    limits: Dict[str, RouteLimitUpdate] = {}
+    shed_queue_depth: Optional[int] = Field(None, ge=1)
@@ -0,0 +1,44 @@
+"""
+Консистентное хеширование для закрепления отелей за репликами prediction_service.
+
+Каждая реплика держит в памяти модели только своей части отелей. При добавлении
+или удалении реплики переезжает лишь около 1/N отелей; отели недоступной
+реплики временно обслуживает следующая на кольце (router.dependencies.ShardedUpstream).
+"""
+
+import bisect
+import hashlib
+from typing import List
+
+from router.config import HASH_RING_VNODES
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Кольцо консистентного хеширования с виртуальными узлами.
+    """
+    def __init__(self, nodes: List[str], vnodes: int = HASH_RING_VNODES):
+        self.nodes = list(dict.fromkeys(nodes))
+        ring = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._points = [point for point, _ in ring]
+        self._owners = [node for _, node in ring]
+
+    def preference(self, key) -> List[str]:
+        """
+        Узлы в порядке обхода кольца от точки ключа: первый — владелец, дальше — запасные.
+        """
+        result: List[str] = []
+        if not self._points:
+            return result
+        start = bisect.bisect(self._points, _hash(str(key)))
+        for i in range(len(self._owners)):
+            node = self._owners[(start + i) % len(self._owners)]
+            if node not in result:
+                result.append(node)
+                if len(result) == len(self.nodes):
+                    break
+        return result
@@ -4,6 +4,8 @@ from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
 from scheduler_service.jobs import trigger_forecast
+from shared.responses import FastJSONResponse, setup_responses
+from shared.tracing import setup_tracing
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,7 +17,9 @@ async def lifespan(app: FastAPI):
     yield
     logger.info("[%s] Lifespan: завершение работы", datetime.now())
 
-app = FastAPI(title="Scheduler Service API", lifespan=lifespan)
+app = FastAPI(title="Scheduler Service API", lifespan=lifespan, default_response_class=FastJSONResponse)
+setup_responses(app)
+setup_tracing(app, "scheduler")
 
 @app.get("/")
 def root():
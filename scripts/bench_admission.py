@@ -0,0 +1,165 @@
+"""
+Нагрузочный тест контроля допуска router: один отель засыпает
+/prediction/run-prediction параллельными запросами, другой делает обычные.
+
+Заглушка prediction_service обрабатывает не больше CAPACITY запросов
+одновременно (как сервис, упирающийся в процессор). Сравниваются задержки
+второго отеля без лимитов (сняты через PUT /admin/limits) и с лимитами
+по умолчанию; затем проверяется сброс нагрузки по shed_queue_depth.
+
+Запуск:
+    python -m scripts.bench_admission --spam 200 --delay 0.5
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+from jose import jwt
+
+from router.config import ALGORITHM, SECRET_KEY
+from scripts.check_upload_memory import _free_port, _start
+
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+CAPACITY = 4
+UPSTREAM_DELAY = float(os.getenv("BENCH_UPSTREAM_DELAY", 0.5))
+
+# --- Заглушка prediction_service с ограниченной пропускной способностью ---
+fake_prediction = FastAPI()
+_capacity = None
+
+
+@fake_prediction.get("/")
+def fake_root():
+    return {"message": "ok"}
+
+
+@fake_prediction.post("/run-predict")
+async def fake_run_predict(body: dict):
+    global _capacity
+    _capacity = _capacity or asyncio.Semaphore(CAPACITY)
+    async with _capacity:
+        await asyncio.sleep(UPSTREAM_DELAY)
+    return {"hotel_id": body["hotel_id"], "target_date": body["target_date"], "forecast": []}
+
+
+def _percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def hotel_headers(hotel_id: int) -> dict:
+    # Без токена лимиты считаются по адресу клиента: оба отеля делили бы один лимит
+    claims = {"sub": f"bench-hotel-{hotel_id}", "role": "user", "hotel_id": hotel_id}
+    return {"Authorization": "Bearer " + jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)}
+
+
+async def scenario(url: str, spam: int, regular: int) -> dict:
+    limits = httpx.Limits(max_connections=spam + regular)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        async def call(hotel_id: int, day: int):
+            body = {"hotel_id": hotel_id, "target_date": f"2017-08-{day:02d}", "has_deposit": False}
+            start = time.perf_counter()
+            response = await client.post(url, json=body, headers=hotel_headers(hotel_id))
+            return response.status_code, time.perf_counter() - start, response.headers.get("retry-after")
+
+        async def regular_hotel():
+            # Обычный отель укладывается в лимит predict по умолчанию (1 запрос/с)
+            results = []
+            for i in range(regular):
+                results.append(await call(2, 1 + i % 28))
+                await asyncio.sleep(1.0)
+            return results
+
+        # Разные даты: запросы не объединяются single-flight и действительно нагружают сервис
+        spam_task = asyncio.gather(*(call(1, 1 + i % 28) for i in range(spam)))
+        spam_results, regular_results = await asyncio.gather(spam_task, regular_hotel())
+
+    def summary(results):
+        statuses = {}
+        for status, _, _ in results:
+            statuses[status] = statuses.get(status, 0) + 1
+        ok = [latency for status, latency, _ in results if status == 200] or [0.0]
+        retry_after = sorted({r for status, _, r in results if status in (429, 503) and r})
+        return {"statuses": statuses, "p50": _percentile(ok, 0.5), "p99": _percentile(ok, 0.99), "retry_after": retry_after}
+
+    return {"spam": summary(spam_results), "regular": summary(regular_results)}
+
+
+def report(label: str, result: dict):
+    for who in ("spam", "regular"):
+        r = result[who]
+        logger.info(
+            f"{label:<10} {'отель 1' if who == 'spam' else 'отель 2'}: ответы={r['statuses']}  "
+            f"p50={r['p50']:.2f} c  p99={r['p99']:.2f} c  Retry-After={r['retry_after'][:3]}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spam", type=int, default=200)
+    parser.add_argument("--regular", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=UPSTREAM_DELAY)
+    args = parser.parse_args()
+
+    upstream_port, router_port = _free_port(), _free_port()
+    env = dict(
+        os.environ,
+        BENCH_UPSTREAM_DELAY=str(args.delay),
+        PREDICTION_SERVICE_URL=f"http://127.0.0.1:{upstream_port}",
+        PREDICTION_TIMEOUT="120",
+    )
+    base = f"http://127.0.0.1:{router_port}"
+    admin = {"Authorization": "Bearer " + jwt.encode({"sub": "admin", "role": "admin"}, SECRET_KEY, algorithm=ALGORITHM)}
+    ok = True
+    procs = []
+    try:
+        procs.append(_start("scripts.bench_admission:fake_prediction", upstream_port, env))
+        procs.append(_start("router.main:app", router_port, env))
+        defaults = httpx.get(f"{base}/admin/limits", headers=admin).json()
+        url = f"{base}/prediction/run-prediction"
+
+        unlimited = {"limits": {"predict": {"rate": 1e6, "burst": 1e6, "max_in_flight": 100000}}}
+        httpx.put(f"{base}/admin/limits", json=unlimited, headers=admin).raise_for_status()
+        report("без лимитов", asyncio.run(scenario(url, args.spam, args.regular)))
+
+        httpx.put(f"{base}/admin/limits", json={"limits": defaults["limits"]}, headers=admin).raise_for_status()
+        time.sleep(5)  # восполнение запаса токенов
+        limited = asyncio.run(scenario(url, args.spam, args.regular))
+        report("с лимитами", limited)
+        if limited["regular"]["statuses"].get(200) != args.regular or 429 not in limited["spam"]["statuses"]:
+            logger.error("FAIL  лимиты не защитили второй отель")
+            ok = False
+
+        shed = {"limits": unlimited["limits"], "shed_queue_depth": 20}
+        httpx.put(f"{base}/admin/limits", json=shed, headers=admin).raise_for_status()
+        shed_result = asyncio.run(scenario(url, args.spam, args.regular))
+        report("сброс", shed_result)
+        if 503 not in shed_result["spam"]["statuses"]:
+            logger.error("FAIL  нагрузка не сбрасывалась")
+            ok = False
+
+        metrics = httpx.get(f"{base}/metrics").text
+        for line in metrics.splitlines():
+            if line.startswith("router_admission_total"):
+                logger.info(line)
+    except RuntimeError as e:
+        logger.error(f"FAIL  {e}")
+        ok = False
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Нагрузочный тест выдачи токенов auth_service по API-ключу (POST /token/user).
+
+Создаёт отели с известными ключами и сравнивает пропускную способность
+без кеша ключей (API_KEY_CACHE_TTL=0) и с кешем. В установившемся режиме
+с кешем запросы не должны обращаться к БД: это проверяется по заголовку
+Server-Timing (этап sql). Затем проверяется, что смена ключа через
+/admin/hotels/{id}/api-key сразу отключает старый ключ.
+
+Запуск:
+    python -m scripts.bench_auth_tokens --hotels 50 --requests 3000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from router.config import ALGORITHM, SECRET_KEY
+from scripts.check_upload_memory import _free_port, _start
+from shared.api_keys import generate_api_key, hash_api_key
+from shared.db import get_session_sync
+from shared.models import City, Hotel
+
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+ADMIN_KEY = "bench-admin-key"
+# Каждый десятый запрос — с неверным ключом из небольшого набора
+INVALID_SHARE = 10
+INVALID_KEYS = [f"invalid-{i}" for i in range(20)]
+
+
+def seed_hotels(count: int) -> Dict[int, str]:
+    db = get_session_sync()
+    try:
+        city = City(name="Bench Auth City", latitude=0, longitude=0)
+        keys = [generate_api_key() for _ in range(count)]
+        hotels = [
+            Hotel(name=f"Bench Auth Hotel {i}", city=city, is_city_hotel=True, api_key_hash=hash_api_key(key))
+            for i, key in enumerate(keys)
+        ]
+        db.add_all(hotels)
+        db.commit()
+        return {hotel.id: key for hotel, key in zip(hotels, keys)}
+    finally:
+        db.close()
+
+
+def drop_hotels(hotel_ids: List[int]):
+    db = get_session_sync()
+    try:
+        city_ids = {city_id for (city_id,) in db.query(Hotel.city_id).filter(Hotel.id.in_(hotel_ids))}
+        db.query(Hotel).filter(Hotel.id.in_(hotel_ids)).delete(synchronize_session=False)
+        db.query(City).filter(City.id.in_(city_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _sql_statements(server_timing: str) -> int:
+    for entry in server_timing.split(","):
+        name, _, params = entry.strip().partition(";")
+        if name == "sql":
+            _, _, desc = params.partition('desc="')
+            return int(desc.rstrip('"')) if desc else 1
+    return 0
+
+
+async def fire(url: str, keys: List[str], count: int, concurrency: int) -> dict:
+    latencies, statuses, sql = [], {}, 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i: int):
+            nonlocal sql
+            key = INVALID_KEYS[i % len(INVALID_KEYS)] if i % INVALID_SHARE == 0 else keys[i % len(keys)]
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(url, headers={"X-API-Key": key})
+                latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            sql += _sql_statements(response.headers.get("server-timing", ""))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(count)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": count / elapsed,
+        "statuses": statuses,
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1000,
+        "sql_per_request": sql / count,
+    }
+
+
+def run(label: str, env: Dict[str, str], keys: Dict[int, str], count: int, concurrency: int) -> dict:
+    port = _free_port()
+    proc = _start("auth_service.main:app", port, env)
+    try:
+        url = f"http://127.0.0.1:{port}/token/user"
+        # Прогрев: все ключи попадают в кеш
+        asyncio.run(fire(url, list(keys.values()), len(keys) * INVALID_SHARE, concurrency))
+        result = asyncio.run(fire(url, list(keys.values()), count, concurrency))
+        logger.info(
+            f"{label:<10} {result['rps']:8.0f} токенов/с  p50={result['p50']:.1f} мс  p99={result['p99']:.1f} мс  "
+            f"SQL на запрос={result['sql_per_request']:.2f}  ответы={result['statuses']}"
+        )
+        if label == "с кешем":
+            result["rotation_ok"] = check_rotation(f"http://127.0.0.1:{port}", keys)
+        return result
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def check_rotation(base: str, keys: Dict[int, str]) -> bool:
+    hotel_id, old_key = next(iter(keys.items()))
+    admin = {"X-Admin-Key": ADMIN_KEY}
+    response = httpx.post(f"{base}/admin/hotels/{hotel_id}/api-key", headers=admin)
+    response.raise_for_status()
+    new_key = response.json()["api_key"]
+    old = httpx.post(f"{base}/token/user", headers={"X-API-Key": old_key}).status_code
+    new = httpx.post(f"{base}/token/user", headers={"X-API-Key": new_key}).status_code
+    keys[hotel_id] = new_key
+    logger.info(f"смена ключа hotel_id={hotel_id}: старый ключ -> {old}, новый -> {new}")
+    return old == 401 and new == 200
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    base_env = dict(
+        os.environ,
+        ADMIN_KEY=ADMIN_KEY,
+        SCHEDULER_KEY=os.getenv("SCHEDULER_KEY", "bench-scheduler-key"),
+        SECRET_KEY=SECRET_KEY,
+        ALGORITHM=ALGORITHM,
+    )
+    keys = seed_hotels(args.hotels)
+    ok = True
+    try:
+        uncached = run(
+            "без кеша", dict(base_env, API_KEY_CACHE_TTL="0", API_KEY_NEGATIVE_TTL="0"),
+            keys, args.requests, args.concurrency,
+        )
+        cached = run("с кешем", base_env, keys, args.requests, args.concurrency)
+        logger.info(f"ускорение: x{cached['rps'] / uncached['rps']:.1f}")
+        if cached["sql_per_request"] > 0:
+            logger.error("FAIL  выдача токенов с кешем обращается к БД")
+            ok = False
+        if not cached["rotation_ok"]:
+            logger.error("FAIL  после смены ключа старый ключ действует или новый не принят")
+            ok = False
+    except RuntimeError as e:
+        logger.error(f"FAIL  {e}")
+        ok = False
+    finally:
+        drop_hotels(list(keys))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Бенчмарк памяти и времени предобработки для DataFrame бронирований:
+прежние типы (object/Decimal/int64) против компактной схемы shared.dtypes.
+
+Запуск (нужны энкодеры модели отеля):
+    PYTHONPATH=.:prediction_service python -m scripts.bench_booking_dtypes --rows 500000
+"""
+
+import argparse
+import logging
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from shared.dtypes import BOOKING_DTYPES, WEATHER_DTYPES, apply_dtypes
+from prediction_service.preprocessing.preprocessor import ENCODING_MAP, load_encoder, preprocess_data
+
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("prediction_service").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def make_legacy_frame(rows: int, hotel_id: int) -> pd.DataFrame:
+    """
+    Синтетический DataFrame в том виде, в каком его раньше отдавал load_bookings.
+    """
+    rng = np.random.default_rng(42)
+    start = date(2015, 7, 1)
+    arrival = [start + timedelta(days=int(d)) for d in rng.integers(0, 790, rows)]
+
+    df = pd.DataFrame({
+        "arrival_date": pd.to_datetime(arrival),
+        "lead_time": rng.integers(0, 400, rows),
+        "adr": [Decimal(f"{v:.2f}") for v in rng.uniform(20, 300, rows)],
+        "total_guests": rng.integers(1, 5, rows),
+        "total_nights": rng.integers(1, 14, rows),
+        "booking_changes": rng.integers(0, 3, rows),
+        "has_deposit": rng.random(rows) < 0.2,
+        "is_cancellation": rng.random(rows) < 0.35,
+        "day_of_week": [d.weekday() for d in arrival],
+        "temp_avg": [Decimal(f"{v:.1f}") for v in rng.uniform(-5, 35, rows)],
+        "is_holiday": rng.integers(0, 2, rows),
+        "is_city_hotel": 1,
+    })
+    for enc_col, orig_col in ENCODING_MAP.items():
+        classes = load_encoder(enc_col, hotel_id).classes_
+        df[orig_col] = rng.choice(classes, rows).astype(object)
+    return df
+
+
+def measure(label: str, df: pd.DataFrame, hotel_id: int):
+    memory = df.memory_usage(deep=True).sum() / 2**20
+    start = time.perf_counter()
+    preprocess_data(df.copy(), hotel_id)
+    elapsed = time.perf_counter() - start
+    logger.info(f"{label:<8} память DataFrame={memory:8.1f} МБ  preprocess_data={elapsed:6.2f} c")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--hotel-id", type=int, default=1)
+    args = parser.parse_args()
+
+    legacy = make_legacy_frame(args.rows, args.hotel_id)
+    compact = apply_dtypes(apply_dtypes(legacy.copy(), BOOKING_DTYPES), WEATHER_DTYPES)
+
+    measure("legacy", legacy, args.hotel_id)
+    measure("compact", compact, args.hotel_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Бенчмарк записи бронирований: ORM add_all (прежний путь) против shared.bulk_writer
+(COPY + INSERT ... SELECT на PostgreSQL, executemany на остальных СУБД).
+Каждый замер выполняется в отдельной транзакции и откатывается.
+
+Запуск (нужен отель с указанным id):
+    python -m scripts.bench_booking_writer --rows 200000 --hotel-id 1
+"""
+
+import argparse
+import logging
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from shared.bulk_writer import BOOKING_WRITE_COLUMNS, _executemany_bookings, write_bookings
+from shared.db import SessionLocal, engine
+from shared.models import Booking
+
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("shared").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def make_batch(rows: int, hotel_id: int) -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    start = date(2015, 7, 1)
+    arrival = pd.Series([start + timedelta(days=int(d)) for d in rng.integers(0, 790, rows)])
+    return pd.DataFrame({
+        "hotel_id": hotel_id,
+        "booking_ref": [f"B{i:09d}" for i in range(rows)],
+        "arrival_date": arrival,
+        "lead_time": rng.integers(0, 400, rows),
+        "adr": rng.uniform(20, 300, rows).round(2),
+        "total_guests": rng.integers(1, 5, rows),
+        "total_nights": rng.integers(1, 14, rows),
+        "booking_changes": rng.integers(0, 3, rows),
+        "has_deposit": rng.random(rows) < 0.2,
+        "is_cancellation": rng.random(rows) < 0.35,
+        "market_segment": rng.choice(["Online TA", "Offline TA/TO", "Direct"], rows),
+        "distribution_channel": rng.choice(["TA/TO", "Direct"], rows),
+        "reserved_room_type": rng.choice(list("ABDE"), rows),
+        "day_of_week": [d.weekday() for d in arrival],
+    }, columns=BOOKING_WRITE_COLUMNS)
+
+
+def orm_write(db, batch: pd.DataFrame) -> int:
+    db.add_all([Booking(**record) for record in batch.to_dict("records")])
+    db.flush()
+    return len(batch)
+
+
+def executemany_write(db, batch: pd.DataFrame) -> int:
+    return _executemany_bookings(db, batch, datetime.utcnow())
+
+
+def measure(label: str, writer, batch: pd.DataFrame):
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        inserted = writer(db, batch)
+        elapsed = time.perf_counter() - start
+    finally:
+        db.rollback()
+        db.close()
+    logger.info(f"{label:<12} строк={inserted:>8}  {elapsed:7.2f} c  {inserted / elapsed:10.0f} строк/с")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--hotel-id", type=int, default=1)
+    args = parser.parse_args()
+
+    batch = make_batch(args.rows, args.hotel_id)
+    logger.info(f"СУБД: {engine.dialect.name}")
+
+    measure("orm add_all", orm_write, batch)
+    measure("executemany", executemany_write, batch)
+    if engine.dialect.name == "postgresql":
+        measure("copy", write_bookings, batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Бенчмарк выгрузки прогнозов (POST /data/export-forecasts через router):
+строк/с, объём на проводе и пиковая память обоих сервисов для NDJSON и CSV,
+с gzip и без. Число строк = отели × признаки депозита × дни периода; отели
+не обязаны существовать, поэтому миллионы строк получаются без наполнения БД.
+
+Запуск (нужна PostgreSQL, только Linux):
+    python -m scripts.bench_forecast_export --hotels 100 --days 10000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+import zlib
+from datetime import date, timedelta
+
+import httpx
+from jose import jwt
+
+from router.config import ALGORITHM, SECRET_KEY
+from scripts.check_upload_memory import _free_port, _peak_rss_mb, _start
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def run_export(url: str, token: str, body: dict, use_gzip: bool) -> dict:
+    headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip" if use_gzip else "identity"}
+    wire = lines = 0
+    decompressor = zlib.decompressobj(31) if use_gzip else None
+    start = time.perf_counter()
+    with httpx.stream("POST", url, json=body, headers=headers, timeout=None) as response:
+        if response.status_code != 200:
+            raise RuntimeError(f"выгрузка не удалась: {response.status_code} {response.read()[:500]}")
+        for chunk in response.iter_raw():
+            wire += len(chunk)
+            lines += (decompressor.decompress(chunk) if decompressor else chunk).count(b"\n")
+    return {"seconds": time.perf_counter() - start, "wire": wire, "lines": lines}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=100)
+    parser.add_argument("--days", type=int, default=10_000)
+    parser.add_argument("--memory-cap-mb", type=float, default=400)
+    args = parser.parse_args()
+
+    date_from = date(2000, 1, 1)
+    base_body = {
+        "hotel_ids": list(range(1, args.hotels + 1)),
+        "date_from": date_from.isoformat(),
+        "date_to": (date_from + timedelta(days=args.days - 1)).isoformat(),
+        "has_deposit": [False, True],
+    }
+    expected = args.hotels * 2 * args.days
+    token = jwt.encode({"sub": "admin", "role": "admin"}, SECRET_KEY, algorithm=ALGORITHM)
+
+    di_port, router_port = _free_port(), _free_port()
+    env = dict(os.environ, DATA_INTERFACE_SERVICE_URL=f"http://127.0.0.1:{di_port}")
+    services = {}
+    ok = True
+    try:
+        services["data_interface"] = _start("data_interface_service.main:app", di_port, env)
+        services["router"] = _start("router.main:app", router_port, env)
+        url = f"http://127.0.0.1:{router_port}/data/export-forecasts"
+
+        for fmt in ("ndjson", "csv"):
+            for use_gzip in (False, True):
+                result = run_export(url, token, dict(base_body, format=fmt), use_gzip)
+                rows = result["lines"] - (1 if fmt == "csv" else 0)
+                if rows != expected:
+                    logger.error(f"FAIL  {fmt}: строк {rows}, ожидалось {expected}")
+                    ok = False
+                logger.info(
+                    f"{fmt:<6} gzip={'да' if use_gzip else 'нет':<3}  строк={rows:>9}  "
+                    f"на проводе={result['wire'] / 2**20:8.1f} МБ  {result['seconds']:6.1f} c  "
+                    f"{rows / result['seconds']:10.0f} строк/с"
+                )
+
+        for name, proc in services.items():
+            peak = _peak_rss_mb(proc.pid)
+            logger.info(f"пик RSS {name}: {peak:.1f} МБ")
+            if peak > args.memory_cap_mb:
+                logger.error(f"FAIL  {name}: пик {peak:.1f} МБ > {args.memory_cap_mb} МБ")
+                ok = False
+    except RuntimeError as e:
+        logger.error(f"FAIL  {e}")
+        ok = False
+    finally:
+        for proc in services.values():
+            proc.terminate()
+            proc.wait()
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Бенчмарк сериализации ответов: процессорное время на запрос до и после
+перехода на shared.responses (orjson, проброс тел ответов в router).
+
+Сценарии:
+    fetch-forecast    — словарь прогноза data_interface_service (JSONResponse против FastJSONResponse);
+    router forecast   — router: разбор ответа + повторная сериализация против проброса тела;
+    router prediction — router: разбор + валидация PredictionResponse + сериализация против проброса;
+    export ndjson     — порция выгрузки из EXPORT_BATCH_ROWS строк (json.dumps против dumps);
+    gzip              — цена сжатия ответа fetch-forecast на уровне GZIP_LEVEL.
+
+Запуск:
+    DB_URL=sqlite:////tmp/bench.db python -m scripts.bench_json_responses --repeat 2000
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import time
+from datetime import date, timedelta
+
+from starlette.responses import JSONResponse
+
+from data_interface_service.config import EXPORT_BATCH_ROWS
+from data_interface_service.routers.export_router import _ndjson
+from router.schemas import PredictionResponse
+from shared.responses import GZIP_LEVEL, FastJSONResponse, dumps, orjson, passthrough_response
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+UPSTREAM_HEADERS = {"content-type": "application/json", "etag": '"abc"', "cache-control": "private, no-cache"}
+
+
+def forecast_content(days: int = 30) -> dict:
+    start = date(2017, 7, 1)
+    return {
+        "status": "ok",
+        "message": None,
+        "history_summary": [
+            {"date": (start + timedelta(days=i)).isoformat(), "bookings": 100 + i, "cancellations": 30 + i % 7}
+            for i in range(days)
+        ],
+        "forecast": [
+            {"date": (start + timedelta(days=days + i)).isoformat(), "bookings": 101.25 + i, "cancellations": 33.5}
+            for i in range(days)
+        ],
+    }
+
+
+def prediction_content(days: int = 30) -> dict:
+    start = date(2017, 8, 1)
+    return {
+        "hotel_id": 1,
+        "target_date": start.isoformat(),
+        "forecast": [
+            {"date": (start + timedelta(days=i)).isoformat(), "bookings": 98.4 + i, "cancellations": 31.2}
+            for i in range(days)
+        ],
+    }
+
+
+def export_rows(rows: int) -> list:
+    start = date(2000, 1, 1)
+    return [
+        (1 + i % 100, bool(i % 2), start + timedelta(days=i % 10_000), 120, 35, 118.5 if i % 3 else None, 33.0)
+        for i in range(rows)
+    ]
+
+
+def cpu_us(fn, repeat: int) -> float:
+    """Процессорное время одного вызова, мкс."""
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) / repeat * 1e6
+
+
+def report(name: str, before: float, after: float):
+    logger.info(f"{name:<18} до={before:10.1f} мкс  после={after:10.1f} мкс  x{before / after:6.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    repeat = args.repeat
+
+    logger.info(f"orjson: {'да' if orjson is not None else 'нет (стандартный json)'}")
+
+    forecast = forecast_content()
+    forecast_body = dumps(forecast)
+    report(
+        "fetch-forecast",
+        cpu_us(lambda: JSONResponse(forecast), repeat),
+        cpu_us(lambda: FastJSONResponse(forecast), repeat),
+    )
+    report(
+        "router forecast",
+        cpu_us(lambda: JSONResponse(json.loads(forecast_body)), repeat),
+        cpu_us(lambda: passthrough_response(forecast_body, 200, UPSTREAM_HEADERS), repeat),
+    )
+
+    # Прежний путь router: response.json() и response_model — валидация и повторная сериализация
+    prediction_body = dumps(prediction_content())
+    report(
+        "router prediction",
+        cpu_us(lambda: PredictionResponse.model_validate(json.loads(prediction_body)).model_dump_json(), repeat),
+        cpu_us(lambda: passthrough_response(prediction_body, 200, UPSTREAM_HEADERS), repeat),
+    )
+
+    rows = export_rows(EXPORT_BATCH_ROWS)
+
+    def ndjson_stdlib():
+        return "".join(
+            json.dumps({
+                "hotel_id": h, "has_deposit": d, "date": day.isoformat(), "bookings": b, "cancellations": c,
+                "forecast_bookings": fb, "forecast_cancellations": fc,
+            }) + "\n"
+            for h, d, day, b, c, fb, fc in rows
+        ).encode()
+
+    batch_repeat = max(1, repeat // 200)
+    report("export ndjson", cpu_us(ndjson_stdlib, batch_repeat), cpu_us(lambda: _ndjson(rows), batch_repeat))
+
+    compressed = gzip.compress(forecast_body, GZIP_LEVEL)
+    logger.info(
+        f"{'gzip':<18} {len(forecast_body)} -> {len(compressed)} байт  "
+        f"{cpu_us(lambda: gzip.compress(forecast_body, GZIP_LEVEL), repeat):10.1f} мкс"
+    )
+
+
+if __name__ == "__main__":
+    main()
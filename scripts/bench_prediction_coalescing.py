@@ -0,0 +1,128 @@
+"""
+Бенчмарк объединения одинаковых запросов прогноза (single-flight).
+
+    router             — всплески одновременных POST /prediction/run-prediction
+                         к router с заглушкой prediction_service: сколько вызовов
+                         дошло до сервиса при одинаковых и при разных ключах;
+    prediction_service — SingleFlight в пуле потоков с работой фиксированной
+                         длительности вместо модели: число выполнений и время всплеска.
+
+Запуск:
+    python -m scripts.bench_prediction_coalescing --burst 50 --bursts 5
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import httpx
+
+from scripts.bench_router_concurrency import fire
+from scripts.check_upload_memory import _free_port, _start
+from shared.singleflight import SingleFlight
+
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+SAME_REQUEST = {"hotel_id": 1, "target_date": "2017-08-01", "has_deposit": False}
+
+
+async def distinct_burst(url: str, count: int) -> dict:
+    async with httpx.AsyncClient(timeout=60) as client:
+        responses = await asyncio.gather(*(
+            client.post(url, json={
+                "hotel_id": 1 + i % 3,
+                "target_date": (date(2017, 8, 1) + timedelta(days=i)).isoformat(),
+                "has_deposit": False,
+            })
+            for i in range(count)
+        ))
+    return {"ok": sum(r.status_code == 200 for r in responses)}
+
+
+def bench_router(burst: int, bursts: int, delay: float) -> bool:
+    upstream_port, router_port = _free_port(), _free_port()
+    env = dict(
+        os.environ,
+        BENCH_UPSTREAM_DELAY=str(delay),
+        PREDICTION_SERVICE_URL=f"http://127.0.0.1:{upstream_port}",
+        # Лимиты допуска не должны ограничивать тест
+        LIMIT_PREDICT_RATE="1000000",
+        LIMIT_PREDICT_BURST="1000000",
+        LIMIT_PREDICT_IN_FLIGHT="1000000",
+        SHED_QUEUE_DEPTH="1000000",
+    )
+    url = f"http://127.0.0.1:{router_port}/prediction/run-prediction"
+    stats_url = f"http://127.0.0.1:{upstream_port}/stats"
+    procs = []
+    try:
+        procs.append(_start("scripts.bench_router_concurrency:fake_prediction", upstream_port, env))
+        procs.append(_start("router.main:app", router_port, env))
+        httpx.get(stats_url)
+
+        ok = 0
+        for _ in range(bursts):
+            ok += asyncio.run(fire(url, burst, SAME_REQUEST))["statuses"].get(200, 0)
+        same_calls = httpx.get(stats_url).json()["calls"]
+        logger.info(
+            f"router, одинаковые:  запросов={burst * bursts} (успешно {ok})  "
+            f"вызовов сервиса={same_calls} (без объединения {burst * bursts})"
+        )
+
+        distinct_ok = sum(asyncio.run(distinct_burst(url, burst))["ok"] for _ in range(bursts))
+        distinct_calls = httpx.get(stats_url).json()["calls"]
+        logger.info(
+            f"router, разные:      запросов={burst * bursts} (успешно {distinct_ok})  вызовов сервиса={distinct_calls}"
+        )
+        return ok == burst * bursts and same_calls == bursts and distinct_calls == burst * bursts
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+
+
+def bench_threads(burst: int, bursts: int, delay: float) -> bool:
+    executions = 0
+
+    def work():
+        nonlocal executions
+        executions += 1
+        time.sleep(delay)
+        return executions
+
+    flight = SingleFlight("bench")
+    with ThreadPoolExecutor(max_workers=burst) as pool:
+        start = time.perf_counter()
+        for _ in range(bursts):
+            results = list(pool.map(lambda _: flight.do((1, date(2017, 8, 1), False), work), range(burst)))
+            assert len(set(results)) == 1
+        elapsed = time.perf_counter() - start
+    logger.info(
+        f"prediction_service:  запросов={burst * bursts}  выполнений={executions} "
+        f"(без объединения {burst * bursts})  {elapsed:.2f} c"
+    )
+    return executions == bursts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--delay", type=float, default=1.0, help="длительность прогноза, с")
+    args = parser.parse_args()
+
+    ok = bench_router(args.burst, args.bursts, args.delay)
+    ok = bench_threads(args.burst, args.bursts, args.delay) and ok
+    if not ok:
+        logger.error("FAIL  одинаковые запросы выполнялись повторно")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
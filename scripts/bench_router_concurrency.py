@@ -0,0 +1,164 @@
+"""
+Нагрузочный тест прокси прогнозов router (POST /prediction/run-prediction):
+одновременные запросы к медленному prediction_service-заглушке.
+
+Синхронный эндпоинт с requests.post занимал слот пула потоков на время вызова,
+поэтому одновременно к сервису уходило не больше 40 запросов (пул anyio
+по умолчанию). Тест проверяет, что пиковая параллельность на стороне сервиса
+превышает этот предел, а также что при остановленном сервисе circuit breaker
+отвечает 503 сразу, без ожидания таймаута.
+
+Запуск:
+    python -m scripts.bench_router_concurrency --requests 400 --delay 2
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+import sys
+import time
+from typing import Optional
+
+import httpx
+from fastapi import FastAPI
+
+from scripts.check_upload_memory import _free_port, _start
+
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+THREADPOOL_LIMIT = 40
+UPSTREAM_DELAY = float(os.getenv("BENCH_UPSTREAM_DELAY", 2))
+
+# --- Заглушка prediction_service: отвечает через UPSTREAM_DELAY секунд ---
+fake_prediction = FastAPI()
+_in_flight = {"now": 0, "peak": 0, "calls": 0}
+
+
+@fake_prediction.get("/")
+def fake_root():
+    return {"message": "ok"}
+
+
+@fake_prediction.post("/run-predict")
+async def fake_run_predict(body: dict):
+    _in_flight["now"] += 1
+    _in_flight["calls"] += 1
+    _in_flight["peak"] = max(_in_flight["peak"], _in_flight["now"])
+    try:
+        await asyncio.sleep(UPSTREAM_DELAY)
+    finally:
+        _in_flight["now"] -= 1
+    return {
+        "hotel_id": body["hotel_id"],
+        "target_date": body["target_date"],
+        "forecast": [{"date": body["target_date"], "bookings": 100.0, "cancellations": 30.0}],
+    }
+
+
+@fake_prediction.get("/stats")
+def fake_stats():
+    stats = {"peak": _in_flight["peak"], "calls": _in_flight["calls"]}
+    _in_flight["peak"] = _in_flight["calls"] = 0
+    return stats
+
+
+async def fire(url: str, count: int, body: Optional[dict] = None) -> dict:
+    """
+    count одновременных запросов прогноза: с общим телом body или, если оно
+    не задано, от разных отелей — тогда запросы не объединяются single-flight.
+    """
+    limits = httpx.Limits(max_connections=count, max_keepalive_connections=count)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        async def one(i: int):
+            start = time.perf_counter()
+            payload = body or {"hotel_id": 1 + i, "target_date": "2017-08-01", "has_deposit": False}
+            response = await client.post(url, json=payload)
+            return response.status_code, time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(count)))
+        elapsed = time.perf_counter() - start
+
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    latencies = sorted(latency for _, latency in results)
+    return {"seconds": elapsed, "statuses": statuses, "p50": latencies[len(latencies) // 2], "max": latencies[-1]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--delay", type=float, default=UPSTREAM_DELAY)
+    args = parser.parse_args()
+
+    upstream_port, router_port = _free_port(), _free_port()
+    env = dict(
+        os.environ,
+        BENCH_UPSTREAM_DELAY=str(args.delay),
+        PREDICTION_SERVICE_URL=f"http://127.0.0.1:{upstream_port}",
+        # Клиент, router и заглушка делят процессор: соединение под нагрузкой
+        # принимается дольше, чем в рабочей среде
+        CONNECT_TIMEOUT="10",
+        BREAKER_FAILURES="3",
+        BREAKER_RESET="30",
+        # Сброс нагрузки и лимиты не должны ограничивать тест: запросы без токена
+        # считаются по адресу клиента, то есть все идут в один лимит
+        SHED_QUEUE_DEPTH="1000000",
+        LIMIT_PREDICT_RATE="1000000",
+        LIMIT_PREDICT_BURST="1000000",
+        LIMIT_PREDICT_IN_FLIGHT="1000000",
+    )
+    url = f"http://127.0.0.1:{router_port}/prediction/run-prediction"
+    ok = True
+    upstream = router = None
+    try:
+        upstream = _start("scripts.bench_router_concurrency:fake_prediction", upstream_port, env)
+        router = _start("router.main:app", router_port, env)
+
+        asyncio.run(fire(url, 10))  # прогрев пула соединений
+        httpx.get(f"http://127.0.0.1:{upstream_port}/stats")
+
+        result = asyncio.run(fire(url, args.requests))
+        peak = httpx.get(f"http://127.0.0.1:{upstream_port}/stats").json()["peak"]
+        threadpool_bound = math.ceil(args.requests / THREADPOOL_LIMIT) * args.delay
+        logger.info(
+            f"запросов={args.requests}  ответы={result['statuses']}  {result['seconds']:.2f} c  "
+            f"p50={result['p50']:.2f} c  max={result['max']:.2f} c  {args.requests / result['seconds']:.0f} запр/с"
+        )
+        logger.info(
+            f"пиковая параллельность у сервиса={peak}  "
+            f"(предел пула потоков {THREADPOOL_LIMIT}; при нём не меньше {threadpool_bound:.1f} c)"
+        )
+        if result["statuses"].get(200) != args.requests or peak <= THREADPOOL_LIMIT:
+            logger.error("FAIL  параллельность ограничена или есть ошибки")
+            ok = False
+
+        # Сервис остановлен: после BREAKER_FAILURES сбоев router отвечает 503 сразу
+        upstream.terminate()
+        upstream.wait()
+        upstream = None
+        down = asyncio.run(fire(url, 20))
+        tripped = asyncio.run(fire(url, 20))
+        logger.info(f"сервис остановлен: ответы={down['statuses']}  затем={tripped['statuses']}  max={tripped['max'] * 1000:.1f} мс")
+        if tripped["statuses"].get(503) != 20:
+            logger.error("FAIL  circuit breaker не разомкнулся")
+            ok = False
+    except RuntimeError as e:
+        logger.error(f"FAIL  {e}")
+        ok = False
+    finally:
+        for proc in (upstream, router):
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
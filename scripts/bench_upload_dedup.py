@@ -0,0 +1,63 @@
+"""
+Бенчмарк отсечения дубликатов booking_ref: время записи пакета фиксированного
+размера не должно расти с числом уже сохранённых бронирований отеля.
+
+В одной транзакции история отеля наполняется ступенями (--history), после каждой
+ступени записывается пакет из --rows строк, половина которых повторяет booking_ref
+из истории. В конце транзакция откатывается.
+
+Запуск (нужен отель с указанным id):
+    python -m scripts.bench_upload_dedup --rows 20000 --history 0 200000 1000000 --hotel-id 1
+"""
+
+import argparse
+import logging
+import time
+
+from scripts.bench_booking_writer import make_batch
+from shared.bulk_writer import write_bookings
+from shared.db import SessionLocal, engine
+
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("shared").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--history", type=int, nargs="+", default=[0, 200_000, 1_000_000])
+    parser.add_argument("--hotel-id", type=int, default=1)
+    args = parser.parse_args()
+
+    logger.info(f"СУБД: {engine.dialect.name}")
+    db = SessionLocal()
+    try:
+        stored = 0
+        for target in sorted(args.history):
+            if target > stored:
+                history = make_batch(target - stored, args.hotel_id)
+                history["booking_ref"] = [f"DEDUP-H{i:09d}" for i in range(stored, target)]
+                write_bookings(db, history)
+                stored = target
+
+            batch = make_batch(args.rows, args.hotel_id)
+            half = args.rows // 2
+            batch["booking_ref"] = [f"DEDUP-N{stored}-{i}" for i in range(args.rows - half)] + [
+                f"DEDUP-H{i % stored:09d}" if stored else f"DEDUP-N0-x{i}" for i in range(half)
+            ]
+
+            start = time.perf_counter()
+            inserted = write_bookings(db, batch)
+            elapsed = time.perf_counter() - start
+            logger.info(
+                f"в истории={stored:>9}  пакет={args.rows:>7}  вставлено={inserted:>7}  "
+                f"пропущено={args.rows - inserted:>7}  {elapsed:6.2f} c"
+            )
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Бенчмарк форматов загрузки бронирований: CSV, CSV.gz, CSV.bz2 и Parquet.
+Для каждого формата — объём передаваемого файла и время чтения + проверки
+(iter_booking_file + parse_booking_frame, без записи в БД). Перед замером
+проверяется, что все форматы дают тот же пакет, что и CSV.
+
+Запуск:
+    DB_URL=sqlite:///:memory: python -m scripts.bench_upload_formats --rows 500000
+"""
+
+import argparse
+import bz2
+import gzip
+import io
+import logging
+import time
+
+import pandas as pd
+
+from data_interface_service.utils import iter_booking_file, parse_booking_frame
+from scripts.bench_booking_parser import make_csv
+
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("data_interface_service").setLevel(logging.ERROR)
+logger = logging.getLogger(__name__)
+
+
+def make_files(rows: int, row_group_rows: int) -> dict:
+    content = make_csv(rows, date_parts=False).encode("utf-8")
+    # Выгрузка PMS в Parquet: дата заезда — типом date, а не строкой
+    df = pd.read_csv(io.BytesIO(content), dtype={"booking_ref": str})
+    df["arrival_date"] = pd.to_datetime(df["arrival_date"], format="%d.%m.%Y").dt.date
+    parquet = io.BytesIO()
+    df.to_parquet(parquet, index=False, row_group_size=row_group_rows)
+    return {
+        "csv": content,
+        "csv.gz": gzip.compress(content, compresslevel=6),
+        "csv.bz2": bz2.compress(content),
+        "parquet": parquet.getvalue(),
+    }
+
+
+def parse(content: bytes, chunk_rows: int) -> pd.DataFrame:
+    batches = [parse_booking_frame(chunk, 1)[0] for chunk in iter_booking_file(io.BytesIO(content), chunk_rows)]
+    return pd.concat(batches, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--row-group-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    files = make_files(args.rows, args.row_group_rows)
+    reference = parse(files["csv"], args.chunk_rows)
+    csv_size = len(files["csv"])
+
+    for name, content in files.items():
+        start = time.perf_counter()
+        batch = parse(content, args.chunk_rows)
+        elapsed = time.perf_counter() - start
+        pd.testing.assert_frame_equal(batch, reference, check_dtype=False)
+        logger.info(
+            f"{name:<8} размер={len(content) / 2**20:7.1f} МБ ({len(content) / csv_size:6.1%} от CSV)  "
+            f"разбор={elapsed:6.2f} c  {len(batch) / elapsed:10.0f} строк/с"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Микробенчмарк проверки JWT в router: проверенных запросов в секунду.
+
+    dependency — вызов verify_token напрямую: прежняя проверка подписи на каждый
+                 вызов против кеша проверенных токенов;
+    request    — запрос к маршруту с зависимостью через ASGI (без сети):
+                 прежняя синхронная зависимость (переход в пул потоков и jwt.decode)
+                 против асинхронной с кешем.
+
+Запуск:
+    python -m scripts.bench_verify_token --seconds 3
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+import httpx
+from fastapi import Depends, FastAPI, Header, HTTPException
+from jose import JWTError, jwt
+
+from router.config import ALGORITHM, SECRET_KEY
+from router.dependencies import _decode_token, _token_cache, verify_token
+
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def legacy_verify_token(authorization: str = Header(...)) -> Dict:
+    """Прежняя verify_token: синхронная, подпись проверяется на каждый запрос."""
+    try:
+        scheme, token = authorization.split()
+        if scheme.lower() != "bearer":
+            raise HTTPException(status_code=401, detail="Invalid authentication scheme")
+        return _decode_token(token)
+    except (JWTError, ValueError):
+        raise HTTPException(status_code=401, detail="Token verification failed")
+
+
+app = FastAPI()
+
+
+@app.get("/legacy")
+async def legacy_route(token_data: Dict = Depends(legacy_verify_token)):
+    return {"hotel_id": token_data["hotel_id"]}
+
+
+@app.get("/cached")
+async def cached_route(token_data: Dict = Depends(verify_token)):
+    return {"hotel_id": token_data["hotel_id"]}
+
+
+def run_sync(coro):
+    """Выполняет корутину без await внутри, минуя цикл событий."""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("корутина приостановилась")
+
+
+def rate(fn, seconds: float) -> float:
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            fn()
+        count += 100
+    return count / seconds
+
+
+async def request_rate(client: httpx.AsyncClient, path: str, headers: dict, seconds: float) -> float:
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        responses = await asyncio.gather(*(client.get(path, headers=headers) for _ in range(50)))
+        assert all(r.status_code == 200 for r in responses)
+        count += len(responses)
+    return count / seconds
+
+
+async def run_requests(headers: dict, seconds: float):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        legacy = await request_rate(client, "/legacy", headers, seconds)
+        cached = await request_rate(client, "/cached", headers, seconds)
+    return legacy, cached
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    claims = {"sub": "hotel_1", "role": "user", "hotel_id": 1, "exp": datetime.utcnow() + timedelta(hours=1)}
+    token = jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+    authorization = f"Bearer {token}"
+
+    legacy = rate(lambda: legacy_verify_token(authorization), args.seconds)
+    _token_cache.clear()
+    cached = rate(lambda: run_sync(verify_token(authorization)), args.seconds)
+    logger.info(f"dependency  до={legacy:10.0f}/с  после={cached:10.0f}/с  x{cached / legacy:5.1f}")
+
+    legacy_rps, cached_rps = asyncio.run(run_requests({"Authorization": authorization}, args.seconds))
+    logger.info(f"request     до={legacy_rps:10.0f}/с  после={cached_rps:10.0f}/с  x{cached_rps / legacy_rps:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
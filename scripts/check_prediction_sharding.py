@@ -0,0 +1,157 @@
+"""
+Проверка закрепления отелей за репликами prediction_service.
+
+Запускает router и несколько заглушек prediction_service (ответ содержит
+имя реплики) и проверяет, что:
+  - запросы отеля всегда идут на одну реплику, выбранную кольцом;
+  - при остановке реплики её отели переходят на следующую, остальные не двигаются;
+  - после перезапуска отели возвращаются на свою реплику.
+Отдельно считается доля отелей, переезжающих при добавлении реплики (ожидается ~1/N).
+
+Запуск:
+    python -m scripts.check_prediction_sharding --replicas 3 --hotels 300
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+from fastapi import FastAPI
+
+from router.sharding import HashRing
+from scripts.check_upload_memory import _free_port, _start
+
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_INTERVAL = 0.5
+
+# --- Заглушка реплики prediction_service ---
+fake_prediction = FastAPI()
+
+
+@fake_prediction.get("/")
+def fake_root():
+    return {"message": "ok"}
+
+
+@fake_prediction.get("/health")
+def fake_health():
+    return {"status": "ok"}
+
+
+@fake_prediction.post("/run-predict")
+def fake_run_predict(body: dict):
+    return {
+        "hotel_id": body["hotel_id"],
+        "target_date": body["target_date"],
+        "forecast": [],
+        "backend": os.environ["BENCH_BACKEND"],
+    }
+
+
+def placement(client: httpx.Client, url: str, hotels: int) -> Dict[int, str]:
+    result = {}
+    for hotel_id in range(1, hotels + 1):
+        body = {"hotel_id": hotel_id, "target_date": "2017-08-01", "has_deposit": False}
+        response = client.post(url, json=body)
+        response.raise_for_status()
+        result[hotel_id] = response.json()["backend"]
+    return result
+
+
+def moved_fraction(nodes: List[str], new_node: str, keys: int) -> float:
+    before, after = HashRing(nodes), HashRing(nodes + [new_node])
+    moved = sum(before.preference(key)[0] != after.preference(key)[0] for key in range(keys))
+    return moved / keys
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replicas", type=int, default=3)
+    parser.add_argument("--hotels", type=int, default=300)
+    args = parser.parse_args()
+
+    ports = [_free_port() for _ in range(args.replicas)]
+    urls = [f"http://127.0.0.1:{port}" for port in ports]
+    router_port = _free_port()
+    env = dict(
+        os.environ,
+        PREDICTION_SERVICE_URLS=",".join(urls),
+        HEALTH_CHECK_INTERVAL=str(HEALTH_CHECK_INTERVAL),
+        BREAKER_RESET="1",
+        LIMIT_PREDICT_RATE="1000",
+        LIMIT_PREDICT_BURST="1000",
+    )
+    ring = HashRing(urls)
+    ok = True
+    backends = {}
+    router = None
+    try:
+        for url, port in zip(urls, ports):
+            backends[url] = _start("scripts.check_prediction_sharding:fake_prediction", port, dict(env, BENCH_BACKEND=url))
+        router = _start("router.main:app", router_port, env)
+        endpoint = f"http://127.0.0.1:{router_port}/prediction/run-prediction"
+
+        with httpx.Client(timeout=30) as client:
+            first = placement(client, endpoint, args.hotels)
+            counts = {url: sum(b == url for b in first.values()) for url in urls}
+            logger.info(f"распределение отелей: {counts}")
+            expected = {hotel_id: ring.preference(hotel_id)[0] for hotel_id in first}
+            if first != expected or placement(client, endpoint, args.hotels) != first:
+                logger.error("FAIL  отели не закреплены за репликами кольца")
+                ok = False
+
+            victim = urls[0]
+            backends[victim].terminate()
+            backends[victim].wait()
+            time.sleep(HEALTH_CHECK_INTERVAL * 3)
+            failover = placement(client, endpoint, args.hotels)
+            moved = [h for h in first if failover[h] != first[h]]
+            wrong = [h for h in first if failover[h] != (ring.preference(h)[1] if first[h] == victim else first[h])]
+            logger.info(f"реплика {victim} остановлена: переехало {len(moved)} отелей из {counts[victim]}")
+            if wrong:
+                logger.error(f"FAIL  {len(wrong)} отелей ушли не на следующую реплику кольца")
+                ok = False
+
+            backends[victim] = _start(
+                "scripts.check_prediction_sharding:fake_prediction", ports[0], dict(env, BENCH_BACKEND=victim)
+            )
+            time.sleep(HEALTH_CHECK_INTERVAL * 3)
+            if placement(client, endpoint, args.hotels) != first:
+                logger.error("FAIL  отели не вернулись на перезапущенную реплику")
+                ok = False
+            else:
+                logger.info(f"реплика {victim} перезапущена: отели вернулись")
+
+            for line in client.get(f"http://127.0.0.1:{router_port}/metrics").text.splitlines():
+                if line.startswith(("router_shard_failovers_total", "router_backend_healthy")):
+                    logger.info(line)
+    except (RuntimeError, httpx.HTTPError) as e:
+        logger.error(f"FAIL  {e}")
+        ok = False
+    finally:
+        for proc in [router, *backends.values()]:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+
+    for n in (3, 4, 8):
+        nodes = [f"http://prediction_service_{i}:8001" for i in range(n)]
+        fraction = moved_fraction(nodes, f"http://prediction_service_{n}:8001", 100000)
+        logger.info(f"{n} -> {n + 1} реплик: переезжает {fraction:.1%} отелей (идеал {1 / (n + 1):.1%})")
+        if fraction > 1.5 / (n + 1):
+            logger.error("FAIL  при добавлении реплики переезжает слишком много отелей")
+            ok = False
+
+    logger.info("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Проверка потоковой загрузки бронирований: пиковая память router и
+data_interface_service не должна зависеть от размера файла.
+
+Скрипт генерирует CSV на диске, поднимает оба сервиса через uvicorn,
+загружает файл через router (POST /data/upload-bookings) и читает пиковый RSS
+(VmHWM) каждого процесса. Замер выполняется для файла в --rows/4 и --rows строк;
+код возврата 1, если пик превысил --memory-cap-mb или загрузка не удалась.
+Загруженные записи (booking_ref с префиксом MEMCHECK-) удаляются.
+
+Запуск (нужен отель с указанным id, только Linux):
+    python -m scripts.check_upload_memory --rows 2000000 --hotel-id 1 --memory-cap-mb 400
+"""
+
+import argparse
+import csv
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Dict
+
+import httpx
+from jose import jwt
+
+from router.config import ALGORITHM, SECRET_KEY
+from shared.db import SessionLocal
+from shared.models import Booking
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REF_PREFIX = "MEMCHECK-"
+HEADER = [
+    "booking_ref", "arrival_date", "adults", "children", "babies",
+    "stays_in_weekend_nights", "stays_in_week_nights", "lead_time", "adr",
+    "booking_changes", "has_deposit", "is_cancellation", "market_segment",
+    "distribution_channel", "reserved_room_type",
+]
+
+
+def make_csv(path: str, rows: int, run: str):
+    start = date(2015, 7, 1)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i in range(rows):
+            arrival = start + timedelta(days=i % 790)
+            writer.writerow([
+                f"{REF_PREFIX}{run}-{i}", arrival.strftime("%d.%m.%Y"), 1 + i % 3, 0, 0,
+                i % 2, 1 + i % 5, i % 365, f"{50 + i % 200}.50", i % 3,
+                "No Deposit" if i % 5 else "Non Refund", i % 2, "Online TA", "TA/TO", "ABDE"[i % 4],
+            ])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start(app: str, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    for _ in range(100):
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"{app} не запустился")
+
+
+def _peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run(rows: int, hotel_id: int, workdir: str) -> Dict[str, float]:
+    path = os.path.join(workdir, f"bookings_{rows}.csv")
+    make_csv(path, rows, str(rows))
+    size_mb = os.path.getsize(path) / 2**20
+
+    di_port, router_port = _free_port(), _free_port()
+    env = dict(os.environ, DATA_INTERFACE_SERVICE_URL=f"http://127.0.0.1:{di_port}")
+    services = {}
+    try:
+        services["data_interface"] = _start("data_interface_service.main:app", di_port, env)
+        services["router"] = _start("router.main:app", router_port, env)
+
+        token = jwt.encode({"sub": "memcheck", "role": "user", "hotel_id": hotel_id}, SECRET_KEY, algorithm=ALGORITHM)
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            response = httpx.post(
+                f"http://127.0.0.1:{router_port}/data/upload-bookings",
+                files={"file": (os.path.basename(path), f, "text/csv")},
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=None,
+            )
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            raise RuntimeError(f"загрузка не удалась: {response.status_code} {response.text[:500]}")
+
+        peaks = {name: _peak_rss_mb(proc.pid) for name, proc in services.items()}
+        result = response.json()
+        logger.info(
+            f"строк={rows:>9}  файл={size_mb:7.1f} МБ  добавлено={result['added']:>9}  порций={result['chunks']:>4}  "
+            f"{elapsed:6.1f} c  пик RSS: router={peaks['router']:6.1f} МБ  "
+            f"data_interface={peaks['data_interface']:6.1f} МБ"
+        )
+        return peaks
+    finally:
+        for proc in services.values():
+            proc.terminate()
+            proc.wait()
+        os.remove(path)
+
+
+def cleanup(hotel_id: int):
+    db = SessionLocal()
+    try:
+        deleted = db.query(Booking).filter(
+            Booking.hotel_id == hotel_id, Booking.booking_ref.like(f"{REF_PREFIX}%")
+        ).delete(synchronize_session=False)
+        db.commit()
+        logger.info(f"Удалено тестовых бронирований: {deleted}")
+    finally:
+        db.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--hotel-id", type=int, default=1)
+    parser.add_argument("--memory-cap-mb", type=float, default=400)
+    args = parser.parse_args()
+
+    ok = True
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for rows in (args.rows // 4, args.rows):
+                peaks = run(rows, args.hotel_id, workdir)
+                for name, peak in peaks.items():
+                    if peak > args.memory_cap_mb:
+                        logger.error(f"FAIL  {name}: пик {peak:.1f} МБ > {args.memory_cap_mb} МБ")
+                        ok = False
+    except RuntimeError as e:
+        logger.error(f"FAIL  {e}")
+        ok = False
+    finally:
+        cleanup(args.hotel_id)
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Проверка планов запросов сервисов через EXPLAIN (только PostgreSQL).
+
+Для каждого «горячего» запроса строится план с отключённым seq scan и проверяется,
+что все обращения к booking / predictions / weather (включая секции) идут через
+ожидаемый составной индекс. Код возврата 1, если хотя бы одна проверка не прошла.
+
+Пример:
+    python -m scripts.db_explain_check
+"""
+
+import json
+import logging
+import sys
+from datetime import date, timedelta
+from typing import Iterator, List
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection
+
+from shared.db import engine
+from shared.data_loader import BOOKING_COLUMNS, bookings_select
+from shared.models import Booking, Prediction, Weather
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HOTEL_ID = 1
+TARGET_DATE = date(2017, 7, 1)
+
+BOOKING_INDEX = "ix_booking_hotel_deposit_arrival"
+PREDICTION_INDEX = "ix_predictions_hotel_deposit_target"
+WEATHER_INDEX = "ix_weather_city_date"
+
+ROOT_INDEX_SQL = text(
+    "SELECT parent.relname FROM pg_inherits i "
+    "JOIN pg_class child ON child.oid = i.inhrelid "
+    "JOIN pg_class parent ON parent.oid = i.inhparent "
+    "WHERE child.relname = :name"
+)
+
+
+def service_queries():
+    """
+    Запросы в том виде, в каком их выполняют сервисы: (название, statement, таблица, индекс).
+    """
+    window_start = TARGET_DATE - timedelta(days=29)
+    return [
+        (
+            "forecast: бронирования за 30 дней",
+            bookings_select(HOTEL_ID, BOOKING_COLUMNS, window_start, TARGET_DATE, False),
+            "booking", BOOKING_INDEX,
+        ),
+        (
+            "training: все бронирования отеля",
+            bookings_select(HOTEL_ID, BOOKING_COLUMNS),
+            "booking", BOOKING_INDEX,
+        ),
+        (
+            "fetch_forecast: история по дням",
+            select(Booking.arrival_date, Booking.is_cancellation, func.count())
+            .where(Booking.hotel_id == HOTEL_ID, Booking.has_deposit.is_(False),
+                   Booking.arrival_date.between(window_start, TARGET_DATE))
+            .group_by(Booking.arrival_date, Booking.is_cancellation),
+            "booking", BOOKING_INDEX,
+        ),
+        (
+            "fetch_forecast: сохранённый прогноз",
+            select(Prediction.target_date, Prediction.bookings, Prediction.cancellations)
+            .where(Prediction.hotel_id == HOTEL_ID, Prediction.has_deposit.is_(False),
+                   Prediction.target_date.between(TARGET_DATE, TARGET_DATE + timedelta(days=29)))
+            .order_by(Prediction.target_date),
+            "predictions", PREDICTION_INDEX,
+        ),
+        (
+            "reference_cache: погода города",
+            select(Weather.date, Weather.temp_avg).where(Weather.city_id == 1),
+            "weather", WEATHER_INDEX,
+        ),
+    ]
+
+
+def _walk(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def _root_index(conn: Connection, name: str) -> str:
+    """
+    Для индекса секции возвращает индекс родительской (секционированной) таблицы.
+    """
+    parent = conn.execute(ROOT_INDEX_SQL, {"name": name}).scalar()
+    while parent is not None:
+        name = parent
+        parent = conn.execute(ROOT_INDEX_SQL, {"name": name}).scalar()
+    return name
+
+
+def _index_names(conn: Connection, node: dict) -> List[str]:
+    return [_root_index(conn, n["Index Name"]) for n in _walk(node) if "Index Name" in n]
+
+
+def check_query(conn: Connection, label: str, stmt, table: str, expected: str) -> bool:
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    raw = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    plan = json.loads(raw) if isinstance(raw, str) else raw
+    root = plan[0]["Plan"]
+
+    problems = []
+    scans = 0
+    for node in _walk(root):
+        relation = node.get("Relation Name", "")
+        if not relation.startswith(table):
+            continue
+        scans += 1
+        if node["Node Type"] == "Seq Scan":
+            problems.append(f"Seq Scan по {relation}")
+            continue
+        names = _index_names(conn, node)
+        if expected not in names:
+            problems.append(f"{relation}: используются индексы {names}, ожидался {expected}")
+
+    if scans == 0:
+        problems.append(f"в плане нет обращений к {table}")
+
+    if problems:
+        logger.error(f"FAIL  {label}: " + "; ".join(problems))
+        return False
+    logger.info(f"OK    {label}")
+    return True
+
+
+def main() -> int:
+    if engine.dialect.name != "postgresql":
+        logger.error("Проверка EXPLAIN поддерживается только для PostgreSQL")
+        return 1
+
+    results = []
+    with engine.begin() as conn:
+        # На маленьких таблицах планировщик предпочёл бы seq scan; проверяем, что индекс применим
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for label, stmt, table, expected in service_queries():
+            results.append(check_query(conn, label, stmt, table, expected))
+
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,15 +3,23 @@
 """
 
 import logging
+from sqlalchemy import inspect
 from shared.db import engine
 from shared.models import Base
+from scripts.migrations import stamp
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 def init():
+    fresh = not inspect(engine).has_table("booking")
     Base.metadata.create_all(bind=engine)
+    if fresh:
+        # На пустой БД create_all создаёт актуальную схему с индексами
+        stamp(engine)
+    else:
+        logger.info("Схема уже существовала: примените миграции (python -m scripts.db_migrate)")
     logger.info("Схема БД создана")
 
 
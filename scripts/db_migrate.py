@@ -1,47 +1,40 @@
 """
-Скрипт для миграции БД: добавляет колонку booking_ref и заполняет её.
+Скрипт применения версионных миграций схемы БД (см. scripts/migrations).
 
-Используется вручную при изменении схемы.
+Примеры:
+    python -m scripts.db_migrate                  # все обязательные миграции
+    python -m scripts.db_migrate --list           # состояние миграций
+    python -m scripts.db_migrate --partition      # вместе с секционированием booking/predictions
 """
 
+import argparse
 import logging
-from sqlalchemy import text
-from sqlalchemy.orm import Session
-from shared.models import Booking
-from shared.db import get_session_sync
+
+from shared.db import engine
+from scripts.migrations import MIGRATIONS, applied_versions, upgrade
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def migrate():
-    """
-    Добавляет колонку booking_ref в таблицу booking и назначает значения по порядку.
-    """
-    session: Session = get_session_sync()
-
-    try:
-        session.execute(text("ALTER TABLE booking ADD COLUMN booking_ref VARCHAR"))
-        session.commit()
-        logger.info("Колонка booking_ref добавлена")
-    except Exception as e:
-        session.rollback()
-        logger.warning(f"Колонка booking_ref уже существует или возникла ошибка: {e}")
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", type=int, default=None, help="максимальная версия")
+    parser.add_argument("--partition", action="store_true", help="применить опциональное секционирование")
+    parser.add_argument("--list", action="store_true", help="показать состояние миграций")
+    args = parser.parse_args()
 
-    hotel_ids = session.query(Booking.hotel_id).distinct().all()
-    for (hotel_id,) in hotel_ids:
-        bookings = (
-            session.query(Booking)
-            .filter(Booking.hotel_id == hotel_id)
-            .order_by(Booking.id)
-            .all()
-        )
-        for idx, booking in enumerate(bookings, start=1):
-            booking.booking_ref = str(idx)
+    if args.list:
+        done = applied_versions(engine)
+        for migration in MIGRATIONS:
+            mark = "x" if migration.VERSION in done else " "
+            optional = " (опционально)" if migration.OPTIONAL else ""
+            logger.info(f"[{mark}] {migration.VERSION:04d} {migration.DESCRIPTION}{optional}")
+        return
 
-    session.commit()
-    logger.info("Значения booking_ref присвоены")
+    applied = upgrade(engine, include_optional=args.partition, target=args.target)
+    logger.info(f"Применено миграций: {len(applied)}")
 
 
 if __name__ == "__main__":
-    migrate()
+    main()
@@ -0,0 +1,76 @@
+"""
+Скрипт переноса повторных бронирований (одинаковые hotel_id и booking_ref)
+в таблицу booking_duplicate. Нужен, если миграция 6 (уникальный индекс
+booking_ref) остановилась из-за повторов.
+
+В каждой группе в booking остаётся запись с наименьшим id, остальные
+переносятся в booking_duplicate (та же структура) и могут быть возвращены
+оттуда вручную. Без --apply только печатает отчёт.
+
+Примеры:
+    python -m scripts.db_quarantine_duplicates            # отчёт
+    python -m scripts.db_quarantine_duplicates --apply    # перенос
+    python -m scripts.db_migrate                          # затем миграции
+"""
+
+import argparse
+import logging
+
+from sqlalchemy import text
+
+from shared.db import get_session_sync
+from shared.watermarks import BOOKINGS, touch_watermark
+from scripts.migrations.v0006_booking_ref_unique import duplicate_groups
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUARANTINE_TABLE = "booking_duplicate"
+
+# Повтор — запись, у которой есть запись того же отеля с тем же booking_ref и меньшим id
+_EXTRA = (
+    "booking.booking_ref IS NOT NULL AND EXISTS ("
+    " SELECT 1 FROM booking AS earlier"
+    " WHERE earlier.hotel_id = booking.hotel_id"
+    " AND earlier.booking_ref = booking.booking_ref"
+    " AND earlier.id < booking.id)"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apply", action="store_true", help="перенести повторы в booking_duplicate")
+    parser.add_argument("--show", type=int, default=20, help="сколько групп показать")
+    args = parser.parse_args()
+
+    with get_session_sync() as db:
+        conn = db.connection()
+        groups = duplicate_groups(conn)
+        if not groups:
+            logger.info("Повторов booking_ref нет")
+            return
+
+        extra = sum(copies - 1 for _, _, copies in groups)
+        logger.info(f"Групп с повторами: {len(groups)}, лишних записей: {extra}")
+        for hotel_id, booking_ref, copies in groups[:args.show]:
+            logger.info(f"  hotel_id={hotel_id} booking_ref={booking_ref!r} записей={copies}")
+        if not args.apply:
+            logger.info("Ничего не изменено: для переноса запустите с --apply")
+            return
+
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {QUARANTINE_TABLE} AS SELECT * FROM booking WHERE 1 = 0"))
+        moved = conn.execute(text(f"INSERT INTO {QUARANTINE_TABLE} SELECT * FROM booking WHERE {_EXTRA}")).rowcount
+        deleted = conn.execute(text(f"DELETE FROM booking WHERE {_EXTRA}")).rowcount
+        if moved != deleted:
+            db.rollback()
+            raise RuntimeError(f"Перенесено {moved} записей, удалено бы {deleted}: изменения отменены")
+
+        # Данные отелей изменились: кеши прогнозов и ETag должны обновиться
+        for hotel_id in sorted({hotel_id for hotel_id, _, _ in groups}):
+            touch_watermark(db, hotel_id, BOOKINGS)
+        db.commit()
+        logger.info(f"Перенесено в {QUARANTINE_TABLE}: {moved} записей")
+
+
+if __name__ == "__main__":
+    main()
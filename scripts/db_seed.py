@@ -5,6 +5,7 @@
 """
 
 import logging
+from shared.api_keys import hash_api_key
 from shared.db import get_session_sync, engine, Base
 from shared.models import City, Hotel, Holiday,Weather, Booking, Prediction
 from datetime import date
@@ -25,10 +26,10 @@ def init():
     session.add_all([city1, city2, city3])
     session.flush()
 
-    # Отели
-    hotel1 = Hotel(name="Hotel A", city=city1, is_city_hotel=True, api_key="f7b9c6a3ef84d05ce3a18b42d7b2f8c0")
-    hotel2 = Hotel(name="Hotel B", city=city2, is_city_hotel=False, api_key="9d4fa2f0c7a35e289b3d1f504a0cf15e")
-    hotel3 = Hotel(name="Hotel C", city=city3, is_city_hotel=True, api_key="6e3abf3296c4461bb4faed78a9c7c412")
+    # Отели (в БД только дайджесты; сами ключи — для входа в демо)
+    hotel1 = Hotel(name="Hotel A", city=city1, is_city_hotel=True, api_key_hash=hash_api_key("f7b9c6a3ef84d05ce3a18b42d7b2f8c0"))
+    hotel2 = Hotel(name="Hotel B", city=city2, is_city_hotel=False, api_key_hash=hash_api_key("9d4fa2f0c7a35e289b3d1f504a0cf15e"))
+    hotel3 = Hotel(name="Hotel C", city=city3, is_city_hotel=True, api_key_hash=hash_api_key("6e3abf3296c4461bb4faed78a9c7c412"))
     session.add_all([hotel1, hotel2, hotel3])
     session.flush()
 
@@ -0,0 +1,104 @@
+"""
+Версионные миграции схемы БД.
+
+Каждая миграция — модуль с атрибутами VERSION, DESCRIPTION, OPTIONAL и функцией
+upgrade(conn). Применённые версии хранятся в таблице schema_migrations;
+каждая миграция выполняется в отдельной транзакции. Опциональные миграции
+(например, секционирование) применяются только по явному запросу.
+"""
+
+import logging
+from typing import List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from scripts.migrations import (
+    v0001_booking_ref,
+    v0002_reference_version,
+    v0003_hot_path_indexes,
+    v0004_partition_booking_predictions,
+    v0005_hotel_watermark,
+    v0006_booking_ref_unique,
+    v0007_import_checkpoint,
+    v0008_hotel_api_key_hash,
+)
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = sorted(
+    [
+        v0001_booking_ref,
+        v0002_reference_version,
+        v0003_hot_path_indexes,
+        v0004_partition_booking_predictions,
+        v0005_hotel_watermark,
+        v0006_booking_ref_unique,
+        v0007_import_checkpoint,
+        v0008_hotel_api_key_hash,
+    ],
+    key=lambda m: m.VERSION,
+)
+
+
+def ensure_migrations_table(conn: Connection):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version INTEGER PRIMARY KEY,"
+        " description VARCHAR NOT NULL,"
+        " applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    ))
+
+
+def applied_versions(engine: Engine) -> Set[int]:
+    with engine.begin() as conn:
+        ensure_migrations_table(conn)
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def _record(conn: Connection, migration):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, description) VALUES (:v, :d)"),
+        {"v": migration.VERSION, "d": migration.DESCRIPTION},
+    )
+
+
+def pending(engine: Engine, include_optional: bool = False, target: Optional[int] = None) -> List:
+    done = applied_versions(engine)
+    return [
+        m for m in MIGRATIONS
+        if m.VERSION not in done
+        and (include_optional or not m.OPTIONAL)
+        and (target is None or m.VERSION <= target)
+    ]
+
+
+def upgrade(engine: Engine, include_optional: bool = False, target: Optional[int] = None) -> List[int]:
+    """
+    Применяет недостающие миграции по возрастанию версии.
+
+    Returns:
+        List[int]: применённые версии.
+    """
+    applied = []
+    for migration in pending(engine, include_optional, target):
+        logger.info(f"Миграция {migration.VERSION:04d}: {migration.DESCRIPTION}")
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            _record(conn, migration)
+        applied.append(migration.VERSION)
+    if not applied:
+        logger.info("Схема БД актуальна")
+    return applied
+
+
+def stamp(engine: Engine):
+    """
+    Помечает все обязательные миграции применёнными (после create_all на пустой БД).
+    """
+    with engine.begin() as conn:
+        ensure_migrations_table(conn)
+        done = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+        for migration in MIGRATIONS:
+            if not migration.OPTIONAL and migration.VERSION not in done:
+                _record(conn, migration)
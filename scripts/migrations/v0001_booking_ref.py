@@ -0,0 +1,35 @@
+"""
+Колонка booking_ref и её заполнение порядковыми номерами внутри отеля
+(бывший scripts/db_migrate.py).
+
+Нумеруются только бронирования без booking_ref, а значения получают префикс
+LEGACY_REF_PREFIX: иначе номер "5" мог бы совпасть с настоящим booking_ref,
+загруженным раньше, и два разных бронирования считались бы повтором.
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+VERSION = 1
+DESCRIPTION = "booking.booking_ref с порядковыми значениями"
+OPTIONAL = False
+
+LEGACY_REF_PREFIX = "legacy-"
+
+
+def upgrade(conn: Connection):
+    columns = {c["name"] for c in inspect(conn).get_columns("booking")}
+    if "booking_ref" not in columns:
+        conn.execute(text("ALTER TABLE booking ADD COLUMN booking_ref VARCHAR"))
+
+    conn.execute(
+        text(
+            "UPDATE booking SET booking_ref = numbered.ref "
+            "FROM ("
+            "  SELECT id, :prefix || CAST(row_number() OVER (PARTITION BY hotel_id ORDER BY id) AS VARCHAR) AS ref"
+            "  FROM booking WHERE booking_ref IS NULL"
+            ") AS numbered "
+            "WHERE booking.id = numbered.id"
+        ),
+        {"prefix": LEGACY_REF_PREFIX},
+    )
@@ -0,0 +1,15 @@
+"""
+Таблица reference_version для инвалидации кеша справочников (shared/reference_cache.py).
+"""
+
+from sqlalchemy.engine import Connection
+
+from shared.models import ReferenceVersion
+
+VERSION = 2
+DESCRIPTION = "таблица reference_version"
+OPTIONAL = False
+
+
+def upgrade(conn: Connection):
+    ReferenceVersion.__table__.create(bind=conn, checkfirst=True)
@@ -0,0 +1,29 @@
+"""
+Составные покрывающие индексы для основных запросов сервисов:
+- booking (hotel_id, has_deposit, arrival_date) INCLUDE (is_cancellation);
+- predictions (hotel_id, has_deposit, target_date) INCLUDE (bookings, cancellations, created_at);
+- weather (city_id, date) INCLUDE (temp_avg).
+
+Определения индексов берутся из shared/models.py, INCLUDE применяется только в PostgreSQL.
+"""
+
+from sqlalchemy.engine import Connection
+
+from shared.models import Booking, Prediction, Weather
+
+VERSION = 3
+DESCRIPTION = "составные индексы booking, predictions, weather"
+OPTIONAL = False
+
+INDEXES = {
+    "ix_booking_hotel_deposit_arrival",
+    "ix_predictions_hotel_deposit_target",
+    "ix_weather_city_date",
+}
+
+
+def upgrade(conn: Connection):
+    for model in (Booking, Prediction, Weather):
+        for index in model.__table__.indexes:
+            if index.name in INDEXES:
+                index.create(bind=conn, checkfirst=True)
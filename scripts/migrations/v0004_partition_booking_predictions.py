@@ -0,0 +1,106 @@
+"""
+Опционально: перевод booking и predictions в секционированные таблицы (только PostgreSQL).
+
+Первый уровень — RANGE по дате (arrival_date / target_date) с годовыми секциями
+и секцией DEFAULT, второй — HASH по hotel_id. Данные переносятся в новую таблицу,
+старая остаётся под именем <table>_unpartitioned до ручного удаления.
+
+Первичный ключ секционированной таблицы обязан включать ключ секционирования,
+поэтому он становится (id, <дата>, hotel_id); последовательность id сохраняется.
+По той же причине индекс booking (hotel_id, booking_ref) становится неуникальным —
+повторы отсекает антиобъединение при записи.
+"""
+
+import os
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+VERSION = 4
+DESCRIPTION = "секционирование booking и predictions по дате и hotel_id"
+OPTIONAL = True
+
+HASH_PARTITIONS = int(os.getenv("DB_HASH_PARTITIONS", 4))
+
+# таблица -> (колонка даты, имя индекса, колонки индекса, INCLUDE)
+TABLES = {
+    "booking": (
+        "arrival_date", "ix_booking_hotel_deposit_arrival",
+        "hotel_id, has_deposit, arrival_date", "is_cancellation",
+    ),
+    "predictions": (
+        "target_date", "ix_predictions_hotel_deposit_target",
+        "hotel_id, has_deposit, target_date", "bookings, cancellations, created_at",
+    ),
+}
+
+
+# Дополнительные индексы: таблица -> [(имя, колонки, условие)]
+EXTRA_INDEXES = {
+    "booking": [("ix_booking_hotel_ref", "hotel_id, booking_ref", "booking_ref IS NOT NULL")],
+}
+
+
+def _is_partitioned(conn: Connection, table: str) -> bool:
+    return bool(conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :t"),
+        {"t": table},
+    ).scalar())
+
+
+def _partition_table(conn: Connection, table: str):
+    date_col, index_name, index_cols, include_cols = TABLES[table]
+    new = f"{table}_partitioned"
+
+    conn.execute(text(
+        f"CREATE TABLE {new} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE ({date_col})"
+    ))
+    conn.execute(text(f"ALTER TABLE {new} ADD PRIMARY KEY (id, {date_col}, hotel_id)"))
+    conn.execute(text(f"ALTER TABLE {new} ADD FOREIGN KEY (hotel_id) REFERENCES hotel (id)"))
+
+    bounds = conn.execute(text(
+        f"SELECT EXTRACT(YEAR FROM MIN({date_col}))::int, EXTRACT(YEAR FROM MAX({date_col}))::int FROM {table}"
+    )).one()
+    first_year = bounds[0] or 2015
+    last_year = max(bounds[1] or first_year, first_year) + 1
+
+    ranges = [(f"{table}_y{year}", f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')")
+              for year in range(first_year, last_year + 1)]
+    ranges.append((f"{table}_default", "DEFAULT"))
+
+    for name, bound in ranges:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {new} {bound} PARTITION BY HASH (hotel_id)"))
+        for remainder in range(HASH_PARTITIONS):
+            conn.execute(text(
+                f"CREATE TABLE {name}_h{remainder} PARTITION OF {name} "
+                f"FOR VALUES WITH (MODULUS {HASH_PARTITIONS}, REMAINDER {remainder})"
+            ))
+
+    conn.execute(text(f"INSERT INTO {new} SELECT * FROM {table}"))
+
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {table}_unpartitioned"))
+    conn.execute(text(f"ALTER INDEX IF EXISTS {index_name} RENAME TO {index_name}_unpartitioned"))
+    conn.execute(text(f"ALTER TABLE {new} RENAME TO {table}"))
+    conn.execute(text(
+        f"CREATE INDEX {index_name} ON {table} ({index_cols}) INCLUDE ({include_cols})"
+    ))
+    for extra_name, extra_cols, where in EXTRA_INDEXES.get(table, []):
+        conn.execute(text(f"ALTER INDEX IF EXISTS {extra_name} RENAME TO {extra_name}_unpartitioned"))
+        conn.execute(text(f"CREATE INDEX {extra_name} ON {table} ({extra_cols}) WHERE {where}"))
+
+    # Последовательность id переходит к новой таблице
+    sequence = conn.execute(text(f"SELECT pg_get_serial_sequence('{table}_unpartitioned', 'id')")).scalar()
+    if sequence:
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{sequence}')"))
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+        conn.execute(text(f"ALTER TABLE {table}_unpartitioned ALTER COLUMN id DROP DEFAULT"))
+
+
+def upgrade(conn: Connection):
+    if conn.dialect.name != "postgresql":
+        raise RuntimeError("Секционирование поддерживается только в PostgreSQL")
+
+    for table in TABLES:
+        if not _is_partitioned(conn, table):
+            _partition_table(conn, table)
@@ -0,0 +1,15 @@
+"""
+Таблица hotel_watermark: время последней записи бронирований и прогнозов отеля.
+"""
+
+from sqlalchemy.engine import Connection
+
+from shared.models import HotelWatermark
+
+VERSION = 5
+DESCRIPTION = "таблица hotel_watermark"
+OPTIONAL = False
+
+
+def upgrade(conn: Connection):
+    HotelWatermark.__table__.create(bind=conn, checkfirst=True)
@@ -0,0 +1,71 @@
+"""
+Уникальный частичный индекс booking (hotel_id, booking_ref) WHERE booking_ref IS NOT NULL.
+
+Миграция не удаляет данные: раньше повторы booking_ref внутри одного файла
+не отсекались, и в старой БД они могут быть. Если повторы есть, миграция
+прерывается с отчётом; перенести лишние записи в таблицу booking_duplicate
+можно отдельным скриптом python -m scripts.db_quarantine_duplicates,
+после чего миграция применяется повторно.
+
+Если booking уже секционирована (миграция 4), уникальный индекс без ключей
+секционирования невозможен — создаётся обычный индекс, а повторы отсекаются
+антиобъединением при записи (shared/bulk_writer.py).
+"""
+
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from shared.models import Booking
+
+VERSION = 6
+DESCRIPTION = "уникальный индекс booking (hotel_id, booking_ref)"
+OPTIONAL = False
+
+INDEX_NAME = "ix_booking_hotel_ref"
+
+
+def _is_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'booking'")
+    ).scalar())
+
+
+def duplicate_groups(conn: Connection, limit: Optional[int] = None) -> List[Tuple[int, str, int]]:
+    """
+    Returns:
+        List[Tuple[int, str, int]]: (hotel_id, booking_ref, число записей) с повторами, самые крупные первыми.
+    """
+    sql = (
+        "SELECT hotel_id, booking_ref, COUNT(*) AS copies FROM booking"
+        " WHERE booking_ref IS NOT NULL GROUP BY hotel_id, booking_ref HAVING COUNT(*) > 1"
+        " ORDER BY copies DESC, hotel_id, booking_ref"
+    )
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    return [tuple(row) for row in conn.execute(text(sql))]
+
+
+def upgrade(conn: Connection):
+    if _is_partitioned(conn):
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON booking (hotel_id, booking_ref) "
+            f"WHERE booking_ref IS NOT NULL"
+        ))
+        return
+
+    groups = duplicate_groups(conn)
+    if groups:
+        extra = sum(copies - 1 for _, _, copies in groups)
+        sample = ", ".join(f"hotel_id={h} booking_ref={r!r} x{c}" for h, r, c in groups[:10])
+        raise RuntimeError(
+            f"Повторы booking_ref: {len(groups)} групп, {extra} лишних записей ({sample}). "
+            f"Миграция данные не удаляет: проверьте повторы и перенесите их "
+            f"python -m scripts.db_quarantine_duplicates --apply, затем повторите миграцию"
+        )
+
+    index = next(i for i in Booking.__table__.indexes if i.name == INDEX_NAME)
+    index.create(bind=conn, checkfirst=True)
@@ -0,0 +1,15 @@
+"""
+Таблица import_checkpoint: завершённые порции массового импорта бронирований.
+"""
+
+from sqlalchemy.engine import Connection
+
+from shared.models import ImportCheckpoint
+
+VERSION = 7
+DESCRIPTION = "таблица import_checkpoint"
+OPTIONAL = False
+
+
+def upgrade(conn: Connection):
+    ImportCheckpoint.__table__.create(bind=conn, checkfirst=True)
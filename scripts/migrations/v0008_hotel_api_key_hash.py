@@ -0,0 +1,60 @@
+"""
+API-ключи отелей хранятся как SHA-256: колонка hotel.api_key_hash с уникальным
+индексом заменяет открытую hotel.api_key. Действующие ключи продолжают работать:
+их дайджесты вычисляются при миграции.
+В SQLite, где нельзя удалить уникальную колонку и изменить NOT NULL,
+таблица hotel пересоздаётся по модели.
+"""
+
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateTable
+
+from shared.api_keys import hash_api_key
+from shared.models import City, Hotel
+
+VERSION = 8
+DESCRIPTION = "hotel.api_key_hash вместо открытого api_key"
+OPTIONAL = False
+
+INDEX_NAME = "ix_hotel_api_key_hash"
+
+
+def _rebuild_sqlite(conn: Connection, columns: set):
+    """
+    Пересоздание hotel в порядке из документации SQLite: новая таблица, копия
+    строк, удаление старой, переименование. Ссылки других таблиц указывают
+    на имя hotel и остаются верными; индексы старой таблицы удаляются вместе с ней.
+    """
+    metadata = MetaData()
+    City.__table__.to_metadata(metadata)
+    new_table = Hotel.__table__.to_metadata(metadata, name="hotel_new")
+    conn.execute(CreateTable(new_table))
+
+    copied = ", ".join(c.name for c in Hotel.__table__.columns if c.name in columns)
+    conn.execute(text(f"INSERT INTO hotel_new ({copied}) SELECT {copied} FROM hotel"))
+    conn.execute(text("DROP TABLE hotel"))
+    conn.execute(text("ALTER TABLE hotel_new RENAME TO hotel"))
+
+
+def upgrade(conn: Connection):
+    columns = {column["name"] for column in inspect(conn).get_columns("hotel")}
+    if "api_key_hash" not in columns:
+        conn.execute(text("ALTER TABLE hotel ADD COLUMN api_key_hash VARCHAR(64)"))
+
+    if "api_key" in columns:
+        rows = conn.execute(text("SELECT id, api_key FROM hotel")).all()
+        if rows:
+            conn.execute(
+                text("UPDATE hotel SET api_key_hash = :digest WHERE id = :id"),
+                [{"id": hotel_id, "digest": hash_api_key(api_key)} for hotel_id, api_key in rows],
+            )
+
+    if conn.dialect.name == "sqlite":
+        _rebuild_sqlite(conn, columns | {"api_key_hash"})
+    else:
+        if "api_key" in columns:
+            conn.execute(text("ALTER TABLE hotel DROP COLUMN api_key"))
+        conn.execute(text("ALTER TABLE hotel ALTER COLUMN api_key_hash SET NOT NULL"))
+    index = next(i for i in Hotel.__table__.indexes if i.name == INDEX_NAME)
+    index.create(bind=conn, checkfirst=True)
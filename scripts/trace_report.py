@@ -0,0 +1,86 @@
+"""
+Разбор трасс запросов из файлов TRACE_DIR/<сервис>.ndjson (shared/tracing.py).
+
+Без --request-id печатает по каждому маршруту число запросов, p50/p95 общего
+времени и среднее время этапов; с --request-id — все span'ы одного запроса
+во всех сервисах по порядку, с самыми медленными SQL-запросами.
+
+Запуск:
+    python -m scripts.trace_report traces/*.ndjson
+    python -m scripts.trace_report traces/*.ndjson --request-id 6f1c...
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def load(paths: List[str]) -> List[dict]:
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+
+def summary(records: List[dict]):
+    routes: Dict[tuple, List[dict]] = defaultdict(list)
+    for record in records:
+        routes[(record["service"], record["method"], record["path"])].append(record)
+
+    for (service, method, path), items in sorted(routes.items(), key=lambda kv: -len(kv[1])):
+        durations = [r["duration_ms"] for r in items]
+        stages: Dict[str, float] = defaultdict(float)
+        for r in items:
+            for s in r["spans"]:
+                stages[s["name"]] += s["duration_ms"]
+        stages_text = "  ".join(f"{name}={total / len(items):.1f}" for name, total in stages.items())
+        print(
+            f"{service:<15} {method:<6} {path:<40} n={len(items):<6} "
+            f"p50={_percentile(durations, 0.5):.1f} мс  p95={_percentile(durations, 0.95):.1f} мс  {stages_text}"
+        )
+
+
+def request(records: List[dict], request_id: str, top_sql: int):
+    items = sorted((r for r in records if r["request_id"] == request_id), key=lambda r: r["time"])
+    if not items:
+        print(f"Запрос {request_id} не найден")
+        return
+    origin = items[0]["time"]
+    for r in items:
+        offset = (r["time"] - origin) * 1000
+        print(f"+{offset:8.1f} мс  {r['service']:<15} {r['method']} {r['path']} {r['status']}  {r['duration_ms']:.1f} мс")
+        for s in r["spans"]:
+            if s["name"] != "sql":
+                print(f"    +{s['start_ms']:8.1f} мс  {s['name']:<25} {s['duration_ms']:8.1f} мс  {s['detail'] or ''}")
+        sql = sorted((s for s in r["spans"] if s["name"] == "sql"), key=lambda s: -s["duration_ms"])
+        if sql:
+            print(f"    SQL: {len(sql)} запросов, {sum(s['duration_ms'] for s in sql):.1f} мс")
+            for s in sql[:top_sql]:
+                print(f"      {s['duration_ms']:8.1f} мс  {s['detail']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--request-id")
+    parser.add_argument("--top-sql", type=int, default=5)
+    args = parser.parse_args()
+
+    records = load(args.files)
+    if args.request_id:
+        request(records, args.request_id, args.top_sql)
+    else:
+        summary(records)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+# shared/api_keys.py
+
+"""
+API-ключи отелей. В БД хранится только SHA-256 ключа (hotel.api_key_hash):
+ключи случайные (128 бит), поэтому медленный хеш с солью не нужен, а поиск
+по дайджесту идёт по уникальному индексу. Сам ключ показывается один раз при создании.
+"""
+
+import hashlib
+import secrets
+
+
+def generate_api_key() -> str:
+    return secrets.token_hex(16)
+
+
+def hash_api_key(api_key: str) -> str:
+    """
+    Returns:
+        str: SHA-256 ключа, 64 шестнадцатеричных символа.
+    """
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
@@ -0,0 +1,129 @@
+# shared/bulk_writer.py
+
+"""
+Массовая запись бронирований.
+
+PostgreSQL: пакет потоково передаётся через COPY FROM STDIN во временную
+таблицу и переносится в booking одним INSERT ... SELECT. Остальные СУБД:
+многострочный executemany через Core. Коммит выполняет вызывающий код.
+
+Бронирования с booking_ref, который уже есть у отеля, пропускаются на стороне БД
+(антиобъединение и ON CONFLICT DO NOTHING по индексу ix_booking_hotel_ref).
+"""
+
+import io
+import logging
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import Session
+
+from shared.models import Booking
+
+logger = logging.getLogger(__name__)
+
+# Колонки, которые заполняет пакет бронирований (id и created_at — на стороне записи)
+BOOKING_WRITE_COLUMNS = [
+    "hotel_id", "booking_ref", "arrival_date", "lead_time", "adr",
+    "total_guests", "total_nights", "booking_changes", "has_deposit",
+    "is_cancellation", "market_segment", "distribution_channel",
+    "reserved_room_type", "day_of_week",
+]
+
+STAGING_TABLE = "booking_staging"
+
+# Сколько строк сериализуется в буфер за одну порцию COPY / executemany
+WRITE_CHUNK_ROWS = 50_000
+
+_COLUMN_LIST = ", ".join(BOOKING_WRITE_COLUMNS)
+_NULL = r"\N"
+
+
+def _copy_bookings(db: Session, batch: pd.DataFrame, created_at: datetime) -> int:
+    raw = db.connection().connection
+    cursor = raw.cursor()
+    try:
+        # Структура колонок booking без ограничений; таблица живёт до конца транзакции
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} ON COMMIT DROP AS "
+            f"SELECT {_COLUMN_LIST} FROM booking WITH NO DATA"
+        )
+        cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+
+        for start in range(0, len(batch), WRITE_CHUNK_ROWS):
+            buf = io.StringIO()
+            batch.iloc[start:start + WRITE_CHUNK_ROWS].to_csv(buf, index=False, header=False, na_rep=_NULL)
+            buf.seek(0)
+            cursor.copy_expert(
+                f"COPY {STAGING_TABLE} ({_COLUMN_LIST}) FROM STDIN WITH (FORMAT csv, NULL '{_NULL}')", buf
+            )
+
+        # Антиобъединение работает и для секционированной booking (без уникального индекса);
+        # ON CONFLICT страхует от параллельной загрузки тех же booking_ref
+        cursor.execute(
+            f"INSERT INTO booking ({_COLUMN_LIST}, created_at) "
+            f"SELECT {_COLUMN_LIST}, %s FROM {STAGING_TABLE} s "
+            f"WHERE s.booking_ref IS NULL OR NOT EXISTS ("
+            f"SELECT 1 FROM booking b WHERE b.hotel_id = s.hotel_id AND b.booking_ref = s.booking_ref) "
+            f"ON CONFLICT DO NOTHING",
+            (created_at,),
+        )
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def _existing_refs(db: Session, hotel_id: int, refs: list) -> set:
+    return set(db.execute(
+        select(Booking.booking_ref).where(Booking.hotel_id == hotel_id, Booking.booking_ref.in_(refs))
+    ).scalars())
+
+
+def _executemany_bookings(db: Session, batch: pd.DataFrame, created_at: datetime) -> int:
+    dialect = db.get_bind().dialect.name
+    inserted = 0
+    for start in range(0, len(batch), WRITE_CHUNK_ROWS):
+        chunk = batch.iloc[start:start + WRITE_CHUNK_ROWS]
+        records = chunk.astype(object).where(chunk.notna(), None).to_dict("records")
+
+        if dialect == "sqlite":
+            stmt = sqlite.insert(Booking.__table__).values(created_at=created_at).on_conflict_do_nothing()
+            inserted += db.execute(stmt, records).rowcount
+            continue
+
+        # Прочие СУБД: повторы отсекаются запросом по booking_ref этой порции
+        for hotel_id, refs in chunk.dropna(subset=["booking_ref"]).groupby("hotel_id")["booking_ref"]:
+            existing = _existing_refs(db, hotel_id, list(refs))
+            records = [
+                r for r in records
+                if r["booking_ref"] is None or r["hotel_id"] != hotel_id or r["booking_ref"] not in existing
+            ]
+        if records:
+            db.execute(insert(Booking).values(created_at=created_at), records)
+        inserted += len(records)
+    return inserted
+
+
+def write_bookings(db: Session, batch: pd.DataFrame) -> int:
+    """
+    Записывает пакет бронирований (колонки BOOKING_WRITE_COLUMNS) в текущей транзакции.
+    Строки с уже существующим у отеля booking_ref не вставляются.
+
+    Returns:
+        int: число вставленных строк; пропущено дубликатов — len(batch) минус это число.
+    """
+    if batch.empty:
+        return 0
+
+    batch = batch[BOOKING_WRITE_COLUMNS]
+    created_at = datetime.utcnow()
+
+    if db.get_bind().dialect.name == "postgresql":
+        inserted = _copy_bookings(db, batch, created_at)
+    else:
+        inserted = _executemany_bookings(db, batch, created_at)
+
+    logger.info(f"Записано бронирований: {inserted}, пропущено дубликатов: {len(batch) - inserted}")
+    return inserted
@@ -1,16 +1,137 @@
 # shared/data_loader.py
 
+import io
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
 import pandas as pd
+from sqlalchemy import Float, Numeric, Table, cast, select
 from sqlalchemy.orm import Session
+from shared.dtypes import BOOKING_DTYPES, HOLIDAY_DTYPES, WEATHER_DTYPES, apply_dtypes, to_dtype
 from shared.models import Booking, Weather, Holiday, Hotel
 
+# Колонки бронирований, нужные для предобработки и обучения
+BOOKING_COLUMNS = [
+    "arrival_date", "lead_time", "adr", "total_guests", "total_nights",
+    "booking_changes", "has_deposit", "is_cancellation", "market_segment",
+    "distribution_channel", "reserved_room_type", "day_of_week",
+]
+HOLIDAY_COLUMNS = ["date", "holiday_name", "is_national", "region"]
+
+# Размер порции строк при потоковом чтении результата
+FETCH_CHUNK_SIZE = 50_000
+
+
+def _projection(table: Table, columns: Sequence[str]) -> list:
+    """
+    Явная проекция колонок; Numeric приводится к FLOAT на стороне БД, чтобы не получать Decimal.
+    """
+    projected = []
+    for name in columns:
+        col = table.c[name]
+        if isinstance(col.type, Numeric) and not isinstance(col.type, Float):
+            col = cast(col, Float).label(name)
+        projected.append(col)
+    return projected
+
+
+def _fetch_frame(db: Session, stmt, columns: Sequence[str], dtypes: Dict[str, str]) -> pd.DataFrame:
+    """
+    Читает результат порциями и собирает его по колонкам, минуя ORM-объекты.
+    Каждая колонка сразу приводится к типу из схемы.
+    """
+    result = db.execute(stmt.execution_options(yield_per=FETCH_CHUNK_SIZE))
+    data: Dict[str, list] = {name: [] for name in columns}
+    for part in result.partitions():
+        for name, values in zip(columns, zip(*part)):
+            data[name].extend(values)
+
+    frame = {}
+    for name in columns:
+        values = data.pop(name)
+        frame[name] = to_dtype(values, dtypes[name]) if name in dtypes else pd.Series(values, dtype=object)
+    return pd.DataFrame(frame, columns=list(columns))
+
+
+def _copy_frame(db: Session, stmt, columns: Sequence[str], dtypes: Dict[str, str]) -> pd.DataFrame:
+    """
+    Выгрузка через COPY (...) TO STDOUT (только PostgreSQL) в буфер и чтение pandas.
+    """
+    dialect = db.get_bind().dialect
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+    buf = io.StringIO()
+    raw = db.connection().connection
+    cursor = raw.cursor()
+    try:
+        cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER true)", buf)
+    finally:
+        cursor.close()
+    buf.seek(0)
+
+    df = pd.read_csv(
+        buf,
+        usecols=list(columns),
+        dtype={c: "category" for c in columns if dtypes.get(c) == "category"},
+        true_values=["t"],
+        false_values=["f"],
+    )
+    return apply_dtypes(df, dtypes)
 
-def load_bookings(hotel_id: int, db: Session) -> pd.DataFrame:
-    records = db.query(Booking).filter(Booking.hotel_id == hotel_id).all()
-    if not records:
+
+def _load(db: Session, stmt, columns: Sequence[str], dtypes: Dict[str, str], use_copy: bool) -> pd.DataFrame:
+    if use_copy and db.get_bind().dialect.name == "postgresql":
+        return _copy_frame(db, stmt, columns, dtypes)
+    return _fetch_frame(db, stmt, columns, dtypes)
+
+
+def bookings_select(
+    hotel_id: int,
+    columns: Sequence[str],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    has_deposit: Optional[bool] = None,
+):
+    """
+    SELECT бронирований отеля; использует индекс (hotel_id, has_deposit, arrival_date).
+    """
+    table = Booking.__table__
+    stmt = select(*_projection(table, columns)).where(table.c.hotel_id == hotel_id)
+    if start_date is not None:
+        stmt = stmt.where(table.c.arrival_date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(table.c.arrival_date <= end_date)
+    if has_deposit is not None:
+        stmt = stmt.where(table.c.has_deposit == has_deposit)
+    return stmt
+
+
+def load_bookings(
+    hotel_id: int,
+    db: Session,
+    columns: Optional[List[str]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    has_deposit: Optional[bool] = None,
+    use_copy: bool = False,
+) -> pd.DataFrame:
+    """
+    Загружает бронирования отеля в DataFrame.
+
+    Args:
+        columns: список колонок (по умолчанию BOOKING_COLUMNS).
+        start_date, end_date: включительный диапазон arrival_date.
+        has_deposit: фильтр по признаку депозита.
+        use_copy: выгрузка через COPY TO STDOUT для больших объёмов (PostgreSQL).
+    """
+    columns = list(columns or BOOKING_COLUMNS)
+    stmt = bookings_select(hotel_id, columns, start_date, end_date, has_deposit)
+
+    df = _load(db, stmt, columns, BOOKING_DTYPES, use_copy)
+    if df.empty:
+        if start_date is not None or end_date is not None:
+            raise ValueError(f"Нет данных о бронированиях {start_date} – {end_date} для hotel_id={hotel_id}")
         raise ValueError(f"Нет данных о бронированиях для hotel_id={hotel_id}")
-    df = pd.DataFrame([b.__dict__ for b in records])
-    df['arrival_date'] = pd.to_datetime(df['arrival_date'])
     return df
 
 
@@ -24,19 +145,27 @@ def load_weather(hotel_id: int, db: Session) -> pd.DataFrame:
     records = db.query(Weather.date, Weather.temp_avg).filter(Weather.city_id == city_id).all()
     df = pd.DataFrame(records, columns=["date", "temp_avg"])
 
-    if not df.empty:
-        df["date"] = pd.to_datetime(df["date"])
-        # Убедимся, что temp_avg имеет числовой тип
-        df["temp_avg"] = pd.to_numeric(df["temp_avg"], errors="coerce")
-    else:
-        df["date"] = pd.Series(dtype="datetime64[ns]")
-        df["temp_avg"] = pd.Series(dtype="float64")
+    # date -> datetime64, temp_avg -> float32 (без Decimal)
+    return apply_dtypes(df, WEATHER_DTYPES)
 
-    return df
 
+def load_holidays(
+    db: Session,
+    columns: Optional[List[str]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    use_copy: bool = False,
+) -> pd.DataFrame:
+    """
+    Загружает праздники, при необходимости — только заданные колонки и диапазон дат.
+    """
+    columns = list(columns or HOLIDAY_COLUMNS)
+    table = Holiday.__table__
 
-def load_holidays(db: Session) -> pd.DataFrame:
-    records = db.query(Holiday).all()
-    df = pd.DataFrame([h.__dict__ for h in records])
-    df['date'] = pd.to_datetime(df['date']) if not df.empty else pd.Series(dtype="datetime64[ns]")
-    return df
+    stmt = select(*_projection(table, columns))
+    if start_date is not None:
+        stmt = stmt.where(table.c.date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(table.c.date <= end_date)
+
+    return _load(db, stmt, columns, HOLIDAY_DTYPES, use_copy)
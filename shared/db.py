@@ -1,28 +1,41 @@
 # shared/db.py
 
-from sqlalchemy import create_engine
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import DateTime, Integer, column, select, table
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.ext.declarative import DeclarativeMeta
-from sqlalchemy.pool import NullPool  # или другой, в зависимости от среды
-from dotenv import load_dotenv
-import os
+from shared import metrics
+from shared.engine import DB_URL, create_db_engine
 
-load_dotenv()
+# Создаём engine (пул соединений настраивается через окружение, см. shared/engine.py)
+engine = create_db_engine(DB_URL, name="primary")
+
+# Создаём фабрику сессий
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_HOST = os.getenv("DB_HOST", "db")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
+# Необязательная реплика для чтения
+DB_REPLICA_URL = os.getenv("DB_REPLICA_URL")
+# Отели с записью данных за последние N секунд читаются с primary
+REPLICA_STALENESS_SECONDS = float(os.getenv("DB_REPLICA_STALENESS_SECONDS", 30))
 
-# Получаем URL из переменных среды (или .env)
-DB_URL=f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+replica_engine = create_db_engine(DB_REPLICA_URL, name="replica") if DB_REPLICA_URL else None
+ReplicaSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    if replica_engine is not None else None
+)
 
-# Создаём engine
-engine = create_engine(DB_URL, poolclass=NullPool)
+READ_ROUTES = metrics.counter("db_read_route_total", "Маршрутизация читающих сессий")
 
-# Создаём фабрику сессий
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Лёгкое описание hotel_watermark (без импорта shared.models, чтобы избежать цикла)
+_watermark = table(
+    "hotel_watermark",
+    column("hotel_id", Integer),
+    column("bookings_updated_at", DateTime),
+)
 
 # Базовый класс моделей
 Base: DeclarativeMeta = declarative_base()
@@ -37,4 +50,43 @@ def get_session():
         db.close()
 
 def get_session_sync():
-    return next(get_session())
\ No newline at end of file
+    return next(get_session())
+
+
+def _recently_written(hotel_id: int) -> bool:
+    """
+    Проверяет по primary, были ли у отеля загрузки за последние REPLICA_STALENESS_SECONDS.
+    """
+    with engine.connect() as conn:
+        updated = conn.execute(
+            select(_watermark.c.bookings_updated_at).where(_watermark.c.hotel_id == hotel_id)
+        ).scalar()
+    return updated is not None and datetime.utcnow() - updated < timedelta(seconds=REPLICA_STALENESS_SECONDS)
+
+
+def read_session_factory(hotel_id: Optional[int] = None) -> sessionmaker:
+    """
+    Фабрика сессий для работы только на чтение: реплика, если она настроена
+    и данные отеля не менялись недавно, иначе primary.
+    """
+    if ReplicaSessionLocal is None:
+        READ_ROUTES.inc(target="primary", reason="no_replica")
+        return SessionLocal
+    if hotel_id is not None and _recently_written(hotel_id):
+        READ_ROUTES.inc(target="primary", reason="recent_write")
+        return SessionLocal
+    READ_ROUTES.inc(target="replica", reason="read_only")
+    return ReplicaSessionLocal
+
+
+def get_read_session(hotel_id: Optional[int] = None):
+    db = read_session_factory(hotel_id)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@contextmanager
+def read_session(hotel_id: Optional[int] = None):
+    yield from get_read_session(hotel_id)
@@ -0,0 +1,75 @@
+# shared/dtypes.py
+
+"""
+Компактные типы колонок для DataFrame, получаемых из БД.
+"""
+
+from typing import Dict
+
+import pandas as pd
+
+BOOKING_DTYPES: Dict[str, str] = {
+    "arrival_date": "datetime64[ns]",
+    "lead_time": "int32",
+    "adr": "float32",
+    "total_guests": "int16",
+    "total_nights": "int16",
+    "booking_changes": "int16",
+    "has_deposit": "bool",
+    "is_cancellation": "bool",
+    "market_segment": "category",
+    "distribution_channel": "category",
+    "reserved_room_type": "category",
+    "day_of_week": "int8",
+}
+
+WEATHER_DTYPES: Dict[str, str] = {
+    "date": "datetime64[ns]",
+    "temp_avg": "float32",
+}
+
+HOLIDAY_DTYPES: Dict[str, str] = {
+    "date": "datetime64[ns]",
+    "holiday_name": "category",
+    "is_national": "bool",
+    "region": "category",
+}
+
+
+# Целочисленная или булева колонка с пропусками получает nullable-тип pandas:
+# пропуск остаётся пропуском, а не превращается в 0/False
+NULLABLE_DTYPES: Dict[str, str] = {
+    "int8": "Int8",
+    "int16": "Int16",
+    "int32": "Int32",
+    "int64": "Int64",
+    "bool": "boolean",
+}
+
+
+def to_dtype(values, dtype: str) -> pd.Series:
+    """
+    Приводит значения колонки к заданному типу.
+    Пропуски сохраняются (NULLABLE_DTYPES): решать, чем их заполнить, — делу предобработки.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if dtype.startswith("datetime"):
+        return pd.to_datetime(series).astype(dtype)
+    if dtype.startswith("int"):
+        numbers = pd.to_numeric(series)
+        return numbers.astype(NULLABLE_DTYPES[dtype] if numbers.isna().any() else dtype)
+    if dtype.startswith("float"):
+        return pd.to_numeric(series, errors="coerce").astype(dtype)
+    if dtype == "bool":
+        return series.astype(NULLABLE_DTYPES[dtype] if series.isna().any() else dtype)
+    return series.astype(dtype)
+
+
+def apply_dtypes(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """
+    Приводит колонки DataFrame, описанные в схеме, к компактным типам.
+    """
+    for col, dtype in schema.items():
+        if col in df.columns and str(df[col].dtype) not in (dtype, NULLABLE_DTYPES.get(dtype)):
+            df[col] = to_dtype(df[col], dtype)
+    return df
@@ -0,0 +1,108 @@
+# shared/engine.py
+
+"""
+Единая фабрика SQLAlchemy engine для всех сервисов.
+
+Параметры пула задаются переменными окружения каждого сервиса:
+DB_POOL (queue | null), DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS.
+"""
+
+import os
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool, QueuePool
+
+from shared import metrics
+from shared.tracing import instrument_engine
+
+load_dotenv()
+
+POOL_IN_USE = metrics.gauge("db_pool_in_use", "Соединения, выданные из пула")
+POOL_CHECKOUT_WAIT = metrics.summary("db_pool_checkout_wait_seconds", "Ожидание соединения из пула")
+
+
+def build_db_url() -> str:
+    """
+    Собирает URL базы данных: DB_URL, если задан явно, иначе из DB_USER/DB_PASSWORD/...
+    """
+    url = os.getenv("DB_URL")
+    if url:
+        return url
+
+    user = os.getenv("DB_USER")
+    password = os.getenv("DB_PASSWORD")
+    host = os.getenv("DB_HOST", "db")
+    port = os.getenv("DB_PORT")
+    name = os.getenv("DB_NAME")
+    return f"postgresql://{user}:{password}@{host}:{port}/{name}"
+
+
+DB_URL = build_db_url()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool, замеряющий время ожидания свободного соединения.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start, engine=self.logging_name or "default")
+
+
+def create_db_engine(url: Optional[str] = None, name: str = "primary", **overrides) -> Engine:
+    """
+    Создаёт engine с пулом соединений, настроенным из окружения.
+
+    Args:
+        url: URL базы данных (по умолчанию DB_URL).
+        name: имя engine в метриках.
+        overrides: явные параметры create_engine поверх значений из окружения.
+    """
+    url = url or DB_URL
+    kwargs = {"pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True)}
+
+    if os.getenv("DB_POOL", "queue").lower() == "null":
+        kwargs["poolclass"] = NullPool
+    else:
+        kwargs.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+            pool_logging_name=name,
+        )
+
+    statement_timeout = os.getenv("DB_STATEMENT_TIMEOUT_MS")
+    if statement_timeout and url.startswith("postgresql"):
+        kwargs["connect_args"] = {"options": f"-c statement_timeout={int(statement_timeout)}"}
+
+    kwargs.update(overrides)
+    engine = create_engine(url, **kwargs)
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_conn, conn_record, conn_proxy):
+        POOL_IN_USE.inc(engine=name)
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_conn, conn_record):
+        POOL_IN_USE.dec(engine=name)
+
+    instrument_engine(engine)
+    return engine
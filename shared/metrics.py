@@ -0,0 +1,141 @@
+# shared/metrics.py
+
+"""
+Простейший реестр метрик процесса (счётчики, gauge, summary)
+с выводом в текстовом формате Prometheus.
+"""
+
+import threading
+from typing import Dict, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_registry: Dict[str, "_Metric"] = {}
+_registry_lock = threading.Lock()
+
+
+def _label_key(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in key) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, val) for key, val in self._values.items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Summary(_Metric):
+    """
+    Количество, сумма и максимум наблюдений (например, времени ожидания).
+    """
+    kind = "summary"
+
+    def __init__(self, name: str, description: str = ""):
+        super().__init__(name, description)
+        self._stats: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            stats = self._stats.setdefault(key, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += value
+            stats[2] = max(stats[2], value)
+
+    def value(self, **labels) -> float:
+        stats = self._stats.get(_label_key(labels))
+        return stats[1] if stats else 0.0
+
+    def count(self, **labels) -> int:
+        stats = self._stats.get(_label_key(labels))
+        return stats[0] if stats else 0
+
+    def samples(self):
+        with self._lock:
+            result = []
+            for key, (count, total, maximum) in self._stats.items():
+                result.append((f"{self.name}_count", key, count))
+                result.append((f"{self.name}_sum", key, total))
+                result.append((f"{self.name}_max", key, maximum))
+            return result
+
+
+def _get_or_create(cls, name: str, description: str):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = cls(name, description)
+            _registry[name] = metric
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Метрика {name} уже зарегистрирована с типом {metric.kind}")
+        return metric
+
+
+def counter(name: str, description: str = "") -> Counter:
+    return _get_or_create(Counter, name, description)
+
+
+def gauge(name: str, description: str = "") -> Gauge:
+    return _get_or_create(Gauge, name, description)
+
+
+def summary(name: str, description: str = "") -> Summary:
+    return _get_or_create(Summary, name, description)
+
+
+def render_prometheus() -> str:
+    """
+    Возвращает все метрики в текстовом формате Prometheus.
+    """
+    lines = []
+    with _registry_lock:
+        metrics = list(_registry.values())
+    for metric in metrics:
+        if metric.description:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, key, val in metric.samples():
+            lines.append(f"{name}{_format_labels(key)} {val}")
+    return "\n".join(lines) + "\n"
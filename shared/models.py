@@ -1,6 +1,6 @@
 # shared/models.py
 
-from sqlalchemy import Column, Integer, String, Date, Boolean, Numeric, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Date, Boolean, Numeric, ForeignKey, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from shared.db import Base
@@ -27,10 +27,15 @@ class Hotel(Base):
 
     name = Column(String, nullable=False)
     is_city_hotel = Column(Boolean, nullable=False)
-    api_key = Column(String, unique=True, nullable=False)
+    # SHA-256 API-ключа (shared/api_keys.py); сам ключ не хранится
+    api_key_hash = Column(String(64), nullable=False)
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_hotel_api_key_hash", "api_key_hash", unique=True),
+    )
+
     city = relationship("City", back_populates="hotels")
     bookings = relationship("Booking", back_populates="hotel", cascade="all, delete-orphan")
     predictions = relationship("Prediction", back_populates="hotel", cascade="all, delete-orphan")
@@ -61,6 +66,23 @@ class Booking(Base):
 
     hotel = relationship("Hotel", back_populates="bookings")
 
+    # Равенства (hotel_id, has_deposit) впереди, диапазон arrival_date последним
+    __table_args__ = (
+        Index(
+            "ix_booking_hotel_deposit_arrival",
+            "hotel_id", "has_deposit", "arrival_date",
+            postgresql_include=["is_cancellation"],
+        ),
+        # Дубликаты booking_ref отсекаются в БД (ON CONFLICT DO NOTHING при загрузке)
+        Index(
+            "ix_booking_hotel_ref",
+            "hotel_id", "booking_ref",
+            unique=True,
+            postgresql_where=booking_ref.isnot(None),
+            sqlite_where=booking_ref.isnot(None),
+        ),
+    )
+
 
 class Weather(Base):
     __tablename__ = "weather"
@@ -78,6 +100,10 @@ class Weather(Base):
 
     city = relationship("City", back_populates="weather")
 
+    __table_args__ = (
+        Index("ix_weather_city_date", "city_id", "date", postgresql_include=["temp_avg"]),
+    )
+
 
 class Holiday(Base):
     __tablename__ = "holiday"
@@ -107,3 +133,56 @@ class Prediction(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     hotel = relationship("Hotel", back_populates="predictions")
+
+    __table_args__ = (
+        Index(
+            "ix_predictions_hotel_deposit_target",
+            "hotel_id", "has_deposit", "target_date",
+            postgresql_include=["bookings", "cancellations", "created_at"],
+        ),
+    )
+
+
+class ReferenceVersion(Base):
+    """
+    Версии справочных данных (праздники, погода) для инвалидации кешей сервисов.
+    """
+    __tablename__ = "reference_version"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class HotelWatermark(Base):
+    """
+    Время последней записи данных отеля: бронирований и прогнозов.
+    Используется для маршрутизации чтения на реплику и валидации кешей.
+    """
+    __tablename__ = "hotel_watermark"
+
+    hotel_id = Column(Integer, ForeignKey("hotel.id"), primary_key=True)
+    bookings_updated_at = Column(DateTime, nullable=True)
+    predictions_updated_at = Column(DateTime, nullable=True)
+
+
+class ImportCheckpoint(Base):
+    """
+    Завершённые порции массового импорта бронирований (database/import_bookings.py).
+    Порция и её отметка фиксируются в одной транзакции; повторный запуск их пропускает.
+    """
+    __tablename__ = "import_checkpoint"
+
+    id = Column(Integer, primary_key=True)
+    source = Column(String, nullable=False)
+    chunk_rows = Column(Integer, nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    rows = Column(Integer, nullable=False)
+    inserted = Column(Integer, nullable=False)
+
+    finished_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("source", "chunk_rows", "chunk_index", name="uq_import_checkpoint_chunk"),
+    )
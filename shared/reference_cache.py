@@ -0,0 +1,182 @@
+# shared/reference_cache.py
+
+"""
+Кеш справочных данных в памяти процесса: праздники (глобально) и погода (по city_id).
+
+Данные хранятся как плотные массивы NumPy, индексированные днём от начальной даты,
+поэтому сопоставление с датами бронирований — это индексирование массива, а не merge/isin.
+Записи живут REFERENCE_CACHE_TTL секунд; кроме того, не чаще чем раз в
+REFERENCE_VERSION_CHECK_INTERVAL секунд сверяется версия в таблице reference_version,
+которую повышают скрипты импорта (bump_reference_version).
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Float, cast, select
+from sqlalchemy.orm import Session
+
+from shared.models import Holiday, Hotel, ReferenceVersion, Weather
+
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", 3600))
+REFERENCE_VERSION_CHECK_INTERVAL = float(os.getenv("REFERENCE_VERSION_CHECK_INTERVAL", 60))
+
+HOLIDAY = "holiday"
+WEATHER = "weather"
+
+
+class DateSeries:
+    """
+    Значения по дням: values[i] относится к дате origin + i дней.
+    """
+    __slots__ = ("origin", "values", "fill")
+
+    def __init__(self, origin: np.datetime64, values: np.ndarray, fill):
+        self.origin = origin
+        self.values = values
+        self.fill = fill
+
+    @classmethod
+    def from_pairs(cls, dates, values, dtype, fill) -> "DateSeries":
+        days = np.asarray(dates, dtype="datetime64[D]")
+        if days.size == 0:
+            return cls(np.datetime64("1970-01-01", "D"), np.empty(0, dtype=dtype), fill)
+        origin = days.min()
+        offsets = (days - origin).astype(np.int64)
+        array = np.full(int(offsets.max()) + 1, fill, dtype=dtype)
+        array[offsets] = np.asarray(values, dtype=dtype)
+        return cls(origin, array, fill)
+
+    def lookup(self, dates) -> np.ndarray:
+        """
+        Значения для массива дат; для дат вне диапазона возвращается fill.
+        """
+        offsets = (np.asarray(dates, dtype="datetime64[D]") - self.origin).astype(np.int64)
+        result = np.full(offsets.shape, self.fill, dtype=self.values.dtype)
+        mask = (offsets >= 0) & (offsets < self.values.size)
+        result[mask] = self.values[offsets[mask]]
+        return result
+
+
+class _Entry:
+    __slots__ = ("value", "loaded_at", "version")
+
+    def __init__(self, value, loaded_at: float, version: Optional[int]):
+        self.value = value
+        self.loaded_at = loaded_at
+        self.version = version
+
+
+_entries: Dict[Tuple, _Entry] = {}
+_versions: Dict[str, Tuple[float, Optional[int]]] = {}
+_lock = threading.Lock()
+
+
+def _current_version(name: str, db: Session) -> Optional[int]:
+    """
+    Версия справочника из БД, запрашиваемая не чаще REFERENCE_VERSION_CHECK_INTERVAL.
+    """
+    now = time.monotonic()
+    checked = _versions.get(name)
+    if checked is not None and now - checked[0] < REFERENCE_VERSION_CHECK_INTERVAL:
+        return checked[1]
+
+    version = db.execute(
+        select(ReferenceVersion.version).where(ReferenceVersion.name == name)
+    ).scalar()
+    _versions[name] = (now, version)
+    return version
+
+
+def _get(key: Tuple, version_name: Optional[str], db: Session, loader: Callable):
+    version = _current_version(version_name, db) if version_name else None
+    now = time.monotonic()
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and now - entry.loaded_at < REFERENCE_CACHE_TTL and entry.version == version:
+            return entry.value
+
+    value = loader()
+    with _lock:
+        _entries[key] = _Entry(value, now, version)
+    return value
+
+
+def get_hotel_city(hotel_id: int, db: Session) -> int:
+    def loader():
+        city_id = db.execute(select(Hotel.city_id).where(Hotel.id == hotel_id)).scalar()
+        if city_id is None:
+            raise ValueError(f"Не удалось найти city_id для hotel_id={hotel_id}")
+        return city_id
+
+    return _get(("hotel_city", hotel_id), None, db, loader)
+
+
+def get_weather_series(city_id: int, db: Session) -> DateSeries:
+    """
+    Среднесуточная температура города (float32, NaN для дней без данных).
+    """
+    def loader():
+        rows = db.execute(
+            select(Weather.date, cast(Weather.temp_avg, Float)).where(Weather.city_id == city_id)
+        ).all()
+        dates = [r[0] for r in rows]
+        temps = [np.nan if r[1] is None else r[1] for r in rows]
+        return DateSeries.from_pairs(dates, temps, np.float32, np.nan)
+
+    return _get((WEATHER, city_id), WEATHER, db, loader)
+
+
+def get_holiday_series(db: Session) -> DateSeries:
+    """
+    Признак праздничного дня (bool).
+    """
+    def loader():
+        dates = db.execute(select(Holiday.date)).scalars().all()
+        return DateSeries.from_pairs(dates, np.ones(len(dates), dtype=bool), bool, False)
+
+    return _get((HOLIDAY,), HOLIDAY, db, loader)
+
+
+def add_reference_features(df: pd.DataFrame, hotel_id: int, db: Session,
+                           date_col: str = "arrival_date") -> pd.DataFrame:
+    """
+    Добавляет temp_avg и is_holiday по дате через поиск в кешированных массивах.
+    """
+    dates = df[date_col].to_numpy()
+    city_id = get_hotel_city(hotel_id, db)
+    df["temp_avg"] = get_weather_series(city_id, db).lookup(dates)
+    df["is_holiday"] = get_holiday_series(db).lookup(dates).astype(np.int8)
+    return df
+
+
+def invalidate(name: Optional[str] = None):
+    """
+    Сбрасывает кеш в текущем процессе: целиком или для одного справочника (holiday / weather).
+    """
+    with _lock:
+        if name is None:
+            _entries.clear()
+            _versions.clear()
+            return
+        for key in [k for k in _entries if k[0] == name]:
+            del _entries[key]
+        _versions.pop(name, None)
+
+
+def bump_reference_version(db: Session, name: str):
+    """
+    Повышает версию справочника; вызывается скриптами импорта в той же транзакции,
+    что и запись данных. Коммит выполняет вызывающий код.
+    """
+    record = db.get(ReferenceVersion, name)
+    if record is None:
+        db.add(ReferenceVersion(name=name, version=1))
+    else:
+        record.version += 1
+    invalidate(name)
@@ -0,0 +1,71 @@
+# shared/responses.py
+
+"""
+Общий слой ответов сервисов: сериализация JSON через orjson (если установлен)
+и gzip-сжатие ответов больше порога.
+
+Маршруты с response_model сериализуются самим FastAPI через pydantic;
+FastJSONResponse используется для ответов-словарей.
+"""
+
+import json
+import os
+from typing import Any, Mapping, Optional
+
+from fastapi import FastAPI
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без него — стандартный json
+    orjson = None
+
+# Ответы меньше порога не сжимаются: выигрыш меньше накладных расходов
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 5))
+
+# Заголовки ответа сервиса, которые router передаёт клиенту как есть
+PASSTHROUGH_HEADERS = ("etag", "cache-control", "content-disposition")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    JSON в байтах: orjson (numpy, datetime, нестроковые ключи) или стандартный json.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def setup_responses(app: FastAPI):
+    """
+    Подключает gzip-сжатие ответов. Класс ответа по умолчанию задаётся
+    при создании приложения: FastAPI(default_response_class=FastJSONResponse).
+    """
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_LEVEL)
+
+
+def passthrough_response(
+    content: bytes,
+    status_code: int,
+    upstream_headers: Mapping[str, str],
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    Тело ответа другого сервиса без разбора и повторной сериализации.
+    Сохраняются content-type и PASSTHROUGH_HEADERS.
+    """
+    result = {k: upstream_headers[k] for k in PASSTHROUGH_HEADERS if k in upstream_headers}
+    result.update(headers or {})
+    return Response(
+        content=content,
+        status_code=status_code,
+        media_type=upstream_headers.get("content-type", "application/json"),
+        headers=result,
+    )
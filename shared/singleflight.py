@@ -0,0 +1,93 @@
+# shared/singleflight.py
+
+"""
+Объединение одинаковых одновременных вызовов (single-flight): первый вызов
+с данным ключом выполняет работу, остальные ждут и получают его результат
+или его исключение. Завершённый результат не кешируется.
+
+SingleFlight — для синхронного кода в пуле потоков, AsyncSingleFlight — для корутин.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from shared.metrics import counter
+
+singleflight_calls = counter(
+    "singleflight_calls_total",
+    "Вызовы по результату: executed — выполнен, coalesced — получил результат другого вызова",
+)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Выполняет fn() или ждёт уже идущий вызов с тем же ключом.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            singleflight_calls.inc(name=self.name, result="coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        singleflight_calls.inc(name=self.name, result="executed")
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет await fn() или ждёт уже идущий вызов с тем же ключом.
+        Работа идёт в отдельной задаче: отмена одного ожидающего не прерывает её для остальных.
+        """
+        task = self._tasks.get(key)
+        if task is not None:
+            singleflight_calls.inc(name=self.name, result="coalesced")
+            return await asyncio.shield(task)
+
+        singleflight_calls.inc(name=self.name, result="executed")
+        task = self._tasks[key] = asyncio.ensure_future(fn())
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Исключение помечается полученным, даже если все ожидающие отменены
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,259 @@
+# shared/tracing.py
+
+"""
+Лёгкая трассировка запросов сервисов.
+
+Каждый HTTP-запрос получает идентификатор (заголовок X-Request-ID: входящий
+или новый), который router передаёт в запросы к другим сервисам. Внутри
+запроса время этапов записывается span'ами: span("load"), SQL-запросы
+(instrument_engine), вызовы сервисов. Итоги по этапам возвращаются клиенту
+в заголовке Server-Timing и пишутся в лог; при заданном TRACE_DIR все span'ы
+запроса сохраняются строкой NDJSON в TRACE_DIR/<сервис>.ndjson
+для разбора (scripts/trace_report.py).
+"""
+
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from shared.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Каталог файлов span'ов; пусто — не сохраняются
+TRACE_DIR = os.getenv("TRACE_DIR", "")
+# Отдавать ли клиенту заголовок Server-Timing
+TRACE_SERVER_TIMING = os.getenv("TRACE_SERVER_TIMING", "1").strip().lower() in ("1", "true", "yes", "on")
+# Сверх этого числа span'ы запроса только суммируются (загрузка CSV даёт тысячи SQL-запросов)
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", 1000))
+# Длина текста SQL в файле span'ов
+TRACE_SQL_LENGTH = int(os.getenv("TRACE_SQL_LENGTH", 200))
+
+# Входящий идентификатор принимается, только если он короткий и без спецсимволов
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+_SERVER_TIMING_DUR_RE = re.compile(r"dur=([0-9.]+)")
+
+
+class Span:
+    __slots__ = ("name", "start", "duration", "detail")
+
+    def __init__(self, name: str, start: float, duration: float, detail: Optional[str]):
+        self.name = name
+        self.start = start
+        self.duration = duration
+        self.detail = detail
+
+
+class Trace:
+    """
+    Span'ы одного запроса и суммарное время по именам этапов.
+    """
+    __slots__ = ("request_id", "started", "spans", "totals", "closed")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.spans: List[Span] = []
+        self.totals: Dict[str, List[float]] = {}
+        self.closed = False
+
+    def add(self, name: str, start: float, duration: float, detail: Optional[str] = None):
+        # Работа, пережившая запрос (фоновые задачи), в него не записывается
+        if self.closed:
+            return
+        total = self.totals.setdefault(name, [0.0, 0])
+        total[0] += duration
+        total[1] += 1
+        if len(self.spans) < TRACE_MAX_SPANS:
+            self.spans.append(Span(name, start, duration, detail))
+
+    def server_timing(self) -> str:
+        """
+        Returns:
+            значение заголовка Server-Timing: время по этапам и общее, мс.
+        """
+        entries = []
+        for name, (duration, count) in self.totals.items():
+            entry = f"{name};dur={duration * 1000:.1f}"
+            if count > 1:
+                entry += f';desc="{count}"'
+            entries.append(entry)
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current.get()
+    return trace.request_id if trace else None
+
+
+def record_span(name: str, start: float, end: Optional[float] = None, detail: Optional[str] = None):
+    """
+    Записывает span в текущий запрос; вне запроса ничего не делает.
+    start и end — значения time.perf_counter().
+    """
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, start, (end or time.perf_counter()) - start, detail)
+
+
+@contextmanager
+def span(name: str, detail: Optional[str] = None):
+    """
+    Замеряет блок кода: with span("infer"): ...
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, start, detail=detail)
+
+
+def merge_server_timing(prefix: str, header: Optional[str], start: float):
+    """
+    Добавляет этапы из Server-Timing ответа другого сервиса с префиксом его имени
+    (prediction.infer, data_interface.sql), чтобы router показывал всю цепочку.
+    """
+    trace = _current.get()
+    if trace is None or not header:
+        return
+    for entry in header.split(","):
+        name, _, params = entry.strip().partition(";")
+        match = _SERVER_TIMING_DUR_RE.search(params)
+        if name and name != "total" and match:
+            trace.add(f"{prefix}.{name}", start, float(match.group(1)) / 1000)
+
+
+def instrument_engine(engine: Engine):
+    """
+    Записывает каждый SQL-запрос engine span'ом "sql" с текстом запроса.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._trace_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_trace_started", None)
+        if started is not None:
+            record_span("sql", started, detail=" ".join(statement.split())[:TRACE_SQL_LENGTH])
+
+
+class FileSink:
+    """
+    Дописывает трассы запросов в файл NDJSON; запись из нескольких потоков под блокировкой.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        logger.info("Трассы запросов пишутся в %s", path)
+
+    def write(self, record: dict):
+        line = dumps(record).decode("utf-8") + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+
+class TracingMiddleware:
+    """
+    ASGI-middleware: заводит трассу запроса, добавляет X-Request-ID и Server-Timing
+    к ответу, по завершении пишет итог в лог и в файл span'ов.
+    Заголовки уходят до тела ответа, поэтому Server-Timing потокового ответа
+    охватывает время до первого байта.
+    """
+    def __init__(self, app, service: str):
+        self.app = app
+        self.service = service
+        self.sink = FileSink(os.path.join(TRACE_DIR, f"{service}.ndjson")) if TRACE_DIR else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        if not request_id or not _REQUEST_ID_RE.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        trace = Trace(request_id)
+        token = _current.set(trace)
+        status = 500
+
+        async def send_with_headers(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers[REQUEST_ID_HEADER] = request_id
+                if TRACE_SERVER_TIMING:
+                    headers["Server-Timing"] = trace.server_timing()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            self._finish(trace, scope, status)
+
+    def _finish(self, trace: Trace, scope, status: int):
+        trace.closed = True
+        duration = time.perf_counter() - trace.started
+        stages = " ".join(
+            f"{name}={total * 1000:.1f}" for name, (total, _) in trace.totals.items()
+        )
+        logger.info(
+            "request_id=%s %s %s %s %.1f мс%s",
+            trace.request_id, scope["method"], scope["path"], status, duration * 1000, f" {stages}" if stages else "",
+        )
+        if self.sink is None:
+            return
+        self.sink.write({
+            "service": self.service,
+            "request_id": trace.request_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "time": time.time() - duration,
+            "duration_ms": round(duration * 1000, 3),
+            "spans": [
+                {
+                    "name": s.name,
+                    "start_ms": round((s.start - trace.started) * 1000, 3),
+                    "duration_ms": round(s.duration * 1000, 3),
+                    "detail": s.detail,
+                }
+                for s in trace.spans
+            ],
+        })
+
+
+def setup_tracing(app: FastAPI, service: str):
+    """
+    Подключает трассировку запросов. Вызывается после setup_responses,
+    чтобы время сжатия ответа тоже входило в трассу.
+    """
+    app.add_middleware(TracingMiddleware, service=service)
@@ -0,0 +1,50 @@
+# shared/watermarks.py
+
+"""
+Водяные знаки данных отеля (таблица hotel_watermark).
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from shared.models import HotelWatermark
+
+BOOKINGS = "bookings_updated_at"
+PREDICTIONS = "predictions_updated_at"
+
+
+def touch_watermark(db: Session, hotel_id: int, column: str, at: Optional[datetime] = None):
+    """
+    Обновляет время последней записи (BOOKINGS или PREDICTIONS) в текущей транзакции.
+    Коммит выполняет вызывающий код.
+    """
+    at = at or datetime.utcnow()
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(HotelWatermark).values(hotel_id=hotel_id, **{column: at})
+        stmt = stmt.on_conflict_do_update(index_elements=["hotel_id"], set_={column: at})
+        db.execute(stmt)
+        return
+
+    record = db.get(HotelWatermark, hotel_id)
+    if record is None:
+        db.add(HotelWatermark(hotel_id=hotel_id, **{column: at}))
+    else:
+        setattr(record, column, at)
+
+
+def get_watermark(db: Session, hotel_id: int) -> Optional[Row]:
+    """
+    Строка (bookings_updated_at, predictions_updated_at) или None, если записей ещё не было.
+    """
+    return db.execute(
+        select(HotelWatermark.bookings_updated_at, HotelWatermark.predictions_updated_at)
+        .where(HotelWatermark.hotel_id == hotel_id)
+    ).first()